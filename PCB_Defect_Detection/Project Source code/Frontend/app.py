@@ -5,23 +5,30 @@ import pandas as pd
 import matplotlib.pyplot as plt
 import cv2
 import numpy as np
+import hashlib
 import io
-def draw_boxes_on_image(pil_img, boxes):
-    img = np.array(pil_img)
-    img = cv2.cvtColor(img, cv2.COLOR_RGB2BGR)
+import json
+import os
 
+# shared frontend helpers from the repository root, installed by requirements.txt
+from frontend_utils import SearchIndex, paginate, session_store, thumbnail_jpeg
+
+
+BOX_STYLE = {"color": (0, 0, 255)}  # BGR; 🔴 bright red (better visibility than green)
+
+
+def draw_boxes_on_image(img, boxes, style=BOX_STYLE):
+    """Draw boxes + labels in place on a BGR image."""
     h, w, _ = img.shape
     thickness = max(2, int(min(h, w) * 0.004))   # auto thickness
     font_scale = max(0.6, min(h, w) * 0.0015)    # auto font size
+    color = style["color"]
 
     for d in boxes:
         x1, y1, x2, y2 = d["x1"], d["y1"], d["x2"], d["y2"]
         conf = d["confidence"]
         label = f"{d['type']} {conf:.2f}"
 
-        # 🔴 Bright red box (better visibility than green)
-        color = (0, 0, 255)
-
         cv2.rectangle(img, (x1, y1), (x2, y2), color, thickness)
 
         cv2.putText(
@@ -33,9 +40,78 @@ def draw_boxes_on_image(pil_img, boxes):
             color,
             thickness
         )
-
-    img = cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
-    return Image.fromarray(img)
+    return img
+
+
+def render_annotated(store, input_ref, boxes, style=BOX_STYLE):
+    """
+    (annotated PNG ref, thumbnail ref) for an uploaded image, drawn locally
+    from the boxes. Cached per image, boxes and style, so reruns and repeat
+    predictions skip the decode / draw / encode.
+    """
+    boxes_key = hashlib.sha1(json.dumps(boxes, sort_keys=True).encode("utf-8")).hexdigest()
+    key = (input_ref, boxes_key, tuple(sorted(style.items())))
+    cache = st.session_state["render_cache"]
+    cached = cache.get(key)
+    if cached is not None and all(ref in store for ref in cached):
+        return cached
+
+    img = cv2.imdecode(np.frombuffer(store.get(input_ref), np.uint8), cv2.IMREAD_COLOR)
+    draw_boxes_on_image(img, boxes, style)
+    ok, png = cv2.imencode(".png", img)
+    if not ok:
+        raise ValueError("could not encode annotated image")
+    thumb = thumbnail_jpeg(Image.fromarray(cv2.cvtColor(img, cv2.COLOR_BGR2RGB)))
+    cache[key] = (store.put(png.tobytes()), store.put(thumb))
+    return cache[key]
+
+
+CHART_COLORS = ["#60a5fa","#a855f7","#22c55e","#4ade80"]
+
+
+def render_chart(store, type_counts):
+    """
+    PNG ref of the defect-count bar chart. Rendered once per distinct
+    type_counts; the figure is closed right after saving, so open panels
+    cost an image lookup per rerun instead of a live matplotlib figure.
+    """
+    key = tuple(type_counts.items())
+    cache = st.session_state["chart_cache"]
+    ref = cache.get(key)
+    if ref is not None and ref in store:
+        return ref
+
+    fig, ax = plt.subplots(figsize=(5.5,3), dpi=130)
+    try:
+        fig.patch.set_facecolor("#0f172a"); ax.set_facecolor("#0f172a")
+        keys = list(type_counts.keys()); vals = list(type_counts.values())
+        bars = ax.bar(keys, vals, color=CHART_COLORS[:len(keys)], edgecolor="white")
+        ax.set_title("Defect Count", color="#e5e7eb")
+        ax.tick_params(colors="#e5e7eb")
+        for b in bars:
+            ax.text(b.get_x()+b.get_width()/2, b.get_height()+0.05, str(int(b.get_height())), ha="center", color="#e5e7eb")
+        for s in ax.spines.values(): s.set_visible(False)
+        buffer = io.BytesIO()
+        fig.savefig(buffer, format="png", facecolor=fig.get_facecolor())
+    finally:
+        plt.close(fig)
+    cache[key] = store.put(buffer.getvalue())
+    return cache[key]
+
+
+def search_texts(result):
+    return [result["name"], *result["type_counts"]]
+
+
+def search_index():
+    """Search index in step with pred_results (rebuilt only after a reset)."""
+    index = st.session_state["search_index"]
+    results = st.session_state["pred_results"]
+    if len(index) != len(results):
+        index = st.session_state["search_index"] = SearchIndex()
+        for i, r in enumerate(results):
+            index.add(i, search_texts(r))
+    return index
 
 
 # ---------------- PAGE CONFIG ----------------
@@ -186,6 +262,21 @@ if "scroll_to" not in st.session_state:
     st.session_state["scroll_to"] = None
 if "search_value" not in st.session_state:
     st.session_state["search_value"] = ""
+if "search_index" not in st.session_state:
+    st.session_state["search_index"] = SearchIndex()  # over pred_results, built as they arrive
+if "zip_cache" not in st.session_state:
+    st.session_state["zip_cache"] = {}  # kind -> (selection signature, temp ZIP path)
+if "chart_cache" not in st.session_state:
+    st.session_state["chart_cache"] = {}  # type_counts items -> chart PNG ref
+if "render_cache" not in st.session_state:
+    st.session_state["render_cache"] = {}  # (image, boxes, style) -> (png ref, thumb ref)
+
+# image bytes live in a per-session, disk-backed store; results only keep
+# references to them
+store = session_store()
+if any(r["result_ref"] not in store for r in st.session_state["pred_results"]):
+    st.session_state["pred_results"] = []  # idle past ARTIFACT_TTL: files are gone
+    st.session_state["open_panels"] = []
 # ---------------- SAFETY INIT ----------------
 btn = False   # ✅ STEP 2 (IMPORTANT)
 # ---------------- UPLOAD ----------------
@@ -230,6 +321,7 @@ if uploaded_files:
 
     if btn:
         st.session_state["pred_results"] = []
+        st.session_state["search_index"] = SearchIndex()
 
         with st.spinner("Running inference..."):
             for f in uploaded_files:
@@ -239,7 +331,8 @@ if uploaded_files:
                 api_url = "http://127.0.0.1:8000/predict"
                 files = {"file": (f.name, image_bytes, "image/jpeg")}
 
-                response = requests.post(api_url, files=files)
+                # boxes only: the backend does not render or encode an image for us
+                response = requests.post(api_url, files=files, params={"profile": "boxes"})
                 if response.status_code != 200:
                     st.error("❌ Backend prediction failed")
                     st.stop()
@@ -267,16 +360,20 @@ if uploaded_files:
 
                 type_counts = pd.Series([r["Type"] for r in rows]).value_counts().to_dict()
 
-                input_img = Image.open(io.BytesIO(image_bytes)).convert("RGB")
-                annotated_img = draw_boxes_on_image(input_img.copy(), data["boxes"])
+                input_ref = store.put(image_bytes)
+                result_ref, thumb_ref = render_annotated(store, input_ref, data["boxes"])
 
-                st.session_state["pred_results"].append({
+                result = {
                     "name": f.name,
-                    "input_pil": input_img,
-                    "result_pil": annotated_img,
+                    "input_ref": input_ref,
+                    "result_ref": result_ref,
+                    "thumb_ref": thumb_ref,
+                    "boxes": data["boxes"],
                     "defect_rows": rows,
-                  "type_counts": type_counts
-            })
+                    "type_counts": type_counts,
+                }
+                st.session_state["search_index"].add(len(st.session_state["pred_results"]), search_texts(result))
+                st.session_state["pred_results"].append(result)
 
         st.rerun()
 
@@ -306,53 +403,30 @@ if st.session_state["pred_results"]:
 
 
 search_raw = st.session_state.get("search_value", "").strip().lower()
-results_to_show = st.session_state["pred_results"]  # default - all
+results_to_show = list(enumerate(st.session_state["pred_results"]))  # default - all, (index, result)
 
 if search_raw:
     keys = [k.strip() for k in search_raw.split(",") if k.strip()]
-    filtered = []
-
-    for r in st.session_state["pred_results"]:
-        name_l = r["name"].lower()
-        defect_types = [d["Type"].lower() for d in r["defect_rows"]]
-
-        match_found = False
-
-        # partial match in filename
-        for key in keys:
-            if key in name_l:
-                match_found = True
-                break
-
-        # partial match in defect types
-        if not match_found:
-            for d in defect_types:
-                for key in keys:
-                    if key in d:
-                        match_found = True
-                        break
-                if match_found:
-                    break
-
-        if match_found:
-            filtered.append(r)
-
-    if len(filtered) == 0:
+    # partial match in file name or defect types, via the n-gram index
+    matches = search_index().search(keys)
+
+    if len(matches) == 0:
         st.warning("No matching results found. Check the name or defect spelling.")
     else:
-        results_to_show = filtered
+        results_to_show = [(i, st.session_state["pred_results"][i]) for i in matches]
 # ---------------- SUMMARY ----------------
 if st.session_state["pred_results"]:
     st.markdown("### Summary Table")
 
-for r in results_to_show:
-    orig_idx = st.session_state["pred_results"].index(r)
+# thumbnails, one page at a time; full-size images only in opened panels
+page_start, page_stop = paginate(len(results_to_show), key="summary_page")
+for orig_idx, r in results_to_show[page_start:page_stop]:
 
     c0, c1, c2, c3 = st.columns([1, 2, 2, 1])
 
     with c0:
         st.markdown('<div class="summary-img">', unsafe_allow_html=True)
-        st.image(r["result_pil"])
+        st.image(store.get(r["thumb_ref"]))
         st.markdown('</div>', unsafe_allow_html=True)
 
     with c1:
@@ -385,12 +459,12 @@ for idx in st.session_state["open_panels"][:]:
     with colA:
         st.markdown("**Original Image**")
         st.markdown('<div class="big-img-container">', unsafe_allow_html=True)
-        st.image(det["input_pil"])
+        st.image(store.get(det["input_ref"]))
         st.markdown('</div>', unsafe_allow_html=True)
     with colB:
         st.markdown("**Prediction Output**")
         st.markdown('<div class="big-img-container">', unsafe_allow_html=True)
-        st.image(det["result_pil"])
+        st.image(store.get(det["result_ref"]))
         st.markdown('</div>', unsafe_allow_html=True)
     df = pd.DataFrame(det["defect_rows"])
     st.dataframe(df, width="stretch")
@@ -424,20 +498,10 @@ for idx in st.session_state["open_panels"][:]:
     if det["type_counts"]:
         g1,g2 = st.columns([1,1])
         with g1:
-            fig, ax = plt.subplots(figsize=(5.5,3), dpi=130)
-            fig.patch.set_facecolor("#0f172a"); ax.set_facecolor("#0f172a")
-            keys = list(det["type_counts"].keys()); vals = list(det["type_counts"].values())
-            colors = ["#60a5fa","#a855f7","#22c55e","#4ade80"]
-            bars = ax.bar(keys, vals, color=colors[:len(keys)], edgecolor="white")
-            ax.set_title("Defect Count", color="#e5e7eb")
-            ax.tick_params(colors="#e5e7eb")
-            for b in bars:
-                ax.text(b.get_x()+b.get_width()/2, b.get_height()+0.05, str(int(b.get_height())), ha="center", color="#e5e7eb")
-            for s in ax.spines.values(): s.set_visible(False)
-            st.pyplot(fig)
+            st.image(store.get(render_chart(store, det["type_counts"])), width="stretch")
         with g2:
-            st.write("**Total Defects:**", sum(vals))
-            for k,v in zip(keys, vals):
+            st.write("**Total Defects:**", sum(det["type_counts"].values()))
+            for k,v in det["type_counts"].items():
                 st.write(f"- **{k}:** {v}")
     else:
         st.info("No defects found.")
@@ -445,10 +509,13 @@ for idx in st.session_state["open_panels"][:]:
         st.session_state["open_panels"].remove(idx); st.rerun()
     st.markdown("</div>", unsafe_allow_html=True)
 # ---------------- ZIP DOWNLOAD BUTTONS ----------------
-import io
+import tempfile
 import zipfile
+from concurrent.futures import ThreadPoolExecutor
 from reportlab.pdfgen import canvas
 
+ZIP_WORKERS = 4  # threads generating per-board reports
+
 def generate_pdf(defects, filename):
     buffer = io.BytesIO()
     c = canvas.Canvas(buffer)
@@ -467,34 +534,58 @@ def generate_pdf(defects, filename):
     buffer.seek(0)
     return buffer.read()
 
-def create_zip(result_list):
-    zip_buffer = io.BytesIO()
-    with zipfile.ZipFile(zip_buffer, "w") as z:
-        for r in result_list:
-            name = r["name"]
+def details_text(defects):
+    return "".join(
+        f"{d['Index']} - {d['Type']} | Conf:{d['Confidence']} | Sev:{d['Severity']} | Loc:{d['Location']}\n"
+        for d in defects
+    )
 
-            # Add prediction image
-            img_buffer = io.BytesIO()
-            r["result_pil"].save(img_buffer, format="PNG")
-            z.writestr(f"{name}/prediction.png", img_buffer.getvalue())
 
-            # Add original image
-            ori_buffer = io.BytesIO()
-            r["input_pil"].save(ori_buffer, format="PNG")
-            z.writestr(f"{name}/original.png", ori_buffer.getvalue())
+def has_artifacts(r):
+    return all(r.get(k) is not None and r[k] in store for k in ("details_ref", "pdf_ref"))
 
-            # Add text file
-            txt = ""
-            for d in r["defect_rows"]:
-                txt += f"{d['Index']} - {d['Type']} | Conf:{d['Confidence']} | Sev:{d['Severity']} | Loc:{d['Location']}\n"
-            z.writestr(f"{name}/details.txt", txt)
 
-            # Add PDF
-            pdf_bytes = generate_pdf(r["defect_rows"], name)
-            z.writestr(f"{name}/report.pdf", pdf_bytes)
+def board_artifacts(r):
+    """details.txt + report.pdf for one board, written to the artifact store (worker thread)."""
+    return {
+        "details_ref": store.put(details_text(r["defect_rows"]).encode("utf-8")),
+        "pdf_ref": store.put(generate_pdf(r["defect_rows"], r["name"])),
+    }
+
 
-    zip_buffer.seek(0)
-    return zip_buffer
+def create_zip(result_list, kind):
+    """
+    Path of a ZIP with every board's images, details.txt and report.pdf.
+    Missing per-board artifacts are generated on a thread pool and cached
+    on the result; the ZIP is streamed to a temp file from the store and
+    reused while the selection is unchanged.
+    """
+    missing = [r for r in result_list if not has_artifacts(r)]
+    if missing:
+        with ThreadPoolExecutor(ZIP_WORKERS) as pool:
+            for r, refs in zip(missing, pool.map(board_artifacts, missing)):
+                r.update(refs)
+
+    signature = [(r["name"], r["input_ref"], r["result_ref"], r["pdf_ref"]) for r in result_list]
+    cached = st.session_state["zip_cache"].get(kind)
+    if cached is not None:
+        if cached[0] == signature and os.path.exists(cached[1]):
+            return cached[1]
+        if os.path.exists(cached[1]):
+            os.remove(cached[1])
+
+    # kept in the session's store directory, so it expires with the session
+    fd, path = tempfile.mkstemp(prefix=f"{kind}_", suffix=".zip", dir=store.dir)
+    with os.fdopen(fd, "wb") as f, zipfile.ZipFile(f, "w") as z:
+        for r in result_list:
+            name = r["name"]
+            z.write(store.path(r["result_ref"]), f"{name}/prediction.png")
+            # the uploaded file as is
+            z.write(store.path(r["input_ref"]), f"{name}/original{os.path.splitext(name)[1]}")
+            z.write(store.path(r["details_ref"]), f"{name}/details.txt")
+            z.write(store.path(r["pdf_ref"]), f"{name}/report.pdf")
+    st.session_state["zip_cache"][kind] = (signature, path)
+    return path
 
 # Buttons visible only when results exist
 if st.session_state["pred_results"]:
@@ -503,24 +594,24 @@ if st.session_state["pred_results"]:
     # BUTTON – Download your Search Results
     if search_raw and results_to_show:
         if st.button(" Download your Search Results (ZIP)"):
-            zip_file = create_zip(results_to_show)
+            with open(create_zip([r for _, r in results_to_show], "searched_results"), "rb") as zip_file:
+                st.download_button(
+                    label="⬇️ Click to Download Searched ZIP",
+                    data=zip_file,
+                    file_name="searched_results.zip",
+                    mime="application/zip"
+                )
+
+    # BUTTON – Download All Results ZIP
+    if st.button(" Download All Results (ZIP)"):
+        with open(create_zip(st.session_state["pred_results"], "all_results"), "rb") as zip_file:
             st.download_button(
-                label="⬇️ Click to Download Searched ZIP",
+                label="⬇️ Click to Download ALL Results ZIP",
                 data=zip_file,
-                file_name="searched_results.zip",
+                file_name="all_results.zip",
                 mime="application/zip"
             )
 
-    # BUTTON – Download All Results ZIP
-    if st.button(" Download All Results (ZIP)"):
-        zip_file = create_zip(st.session_state["pred_results"])
-        st.download_button(
-            label="⬇️ Click to Download ALL Results ZIP",
-            data=zip_file,
-            file_name="all_results.zip",
-            mime="application/zip"
-        )
-
 # ---------------- ROBUST SCROLL ----------------
 if st.session_state.get("scroll_to"):
     anchor = st.session_state["scroll_to"]
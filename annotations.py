@@ -0,0 +1,100 @@
+# annotations.py
+# Shared Pascal-VOC -> YOLO helpers for xmltotext.py / xmltosplit.py.
+import os
+import xml.etree.ElementTree as ET
+
+import numpy as np
+from PIL import Image
+
+
+def xyxy_to_yolo(xmin, ymin, xmax, ymax, img_w, img_h):
+    x_center = (xmin + xmax) / 2.0
+    y_center = (ymin + ymax) / 2.0
+    w = xmax - xmin
+    h = ymax - ymin
+    return x_center / img_w, y_center / img_h, w / img_w, h / img_h
+
+
+def parse_yolo_boxes(text, width, height):
+    """YOLO label text -> (class ids int array, (N, 4) xyxy pixel boxes)."""
+    values = np.array(text.split(), dtype=np.float64).reshape(-1, 5) if text else np.zeros((0, 5))
+    cls = values[:, 0].astype(np.int64)
+    xc, yc = values[:, 1] * width, values[:, 2] * height
+    w, h = values[:, 3] * width, values[:, 4] * height
+    return cls, np.stack([xc - w / 2, yc - h / 2, xc + w / 2, yc + h / 2], axis=1)
+
+
+def default_labels_dir(images_dir):
+    """dataset/images/val -> dataset/labels/val (YOLO convention)."""
+    parts = os.path.normpath(images_dir).split(os.sep)
+    if "images" in parts:
+        parts[len(parts) - 1 - parts[::-1].index("images")] = "labels"
+    return os.sep.join(parts)
+
+
+def load_class_map(path):
+    """classes.txt (one name per line) -> {name: id} in file order."""
+    with open(path) as f:
+        names = [line.strip() for line in f if line.strip()]
+    return {name: i for i, name in enumerate(names)}
+
+
+def save_class_map(class_map, path):
+    with open(path, "w") as f:
+        for name in sorted(class_map, key=class_map.get):
+            f.write(name + "\n")
+
+
+def scan_class_names(xml_file):
+    """Set of object class names in one VOC file (for a class-map pre-pass)."""
+    return {el.text for el in ET.parse(xml_file).getroot().iterfind("object/name")}
+
+
+def build_class_map(names):
+    """Deterministic {name: id}: sorted, so IDs never depend on file order."""
+    return {name: i for i, name in enumerate(sorted(names))}
+
+
+def parse_voc(xml_file, images_dir):
+    """Return (filename, width, height, [(class_name, xmin, ymin, xmax, ymax), ...])."""
+    root = ET.parse(xml_file).getroot()
+    img_name = root.findtext('filename')
+
+    # Get image size
+    size = root.find('size')
+    if size is not None:
+        width = int(size.findtext('width'))
+        height = int(size.findtext('height'))
+    else:
+        # Try reading from image
+        img_path = os.path.join(images_dir, img_name)
+        with Image.open(img_path) as im:
+            width, height = im.size
+
+    objects = []
+    for obj in root.iterfind('object'):
+        bndbox = obj.find('bndbox')
+        objects.append((
+            obj.findtext('name'),
+            float(bndbox.findtext('xmin')),
+            float(bndbox.findtext('ymin')),
+            float(bndbox.findtext('xmax')),
+            float(bndbox.findtext('ymax')),
+        ))
+    return img_name, width, height, objects
+
+
+def yolo_lines(objects, width, height, class_map):
+    """
+    Format objects as YOLO label lines. Returns (lines, unknown_class_names);
+    objects whose class is missing from `class_map` are skipped.
+    """
+    lines, unknown = [], set()
+    for cls, xmin, ymin, xmax, ymax in objects:
+        cls_id = class_map.get(cls)
+        if cls_id is None:
+            unknown.add(cls)
+            continue
+        x, y, w, h = xyxy_to_yolo(xmin, ymin, xmax, ymax, width, height)
+        lines.append(f"{cls_id} {x:.6f} {y:.6f} {w:.6f} {h:.6f}")
+    return lines, unknown
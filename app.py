@@ -1,16 +1,21 @@
 import base64
-from io import BytesIO
+import json
 import requests
 import os
 from collections import Counter
-import io
+import tempfile
 import zipfile
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
 import streamlit as st
 from ultralytics import YOLO
 from PIL import Image
 import pandas as pd
 import altair as alt
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from frontend_utils import paginate, session_store, thumbnail_jpeg
 
 # ------------------ CONFIG ------------------
 API_URL = "http://127.0.0.1:8000/predict"
@@ -18,10 +23,19 @@ LOCAL_MODEL_PATH = r"C:\Users\asus\OneDrive\Desktop\yolo deploy\best.pt"
 CLOUD_MODEL_PATH = "best.pt"
 
 MODEL_PATH = LOCAL_MODEL_PATH if os.path.exists(LOCAL_MODEL_PATH) else CLOUD_MODEL_PATH
+METRICS_PATH = "metrics.json"  # written by: python evaluate.py --json metrics.json
+SIDEBAR_METRICS = [("mAP50", "mAP@50"), ("mAP50-95", "mAP@50–95"),
+                   ("precision", "Precision"), ("recall", "Recall")]
 
 CONFIDENCE = 0.25
 IOU = 0.45
 
+MAX_CONCURRENT_REQUESTS = 4   # images in flight to the backend at once
+REQUEST_TIMEOUT = (5, 120)    # seconds: (connect, read)
+
+CSV_NAME = "circuitguard_detection_results.csv"
+ROW_COLUMNS = ["Image", "Defect type", "Confidence", "x1", "y1", "x2", "y2"]
+
 st.set_page_config(
     page_title="PCB Defect Detection",
     page_icon="🎄",
@@ -298,12 +312,14 @@ st.markdown(
 # ------------------ SESSION STATE ------------------
 if "full_results_df" not in st.session_state:
     st.session_state["full_results_df"] = None
-if "annotated_images" not in st.session_state:
-    st.session_state["annotated_images"] = []
+if "exports" not in st.session_state:
+    st.session_state["exports"] = {}  # kind -> (signature, temp ZIP path)
 if "show_download" not in st.session_state:
-    st.session_state["show_download"] = False
+    st.session_state["show_download"] = None  # results signature the export was requested for
 if "image_results" not in st.session_state:
     st.session_state["image_results"] = []
+if "result_cache" not in st.session_state:
+    st.session_state["result_cache"] = {}
 
 
 # ------------------ MODEL LOADING & INFERENCE ------------------
@@ -323,6 +339,61 @@ def run_inference(model, image):
     return pil_img, r
 
 
+@st.cache_resource
+def get_session():
+    """One keep-alive connection pool to the backend, shared by all reruns."""
+    session = requests.Session()
+    retry = Retry(
+        total=3,
+        backoff_factor=0.5,
+        status_forcelist=(502, 503, 504),
+        allowed_methods=frozenset({"GET", "POST"}),  # /predict is safe to repeat
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=MAX_CONCURRENT_REQUESTS, max_retries=retry)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+def post_image(session, name, data, mime):
+    """Send one image to the backend; raises requests.RequestException on failure."""
+    response = session.post(API_URL, files={"file": (name, data, mime)}, timeout=REQUEST_TIMEOUT)
+    response.raise_for_status()
+    return response.json()
+
+
+def post_upload(session, store, name, mime, ref):
+    """post_image() for an upload kept in the store (read on the worker thread)."""
+    return post_image(session, name, store.get(ref), mime)
+
+
+def result_key(name, ref):
+    """
+    Memo key: file name and image content (its store ref is a content hash)
+    plus everything that changes the backend's answer. The name is part of
+    it because results carry it (grid captions, CSV rows, ZIP entries).
+    """
+    return name, ref, API_URL, CONFIDENCE, IOU
+
+
+def forget_expired(res):
+    """
+    The session's stored files expired (ARTIFACT_TTL) while in use: drop the
+    memoized result and rerun, which inspects the image again.
+    """
+    st.session_state["result_cache"].pop(res["key"], None)
+    st.rerun()
+
+
+def read_artifact(store, res, ref_name):
+    """Bytes of one of a result's stored images."""
+    try:
+        return store.get(res[ref_name])
+    except FileNotFoundError:
+        forget_expired(res)
+
+
 def get_class_counts(result, class_names):
     """Return a dict: {class_name: count} for one result."""
     if len(result.boxes) == 0:
@@ -333,42 +404,86 @@ def get_class_counts(result, class_names):
     return dict(counts)
 
 
-def get_defect_locations(result, class_names, image_name):
-    """Return rows with defect type, confidence and bounding box coords + image name."""
-    if len(result.boxes) == 0:
-        return []
-
-    boxes = result.boxes
-    xyxy = boxes.xyxy.tolist()
-    cls_indices = boxes.cls.tolist()
-    confs = boxes.conf.tolist()
-
+def get_defect_locations(detections, image_name):
+    """
+    Return rows with defect type, confidence and bounding box coords + image name.
+    Uses the backend's float bboxes; its "boxes" are truncated to integers.
+    """
     rows = []
-    for coords, c, cf in zip(xyxy, cls_indices, confs):
-        x1, y1, x2, y2 = coords
+    for d in detections:
+        x1, y1, x2, y2 = d["bbox"]
         rows.append({
             "Image": image_name,
-            "Defect type": class_names[int(c)],
-            "Confidence": round(float(cf), 2),
-            "x1": round(float(x1), 1),
-            "y1": round(float(y1), 1),
-            "x2": round(float(x2), 1),
-            "y2": round(float(y2), 1),
+            "Defect type": d["type"],
+            "Confidence": round(float(d["confidence"]), 2),
+            "x1": float(x1),
+            "y1": float(y1),
+            "x2": float(x2),
+            "y2": float(y2),
         })
-
     return rows
 
 
+def zip_entry_names(results):
+    """annotated_<stem>.png per result, numbered when stems repeat (x.jpg and x.png)."""
+    names, taken = [], set()
+    for res in results:
+        stem = os.path.splitext(res["name"])[0]
+        name, n = f"annotated_{stem}.png", 1
+        while name in taken:
+            n += 1
+            name = f"annotated_{stem}_{n}.png"
+        taken.add(name)
+        names.append(name)
+    return names
+
+
+def export_zip(store, kind, results, rows=None):
+    """
+    Path of a ZIP with the annotated PNGs (and the CSV when `rows` is given).
+    It is streamed to a temp file from the PNG files the backend returned,
+    and only rebuilt when the set of results changes.
+    """
+    signature = [res["key"] for res in results]
+    cached = st.session_state["exports"].get(kind)
+    if cached is not None:
+        if cached[0] == signature and os.path.exists(cached[1]):
+            return cached[1]
+        if os.path.exists(cached[1]):
+            os.remove(cached[1])
+
+    # kept in the session's store directory, so it expires with the session
+    fd, path = tempfile.mkstemp(prefix=f"circuitguard_{kind}_", suffix=".zip", dir=store.dir)
+    with os.fdopen(fd, "wb") as f, zipfile.ZipFile(f, "w") as zf:
+        if rows is not None:
+            csv_text = pd.DataFrame(rows, columns=ROW_COLUMNS).to_csv(index=False)
+            zf.writestr(CSV_NAME, csv_text, compress_type=zipfile.ZIP_DEFLATED)
+        for res, name in zip(results, zip_entry_names(results)):
+            try:
+                zf.write(store.path(res["annotated_ref"]), name)  # PNG: stored as is
+            except FileNotFoundError:
+                forget_expired(res)  # the partial ZIP is in the store directory, swept with it
+    st.session_state["exports"][kind] = (signature, path)
+    return path
+
+
 # ------------------ SIDEBAR ------------------
 with st.sidebar:
     # ---------- MODEL PERFORMANCE ----------
     st.subheader("📊 Model Performance")
-    st.markdown("""
-    **mAP@50:** 0.9823  
-    **mAP@50–95:** 0.5598  
-    **Precision:** 0.9714  
-    **Recall:** 0.9765
-    """)
+    metrics = {"mAP50": 0.9823, "mAP50-95": 0.5598, "precision": 0.9714, "recall": 0.9765}
+    if os.path.exists(METRICS_PATH):
+        try:
+            with open(METRICS_PATH) as f:
+                metrics = json.load(f)
+        except (OSError, ValueError):
+            st.caption(f"Could not read {METRICS_PATH}; showing the reference numbers.")
+    # a metrics file from another tool may lack some fields: show what is there
+    st.markdown("  \n".join(
+        f"**{label}:** {metrics[key]:.4f}"
+        for key, label in SIDEBAR_METRICS
+        if isinstance(metrics.get(key), (int, float))
+    ))
 
     st.markdown("---")
 
@@ -443,11 +558,19 @@ if "uploaded_files" not in st.session_state:
 if "image_results" not in st.session_state:
     st.session_state["image_results"] = []
 
-# 3️⃣ ADD NEW FILES (NO DUPLICATES)
+# 3️⃣ ADD NEW FILES (NO DUPLICATES; a re-upload under the same name replaces it)
+# Image bytes live in a per-session, disk-backed store; session state only
+# keeps (name, MIME type, store ref) per upload
+store = session_store()
 if uploaded_files:
+    stored = st.session_state["uploaded_files"]
     for f in uploaded_files:
-        if f.name not in [x.name for x in st.session_state["uploaded_files"]]:
-            st.session_state["uploaded_files"].append(f)
+        entry = (f.name, f.type, store.put(f.getvalue()))
+        names = [name for name, _, _ in stored]
+        if f.name in names:
+            stored[names.index(f.name)] = entry
+        else:
+            stored.append(entry)
 
 
 
@@ -461,155 +584,162 @@ if "uploaded_files" in st.session_state and st.session_state["uploaded_files"]:
         st.error(f"Error loading model from `{MODEL_PATH}`: {e}")
     else:
         global_counts = Counter()
-        all_rows = []
-        
-        # 🔥 RESET RESULTS BEFORE FRESH DETECTION
-        st.session_state["image_results"] = []
-        global_counts = Counter()
-
-        # Run detection for all remaining images
-        for file in st.session_state["uploaded_files"]:
-            img = Image.open(file).convert("RGB")
 
-            with st.spinner(f"Running detection on {file.name}..."):
-
-                files = {
-                    "file": (file.name, file.getvalue(), file.type)
+        # Results are memoized per file name + content + inference settings,
+        # so a rerun (any widget click) only sends new, renamed or changed images
+        session = get_session()
+        files = st.session_state["uploaded_files"]
+        keys = {name: result_key(name, ref) for name, _, ref in files}
+        memo = {
+            key: res for key, res in st.session_state["result_cache"].items()
+            if all(res[r] in store for r in ("original_ref", "annotated_ref", "thumb_ref"))
+        }  # a session idle past ARTIFACT_TTL has lost its files: inspect again
+        banner_slot = st.container()  # banner + ZIP, filled once all results are in
+
+        # Overview grid: JPEG thumbnails, one page at a time. Each card has a
+        # placeholder in upload order, filled as soon as its result is in
+        st.markdown("### Annotated results overview")
+        page_start, page_stop = paginate(len(files), key="overview_page")
+        grid_cols = st.columns(3)
+        cards = {}
+        for slot, (name, _, _) in enumerate(files[page_start:page_stop]):
+            with grid_cols[slot % 3]:
+                cards[name] = st.empty()
+        results = {}
+
+        def add_result(res):
+            global_counts.update(res["defect_counts"])
+            results[res["name"]] = res
+            if res["name"] in cards:
+                cards[res["name"]].image(read_artifact(store, res, "thumb_ref"), caption=res["name"],
+                                         use_column_width=True)
+
+        for name, _, _ in files:
+            if keys[name] in memo:
+                add_result(memo[keys[name]])
+        pending = [upload for upload in files if upload[0] not in results]
+        expired = set()
+
+        # Send the rest to the backend concurrently; each card is drawn as its
+        # result arrives (Streamlit calls stay on this thread)
+        if pending:
+            progress = st.progress(0.0, text=f"Running detection on {len(pending)} image(s)...")
+            with ThreadPoolExecutor(MAX_CONCURRENT_REQUESTS) as pool:
+                futures = {
+                    pool.submit(post_upload, session, store, name, mime, ref): (name, ref)
+                    for name, mime, ref in pending
                 }
-
-                response = requests.post(API_URL, files=files)
-
-                if response.status_code != 200:
-                    st.error(f"Backend error for {file.name}")
-                    continue
-
-                api_result = response.json()
-                defect_counts = api_result["defects_detected"]
-                total_defects = api_result["total_defects"]
-
-                global_counts.update(defect_counts)
-
-                api_result = response.json()
-
-                defect_counts = api_result["defects_detected"]
-                total_defects = api_result["total_defects"]
-
-                # -------- decode annotated image --------
-                img_base64 = api_result["annotated_image"]
-                img_bytes = base64.b64decode(img_base64)
-                annotated_img = Image.open(BytesIO(img_bytes))
-
-                existing_names = [r["name"] for r in st.session_state["image_results"]]
-
-                if file.name not in existing_names:
-                    st.session_state["image_results"].append(
-                        {
-                            "name": file.name,
-                            "original": img,
-                            "annotated": annotated_img,
-                            "defect_counts": api_result["defects_detected"],
-                            "total": api_result["total_defects"],
-                        }
-                    )
-
+                for n_done, future in enumerate(as_completed(futures), 1):
+                    name, ref = futures[future]
+                    progress.progress(n_done / len(pending),
+                                      text=f"{n_done}/{len(pending)} images processed")
+                    try:
+                        api_result = future.result()
+                    except FileNotFoundError:
+                        st.warning(f"{name} expired from this session, please upload it again.")
+                        expired.add(name)
+                        continue
+                    except requests.RequestException as e:
+                        st.error(f"Backend error for {name}: {e}")
+                        continue
+
+                    # -------- decode annotated image --------
+                    img_bytes = base64.b64decode(api_result["annotated_image"])
+                    add_result({
+                        "name": name,
+                        "key": keys[name],
+                        "original_ref": ref,
+                        "annotated_ref": store.put(img_bytes),
+                        "thumb_ref": store.put(thumbnail_jpeg(img_bytes)),
+                        "rows": get_defect_locations(api_result.get("detections", []), name),
+                        "defect_counts": api_result["defects_detected"],
+                        "total": api_result["total_defects"],
+                    })
+            progress.empty()
+        if expired:
+            files[:] = [upload for upload in files if upload[0] not in expired]
+
+        # Keep only results for images still uploaded
+        st.session_state["result_cache"] = {keys[name]: res for name, res in results.items()}
+
+        # Upload order for the detailed view and the exports
+        st.session_state["image_results"] = [results[name] for name, _, _ in files if name in results]
 
         # Build full results DF for export (all images)
-        if all_rows:
-            full_results_df = pd.DataFrame(all_rows)
-            st.session_state["full_results_df"] = full_results_df
-            st.session_state["annotated_images"] = [
-                (res["name"], res["annotated"]) for res in st.session_state["image_results"]
-
-            ]
+        all_rows = [row for res in st.session_state["image_results"] for row in res["rows"]]
+        # Export requests remember the results they were made for, so a new
+        # batch needs a new click before anything is built
+        results_signature = [res["key"] for res in st.session_state["image_results"]]
+        if st.session_state["image_results"]:
+            st.session_state["full_results_df"] = pd.DataFrame(all_rows, columns=ROW_COLUMNS)
         else:
             st.session_state["full_results_df"] = None
-            st.session_state["annotated_images"] = []
-
-        # Robotic animated success banner + clear info strip
-        if st.session_state.get("image_results"):
-            st.markdown(
-                """
-                <div class="robot-success">
-                <span class="robot-label">[SYSTEM]</span>
-                DEFECT SCAN COMPLETE — ANALYSIS DASHBOARD ONLINE.
-                </div>
-                <div class="status-strip">
-                Detection complete. Scroll down to view detailed results and download options.
-                </div>
-                """,
-                unsafe_allow_html=True,
-            )
-        # ---------------- DOWNLOAD ALL ANNOTATED IMAGES ----------------
-        if st.session_state.get("image_results"):
-            zip_buffer = io.BytesIO()
-
-            with zipfile.ZipFile(zip_buffer, "w", zipfile.ZIP_DEFLATED) as zf:
-                for res in st.session_state["image_results"]:
-                    img_bytes = io.BytesIO()
-                    res["annotated"].save(img_bytes, format="PNG")
-                    img_bytes.seek(0)
-
-                    base = os.path.splitext(res["name"])[0]
-                    zf.writestr(f"annotated_{base}.png", img_bytes.getvalue())
-
-            zip_buffer.seek(0)
-
-            st.download_button(
-                "⬇️ Download all annotated images (ZIP)",
-                data=zip_buffer,
-                file_name="annotated_images.zip",
-                mime="application/zip",
-            )
 
+        with banner_slot:
+            # Robotic animated success banner + clear info strip
+            if st.session_state.get("image_results"):
+                st.markdown(
+                    """
+                    <div class="robot-success">
+                    <span class="robot-label">[SYSTEM]</span>
+                    DEFECT SCAN COMPLETE — ANALYSIS DASHBOARD ONLINE.
+                    </div>
+                    <div class="status-strip">
+                    Detection complete. Scroll down to view detailed results and download options.
+                    </div>
+                    """,
+                    unsafe_allow_html=True,
+                )
+            # ---------------- DOWNLOAD ALL ANNOTATED IMAGES ----------------
+            # built only once asked for, then reused until the results change
+            if st.session_state.get("image_results"):
+                if st.button("📦 Prepare annotated images (ZIP)"):
+                    st.session_state["zip_requested"] = results_signature
+
+                if st.session_state.get("zip_requested") == results_signature:
+                    zip_path = export_zip(store, "images", st.session_state["image_results"])
+                    with open(zip_path, "rb") as zip_file:
+                        st.download_button(
+                            "⬇️ Download all annotated images (ZIP)",
+                            data=zip_file,
+                            file_name="annotated_images.zip",
+                            mime="application/zip",
+                        )
 
-        # Overview grid
         if st.session_state["image_results"]:
-            st.markdown("### Annotated results overview")
-            grid_cols = st.columns(3)
-            for idx, res in enumerate(st.session_state["image_results"]):
-
-                col = grid_cols[idx % 3]
-                with col:
-                    st.image(
-                        res["annotated"],
-                        caption=res["name"],
-                        use_column_width=True,
-                    )
-
-            # Detailed before/after for each image
+            # Detailed view for the current page; full-resolution images are
+            # only sent to the browser for the panels that are opened
             st.markdown("### Detailed view per image")
-            for idx, res in enumerate(st.session_state["image_results"]):
+            page = [results[name] for name in cards if name in results]  # same page as the grid
+            for idx, res in enumerate(page, page_start):
                 st.markdown(f"#### 🖼️ Image: {res['name']}")
-                col1, col2 = st.columns(2)
+                col1, col2 = st.columns([1, 2])
 
                 with col1:
-                    st.image(
-                        res["original"],
-                        caption="Original image",
-                        use_column_width=True,
-                    )
+                    st.image(read_artifact(store, res, "thumb_ref"), caption="Annotated detections",
+                             use_column_width=True)
 
                 with col2:
-                    st.image(
-                        res["annotated"],
-                        caption="Annotated detections",
-                        use_column_width=True,
-                    )
-
-                    # single annotated image download
-                    img_bytes = io.BytesIO()
-                    res["annotated"].save(img_bytes, format="PNG")
-                    img_bytes.seek(0)
+                    # single annotated image download (the backend's PNG as is)
                     base = os.path.splitext(res["name"])[0]
                     st.download_button(
                         "Download annotated image",
-                        data=img_bytes,
+                        data=read_artifact(store, res, "annotated_ref"),
                         file_name=f"annotated_{base}.png",
                         mime="image/png",
                         key=f"download_single_{idx}",
                     )
+                    show_full = st.checkbox("🔍 Open full-resolution view", key=f"full_view_{res['name']}")
+
+                if show_full:
+                    full1, full2 = st.columns(2)
+                    with full1:
+                        st.image(read_artifact(store, res, "original_ref"), caption="Original image",
+                                 use_column_width=True)
+                    with full2:
+                        st.image(read_artifact(store, res, "annotated_ref"),
+                                 caption="Annotated detections", use_column_width=True)
 
-                
                 if res["total"] == 0:
                     st.success("No defects detected in this image.")
                 else:
@@ -682,34 +812,25 @@ if "uploaded_files" in st.session_state and st.session_state["uploaded_files"]:
         if st.session_state["full_results_df"] is not None:
             st.markdown("### Export results")
             if st.button("Finish defect detection"):
-                st.session_state["show_download"] = True
+                st.session_state["show_download"] = results_signature
 
-            if st.session_state["show_download"]:
+            if st.session_state["show_download"] == results_signature:
                 full_results_df = st.session_state["full_results_df"]
-                annotated_images = st.session_state["annotated_images"]
-
-                csv_bytes = full_results_df.to_csv(index=False).encode("utf-8")
-
-                zip_buffer = io.BytesIO()
-                with zipfile.ZipFile(zip_buffer, "w", zipfile.ZIP_DEFLATED) as zf:
-                    # CSV
-                    zf.writestr("circuitguard_detection_results.csv", csv_bytes)
-                    # Annotated images
-                    for name, pil_img in annotated_images:
-                        img_bytes_io = io.BytesIO()
-                        pil_img.save(img_bytes_io, format="PNG")
-                        img_bytes_io.seek(0)
-                        base = os.path.splitext(name)[0]
-                        zf.writestr(f"annotated_{base}.png", img_bytes_io.getvalue())
-
-                zip_buffer.seek(0)
-
                 st.download_button(
-                    "Download results (CSV + annotated images, ZIP)",
-                    data=zip_buffer,
-                    file_name="circuitguard_results.zip",
-                    mime="application/zip",
+                    "Download detections (CSV)",
+                    data=full_results_df.to_csv(index=False).encode("utf-8"),
+                    file_name=CSV_NAME,
+                    mime="text/csv",
                 )
+
+                zip_path = export_zip(store, "results", st.session_state["image_results"], rows=all_rows)
+                with open(zip_path, "rb") as zip_file:
+                    st.download_button(
+                        "Download results (CSV + annotated images, ZIP)",
+                        data=zip_file,
+                        file_name="circuitguard_results.zip",
+                        mime="application/zip",
+                    )
 if "uploaded_files" not in st.session_state or not st.session_state["uploaded_files"]:
     st.info("Upload one or more PCB images to start detection.")
 
@@ -0,0 +1,132 @@
+# artifact_store.py
+# Disk-backed, content-addressed storage for the image bytes the Streamlit
+# frontends keep per user session (uploads, annotated PNGs, thumbnails).
+#
+# Session state only holds references (sha256 hex digests). The bytes live
+# under <root>/<session id>/<ref>, and a small process-wide LRU keeps the
+# most recently used ones in memory. Each session directory's mtime is its
+# last use; directories idle for longer than the TTL are removed by the next
+# store that is opened.
+#
+#   ARTIFACT_DIR        root directory (default: <tmp>/pcb_artifacts)
+#   ARTIFACT_TTL        seconds a session is kept after its last use (default 6 h)
+#   ARTIFACT_MEMORY_MB  in-memory LRU budget, shared by all sessions (default 64)
+import hashlib
+import os
+import shutil
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+
+SWEEP_INTERVAL = 300  # s between scans for expired sessions
+
+
+class _MemoryLRU:
+    """Byte-budgeted LRU shared by every session in the process."""
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            data = self._items.get(key)
+            if data is not None:
+                self._items.move_to_end(key)
+            return data
+
+    def put(self, key, data):
+        if len(data) > self.max_bytes:
+            return
+        with self._lock:
+            old = self._items.pop(key, None)
+            if old is not None:
+                self.size -= len(old)
+            self._items[key] = data
+            self.size += len(data)
+            while self.size > self.max_bytes:
+                _, evicted = self._items.popitem(last=False)
+                self.size -= len(evicted)
+
+    def drop_prefix(self, prefix):
+        with self._lock:
+            for key in [k for k in self._items if k.startswith(prefix)]:
+                self.size -= len(self._items.pop(key))
+
+
+_memory = _MemoryLRU(int(os.getenv("ARTIFACT_MEMORY_MB", "64")) << 20)
+_sweep_lock = threading.Lock()
+_last_sweep = 0.0
+
+
+def sweep_expired(root, ttl):
+    """Delete session directories not used for `ttl` seconds (rate limited)."""
+    global _last_sweep
+    now = time.time()
+    with _sweep_lock:
+        if now - _last_sweep < SWEEP_INTERVAL:
+            return 0
+        _last_sweep = now
+    removed = 0
+    try:
+        entries = list(os.scandir(root))
+    except FileNotFoundError:
+        return 0
+    for entry in entries:
+        try:
+            if entry.is_dir() and now - entry.stat().st_mtime > ttl:
+                shutil.rmtree(entry.path, ignore_errors=True)
+                _memory.drop_prefix(entry.path + os.sep)
+                removed += 1
+        except FileNotFoundError:
+            continue  # removed concurrently
+    return removed
+
+
+class ArtifactStore:
+    def __init__(self, root, session_id, ttl=6 * 3600):
+        self.root = root
+        self.dir = os.path.join(root, session_id)
+        os.makedirs(self.dir, exist_ok=True)
+        self.touch()  # before sweeping, so a returning session is not its own victim
+        sweep_expired(root, ttl)
+
+    @classmethod
+    def for_session(cls, session_id):
+        root = os.getenv("ARTIFACT_DIR", os.path.join(tempfile.gettempdir(), "pcb_artifacts"))
+        return cls(root, session_id, ttl=float(os.getenv("ARTIFACT_TTL", "21600")))
+
+    def path(self, ref):
+        return os.path.join(self.dir, ref)
+
+    def __contains__(self, ref):
+        return os.path.exists(self.path(ref))
+
+    def touch(self):
+        """Mark the session as in use (its directory mtime is the last-use time)."""
+        os.utime(self.dir)
+
+    def put(self, data):
+        """Store bytes; returns their reference. Identical bytes are stored once."""
+        data = bytes(data)
+        ref = hashlib.sha256(data).hexdigest()
+        path = self.path(ref)
+        if not os.path.exists(path):
+            tmp = f"{path}.{threading.get_ident()}.tmp"
+            with open(tmp, "wb") as f:
+                f.write(data)
+            os.replace(tmp, path)
+        _memory.put(path, data)
+        return ref
+
+    def get(self, ref):
+        path = self.path(ref)
+        data = _memory.get(path)
+        if data is None:
+            with open(path, "rb") as f:
+                data = f.read()
+            _memory.put(path, data)
+        return data
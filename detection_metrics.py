@@ -0,0 +1,91 @@
+# detection_metrics.py
+# Box matching and AP for evaluate.py, vectorized with NumPy: predictions are
+# matched to labels at IoU 0.50:0.95 and scored the COCO / ultralytics way
+# (101-point AP, precision / recall at the confidence of best mean F1).
+import numpy as np
+
+IOU_THRESHOLDS = np.linspace(0.5, 0.95, 10)
+EPS = 1e-16
+_trapz = getattr(np, "trapezoid", None) or np.trapz
+
+
+# ---------------- MATCHING ----------------
+
+def box_iou(a, b):
+    """Pairwise IoU of (N, 4) and (M, 4) xyxy boxes -> (N, M)."""
+    lt = np.maximum(a[:, None, :2], b[None, :, :2])
+    rb = np.minimum(a[:, None, 2:], b[None, :, 2:])
+    inter = np.clip(rb - lt, 0, None).prod(2)
+    area_a = (a[:, 2:] - a[:, :2]).prod(1)
+    area_b = (b[:, 2:] - b[:, :2]).prod(1)
+    return inter / (area_a[:, None] + area_b[None, :] - inter + EPS)
+
+
+def match_predictions(pred_boxes, pred_cls, gt_boxes, gt_cls):
+    """
+    (n_pred, 10) bool matrix: prediction i is a true positive at threshold j.
+    Greedy by IoU, one prediction per label, class must agree.
+    """
+    tp = np.zeros((len(pred_boxes), len(IOU_THRESHOLDS)), dtype=bool)
+    if len(pred_boxes) == 0 or len(gt_boxes) == 0:
+        return tp
+
+    iou = box_iou(gt_boxes, pred_boxes) * (gt_cls[:, None] == pred_cls[None, :])
+    for j, t in enumerate(IOU_THRESHOLDS):
+        gi, pi = np.nonzero(iou >= t)
+        if len(gi) == 0:
+            continue
+        order = np.argsort(-iou[gi, pi], kind="stable")
+        gi, pi = gi[order], pi[order]
+        keep = np.unique(pi, return_index=True)[1]        # best label per prediction
+        keep = keep[np.argsort(-iou[gi[keep], pi[keep]], kind="stable")]
+        gi, pi = gi[keep], pi[keep]
+        keep = np.unique(gi, return_index=True)[1]        # best prediction per label
+        tp[pi[keep], j] = True
+    return tp
+
+
+# ---------------- METRICS ----------------
+
+def compute_ap(recall, precision):
+    """101-point interpolated AP of one precision / recall curve."""
+    mrec = np.concatenate(([0.0], recall, [1.0]))
+    mpre = np.concatenate(([1.0], precision, [0.0]))
+    mpre = np.flip(np.maximum.accumulate(np.flip(mpre)))
+    x = np.linspace(0, 1, 101)
+    return float(_trapz(np.interp(x, mrec, mpre), x))
+
+
+def ap_per_class(tp, conf, pred_cls, target_cls, n_classes):
+    """
+    Returns ap (n_classes, 10), and precision / recall per class at the
+    confidence that maximizes mean F1 (as ultralytics reports them). Label
+    class ids >= n_classes (labels and checkpoint disagree) get rows too.
+    """
+    if len(target_cls):
+        n_classes = max(n_classes, int(target_cls.max()) + 1)
+    order = np.argsort(-conf, kind="stable")
+    tp, conf, pred_cls = tp[order], conf[order], pred_cls[order]
+    n_gt = np.bincount(target_cls, minlength=n_classes)
+
+    x = np.linspace(0, 1, 1000)
+    ap = np.zeros((n_classes, tp.shape[1]))
+    p_curve = np.zeros((n_classes, len(x)))
+    r_curve = np.zeros((n_classes, len(x)))
+    for c in range(n_classes):
+        m = pred_cls == c
+        if n_gt[c] == 0 or not m.any():
+            continue
+        tpc = tp[m].cumsum(0)
+        fpc = (~tp[m]).cumsum(0)
+        recall = tpc / (n_gt[c] + EPS)
+        precision = tpc / (tpc + fpc)
+        r_curve[c] = np.interp(-x, -conf[m], recall[:, 0], left=0)
+        p_curve[c] = np.interp(-x, -conf[m], precision[:, 0], left=1)
+        for j in range(tp.shape[1]):
+            ap[c, j] = compute_ap(recall[:, j], precision[:, j])
+
+    present = n_gt > 0
+    f1 = 2 * p_curve * r_curve / (p_curve + r_curve + EPS)
+    best = int(f1[present].mean(0).argmax()) if present.any() else 0
+    return ap, p_curve[:, best], r_curve[:, best], n_gt, float(x[best])
@@ -0,0 +1,109 @@
+# embedding_cache.py
+# Fixed-size, memory-mapped store for SAM image embeddings.
+#
+# Layout of a cache directory:
+#   embeddings.bin   float32 (slots, *shape), one embedding per slot
+#   slots.npy        per-slot key, original/input size and last-use tick
+#
+# Keys are a hash of the image bytes and a model fingerprint (checkpoint +
+# model type), so a different checkpoint never reuses another one's
+# embeddings. When every slot is taken the least recently used one is
+# overwritten. A slot's key is cleared before its data is rewritten, so an
+# interrupted write leaves an empty slot rather than a wrong embedding.
+import hashlib
+import os
+
+import numpy as np
+
+SAM_EMBEDDING_SHAPE = (256, 64, 64)  # ViT-B/L/H image encoder output
+SLOT_DTYPE = np.dtype([
+    ("key", "S40"),
+    ("original_size", "<i4", (2,)),
+    ("input_size", "<i4", (2,)),
+    ("last_used", "<i8"),
+])
+
+
+class EmbeddingCache:
+    def __init__(self, cache_dir, fingerprint, capacity_mb=2048, shape=SAM_EMBEDDING_SHAPE):
+        self.fingerprint = fingerprint.encode("utf-8")
+        self.shape = tuple(shape)
+        slot_bytes = int(np.prod(self.shape)) * 4
+        n_slots = max(1, (capacity_mb << 20) // slot_bytes)
+        self.hits = self.misses = 0
+
+        os.makedirs(cache_dir, exist_ok=True)
+        data_path = os.path.join(cache_dir, "embeddings.bin")
+        slots_path = os.path.join(cache_dir, "slots.npy")
+
+        fresh = True
+        if os.path.exists(data_path) and os.path.exists(slots_path):
+            slots = np.load(slots_path, mmap_mode="r+")
+            fresh = (slots.dtype != SLOT_DTYPE or len(slots) != n_slots
+                     or os.path.getsize(data_path) != n_slots * slot_bytes)
+            if fresh:  # capacity or shape changed: start over
+                del slots
+        if fresh:
+            slots = np.lib.format.open_memmap(slots_path, mode="w+", dtype=SLOT_DTYPE, shape=(n_slots,))
+            with open(data_path, "wb") as f:
+                f.truncate(n_slots * slot_bytes)  # sparse until slots are written
+
+        self.slots = slots
+        self.data = np.memmap(data_path, dtype=np.float32, mode="r+", shape=(n_slots, *self.shape))
+        self._index = {bytes(k): i for i, k in enumerate(slots["key"]) if k}
+        self._tick = int(slots["last_used"].max()) if n_slots else 0
+
+    def __len__(self):
+        return len(self._index)
+
+    def key(self, image_bytes):
+        return hashlib.sha1(self.fingerprint + b"\0" + bytes(image_bytes)).hexdigest().encode("ascii")
+
+    def _touch(self, slot):
+        self._tick += 1
+        self.slots["last_used"][slot] = self._tick
+
+    def get(self, key):
+        """(embedding view into the map, original_size, input_size), or None."""
+        slot = self._index.get(key)
+        if slot is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._touch(slot)
+        meta = self.slots[slot]
+        return (self.data[slot],
+                tuple(int(v) for v in meta["original_size"]),
+                tuple(int(v) for v in meta["input_size"]))
+
+    def put(self, key, embedding, original_size, input_size):
+        if key in self._index:
+            return
+        empty = np.flatnonzero(self.slots["key"] == b"")
+        slot = int(empty[0]) if len(empty) else int(self.slots["last_used"].argmin())
+        old = bytes(self.slots["key"][slot])
+        if old:
+            del self._index[old]
+            self.slots["key"][slot] = b""
+
+        self.data[slot] = embedding
+        self.slots["original_size"][slot] = original_size
+        self.slots["input_size"][slot] = input_size
+        self.slots["key"][slot] = key
+        self._touch(slot)
+        self._index[key] = slot
+
+    def flush(self):
+        self.data.flush()
+        self.slots.flush()
+
+    def close(self):
+        self.flush()
+        self._index.clear()
+        del self.data, self.slots
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,29 @@
+# engine/__init__.py
+# Shared PCB defect inference engine.
+#
+# main.py, inference.py and the Backend APIs are thin adapters over this
+# package, so model loading, decoding, batching, post-processing, encoding,
+# caching and stats behave the same everywhere.
+#
+# Names are imported on first use, so `engine.dedup` or `engine.codec` work
+# without ultralytics installed.
+import importlib
+
+_EXPORTS = {
+    "decode_image": "codec", "encode_jpeg": "codec", "encode_png": "codec",
+    "read_image": "codec", "to_base64": "codec",
+    "InferenceEngine": "core", "Prediction": "core", "get_engine": "core",
+    "NearDuplicateIndex": "dedup", "dhash": "dedup",
+    "load_model": "model",
+    "count_defects": "postprocess", "detections_from_result": "postprocess",
+    "render": "postprocess", "to_boxes": "postprocess",
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name):
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    return getattr(importlib.import_module(f".{module}", __name__), name)
@@ -0,0 +1,50 @@
+# engine/bench.py
+# Throughput / latency benchmark for the shared engine.
+#
+#   python -m engine.bench --model best.pt --source dataset/images/val
+import argparse
+import glob
+import os
+import time
+
+from .codec import read_image
+from .core import InferenceEngine
+
+IMAGE_EXTS = (".jpg", ".jpeg", ".png", ".bmp", ".tif", ".tiff")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the PCB inference engine")
+    parser.add_argument("--model", default="best.pt")
+    parser.add_argument("--source", required=True, help="image directory")
+    parser.add_argument("--batch-size", type=int, default=8)
+    parser.add_argument("--imgsz", type=int, default=640)
+    parser.add_argument("--limit", type=int, default=200)
+    parser.add_argument("--warmup", type=int, default=2)
+    args = parser.parse_args()
+
+    paths = sorted(
+        p for p in glob.glob(os.path.join(args.source, "*"))
+        if p.lower().endswith(IMAGE_EXTS)
+    )[:args.limit]
+    if not paths:
+        raise SystemExit(f"No images found in {args.source}")
+
+    images = [read_image(p) for p in paths]
+    engine = InferenceEngine(args.model, imgsz=args.imgsz, batch_size=args.batch_size)
+
+    for _ in range(args.warmup):
+        engine.predict(images[:args.batch_size])
+
+    t0 = time.perf_counter()
+    engine.predict(images)
+    elapsed = time.perf_counter() - t0
+
+    print(f"images:      {len(images)}")
+    print(f"batch size:  {args.batch_size}")
+    print(f"throughput:  {len(images) / elapsed:.2f} img/s")
+    print(f"latency:     {1000 * elapsed / len(images):.1f} ms/img")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,38 @@
+# engine/codec.py
+# Image decode / encode helpers. Everything inside the engine is OpenCV BGR.
+import base64
+
+import cv2
+import numpy as np
+
+
+def decode_image(data):
+    """Decode encoded image bytes (bytes, bytearray or memoryview) to a BGR array."""
+    img = cv2.imdecode(np.frombuffer(data, np.uint8), cv2.IMREAD_COLOR)
+    if img is None:
+        raise ValueError("could not decode image data")
+    return img
+
+
+def read_image(path):
+    """Read an image file from disk as BGR."""
+    with open(path, "rb") as f:
+        return decode_image(f.read())
+
+
+def encode_png(img_bgr):
+    ok, buf = cv2.imencode(".png", img_bgr)
+    if not ok:
+        raise ValueError("PNG encoding failed")
+    return buf.tobytes()
+
+
+def encode_jpeg(img_bgr, quality=90):
+    ok, buf = cv2.imencode(".jpg", img_bgr, [cv2.IMWRITE_JPEG_QUALITY, quality])
+    if not ok:
+        raise ValueError("JPEG encoding failed")
+    return buf.tobytes()
+
+
+def to_base64(data):
+    return base64.b64encode(data).decode("utf-8")
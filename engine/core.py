@@ -0,0 +1,158 @@
+# engine/core.py
+# The shared inference engine: every endpoint and CLI goes through here.
+import threading
+import time
+
+from .codec import decode_image, encode_png
+from .dedup import dhash
+from .model import load_model
+from .postprocess import count_defects, detections_from_result, render, to_boxes
+
+# ultralytics defaults, which all the endpoints used before sharing the engine
+CONFIDENCE = 0.25
+IOU = 0.7
+IMGSZ = 640
+BATCH_SIZE = 8
+
+
+class EngineStats:
+    """Running counters, readable by endpoints and benchmarks."""
+
+    def __init__(self):
+        self.images = 0
+        self.batches = 0
+        self.reused = 0
+        self.inference_seconds = 0.0
+        self._lock = threading.Lock()
+
+    def record_batch(self, n_images, seconds):
+        with self._lock:
+            self.images += n_images
+            self.batches += 1
+            self.inference_seconds += seconds
+
+    def record_reuse(self):
+        with self._lock:
+            self.reused += 1
+
+    def snapshot(self):
+        with self._lock:
+            ms = 1000 * self.inference_seconds / self.images if self.images else 0.0
+            return {
+                "images": self.images,
+                "batches": self.batches,
+                "reused": self.reused,
+                "inference_seconds": round(self.inference_seconds, 3),
+                "ms_per_image": round(ms, 2),
+            }
+
+
+class Prediction:
+    """Detections for one image plus lazily rendered/encoded outputs."""
+
+    def __init__(self, image, detections, names, provenance):
+        self.image = image  # BGR
+        self.detections = detections
+        self.names = names
+        self.provenance = provenance
+        self._annotated = None
+
+    def counts(self):
+        return count_defects(self.detections)
+
+    def boxes(self):
+        return to_boxes(self.detections)
+
+    def annotated(self):
+        if self._annotated is None:
+            self._annotated = render(self.image, self.detections, self.names)
+        return self._annotated
+
+    def annotated_png(self):
+        return encode_png(self.annotated())
+
+
+class InferenceEngine:
+    """
+    Owns the model and the decode -> batch -> post-process path.
+
+    `dedup` is an optional engine.dedup.NearDuplicateIndex; when set,
+    predict_bytes() reuses detections of recently seen near-duplicates.
+    """
+
+    def __init__(self, model_path, conf=CONFIDENCE, iou=IOU, imgsz=IMGSZ,
+                 batch_size=BATCH_SIZE, dedup=None):
+        self.model = load_model(model_path)
+        self.names = self.model.names
+        self.conf = conf
+        self.iou = iou
+        self.imgsz = imgsz
+        self.batch_size = batch_size
+        self.dedup = dedup
+        self.stats = EngineStats()
+        # the ultralytics predictor keeps per-call state and is not thread-safe
+        self._lock = threading.Lock()
+
+    def predict(self, images, conf=None, iou=None):
+        """Run batched inference on BGR arrays; returns one detection list per image."""
+        conf = self.conf if conf is None else conf
+        iou = self.iou if iou is None else iou
+
+        out = []
+        for start in range(0, len(images), self.batch_size):
+            batch = images[start:start + self.batch_size]
+            with self._lock:
+                t0 = time.perf_counter()
+                results = self.model.predict(
+                    batch, conf=conf, iou=iou, imgsz=self.imgsz, verbose=False
+                )
+                self.stats.record_batch(len(batch), time.perf_counter() - t0)
+            out.extend(detections_from_result(r, self.names) for r in results)
+        return out
+
+    def predict_image(self, image, conf=None, iou=None):
+        """Single BGR image -> Prediction (no near-duplicate reuse)."""
+        detections = self.predict([image], conf=conf, iou=iou)[0]
+        return Prediction(image, detections, self.names, {"source": "inference"})
+
+    def predict_bytes(self, data, source=None, conf=None, iou=None):
+        """Encoded image bytes -> Prediction, reusing near-duplicate results if enabled."""
+        image = decode_image(data)
+        if self.dedup is None:
+            return self.predict_image(image, conf=conf, iou=iou)
+
+        # reuse is only valid for results produced with the same thresholds
+        params = (self.conf if conf is None else conf, self.iou if iou is None else iou)
+        image_hash = dhash(image)
+        hit = self.dedup.lookup(image_hash)
+        if hit is not None and hit[0]["params"] == params:
+            cached, distance = hit
+            self.stats.record_reuse()
+            provenance = {
+                "source": "reused",
+                "reused_from": cached["source"],
+                "hamming_distance": distance,
+            }
+            return Prediction(image, cached["detections"], self.names, provenance)
+
+        prediction = self.predict_image(image, conf=conf, iou=iou)
+        self.dedup.add(image_hash, {
+            "source": source,
+            "params": params,
+            "detections": prediction.detections,
+        })
+        return prediction
+
+
+_engines = {}
+_engines_lock = threading.Lock()
+
+
+def get_engine(model_path, **kwargs):
+    """Process-wide engine per weights file; kwargs only apply on first call."""
+    with _engines_lock:
+        engine = _engines.get(model_path)
+        if engine is None:
+            engine = InferenceEngine(model_path, **kwargs)
+            _engines[model_path] = engine
+        return engine
@@ -0,0 +1,142 @@
+# engine/dedup.py
+# Near-duplicate lookup for uploaded PCB images.
+#
+# Stations often re-photograph the same board with slightly different lighting
+# or JPEG settings, so byte hashes never match. A 64-bit difference hash (dHash)
+# survives those changes, and a multi-index hamming table finds every stored
+# hash within `max_distance` bits without scanning the whole cache.
+import os
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+from PIL import Image
+
+HASH_SIZE = 8
+HASH_BITS = HASH_SIZE * HASH_SIZE
+DEFAULT_CAPACITY = 512  # recent boards the backends keep for reuse
+
+
+def dhash(image, hash_size=HASH_SIZE):
+    """Return the difference hash of a PIL image or BGR array as an int."""
+    if isinstance(image, np.ndarray):
+        import cv2  # only needed for arrays; the index itself is plain Python
+
+        gray = image if image.ndim == 2 else cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+        px = cv2.resize(gray, (hash_size + 1, hash_size), interpolation=cv2.INTER_AREA).tobytes()
+    else:
+        # draft() lets the JPEG decoder downscale while decoding (no-op for PNG)
+        image.draft("L", (hash_size * 8, hash_size * 8))
+        px = image.convert("L").resize((hash_size + 1, hash_size), Image.LANCZOS).tobytes()
+
+    bits = 0
+    width = hash_size + 1
+    for row in range(hash_size):
+        offset = row * width
+        for col in range(hash_size):
+            bits = (bits << 1) | (px[offset + col] > px[offset + col + 1])
+    return bits
+
+
+def hamming(a, b):
+    """Number of differing bits between two hashes."""
+    return (a ^ b).bit_count()
+
+
+class NearDuplicateIndex:
+    """
+    Bounded LRU of {hash: result} with hamming-distance lookup.
+
+    The 64-bit hash is split into `max_distance + 1` bands. Two hashes within
+    `max_distance` bits must agree exactly on at least one band (pigeonhole),
+    so each band is an exact-match dict and only those candidates are checked.
+    Entries older than `ttl` seconds are ignored and dropped on access.
+    """
+
+    def __init__(self, max_distance=4, capacity=2048, ttl=900.0):
+        if not 0 <= max_distance < HASH_BITS:
+            raise ValueError(f"max_distance must be in [0, {HASH_BITS})")
+        self.max_distance = max_distance
+        self.capacity = capacity
+        self.ttl = ttl
+
+        n_bands = max_distance + 1
+        base, extra = divmod(HASH_BITS, n_bands)
+        self._bands = []  # (shift, mask) per band
+        shift = 0
+        for i in range(n_bands):
+            width = base + (1 if i < extra else 0)
+            self._bands.append((shift, (1 << width) - 1))
+            shift += width
+
+        self._entries = OrderedDict()  # hash -> (timestamp, result)
+        self._tables = [dict() for _ in self._bands]  # band value -> set(hash)
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls):
+        """
+        Build an index from DEDUP_MAX_DISTANCE / DEDUP_CAPACITY / DEDUP_TTL
+        (capacity DEFAULT_CAPACITY unless set); DEDUP_CAPACITY=0 returns None,
+        which turns reuse off.
+        """
+        capacity = int(os.getenv("DEDUP_CAPACITY", str(DEFAULT_CAPACITY)))
+        if capacity <= 0:
+            return None
+        return cls(
+            max_distance=int(os.getenv("DEDUP_MAX_DISTANCE", "4")),
+            capacity=capacity,
+            ttl=float(os.getenv("DEDUP_TTL", "900")),
+        )
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _band_keys(self, h):
+        return [(h >> shift) & mask for shift, mask in self._bands]
+
+    def _remove(self, h):
+        del self._entries[h]
+        for table, key in zip(self._tables, self._band_keys(h)):
+            bucket = table.get(key)
+            if bucket is not None:
+                bucket.discard(h)
+                if not bucket:
+                    del table[key]
+
+    def lookup(self, h):
+        """Return (result, distance) for the closest fresh entry, or None."""
+        now = time.monotonic()
+        with self._lock:
+            candidates = set()
+            for table, key in zip(self._tables, self._band_keys(h)):
+                candidates.update(table.get(key, ()))
+
+            best = None
+            for cand in candidates:
+                stamp, result = self._entries[cand]
+                if now - stamp > self.ttl:
+                    self._remove(cand)
+                    continue
+                dist = hamming(h, cand)
+                if dist <= self.max_distance and (best is None or dist < best[1]):
+                    best = (cand, dist, result)
+
+            if best is None:
+                return None
+            self._entries.move_to_end(best[0])
+            return best[2], best[1]
+
+    def add(self, h, result):
+        """Store a result for hash `h`, evicting the least recently used entries."""
+        if self.capacity <= 0:
+            return
+        with self._lock:
+            if h in self._entries:
+                self._remove(h)
+            self._entries[h] = (time.monotonic(), result)
+            for table, key in zip(self._tables, self._band_keys(h)):
+                table.setdefault(key, set()).add(h)
+            while len(self._entries) > self.capacity:
+                self._remove(next(iter(self._entries)))
@@ -0,0 +1,20 @@
+# engine/model.py
+# One YOLO instance per weights file, shared by every caller in the process.
+import os
+import threading
+
+from ultralytics import YOLO
+
+_models = {}
+_lock = threading.Lock()
+
+
+def load_model(path):
+    """Load YOLO weights once and return the cached instance afterwards."""
+    key = os.path.abspath(path)
+    with _lock:
+        model = _models.get(key)
+        if model is None:
+            model = YOLO(path)
+            _models[key] = model
+        return model
@@ -0,0 +1,57 @@
+# engine/postprocess.py
+# Turn YOLO results into plain detections and the response shapes the
+# endpoints expect.
+#
+# A detection is:
+#   {"class_id": int, "type": str, "confidence": float, "bbox": [x1, y1, x2, y2]}
+# with the bbox in original pixel coordinates.
+from collections import Counter
+
+from ultralytics.utils.plotting import Annotator, colors
+
+
+def detections_from_result(result, names):
+    """Extract detections from one ultralytics Results object."""
+    boxes = result.boxes
+    if boxes is None or len(boxes) == 0:
+        return []
+
+    # one device->host copy per tensor instead of one per box
+    xyxy = boxes.xyxy.cpu().numpy().tolist()
+    confs = boxes.conf.cpu().numpy().tolist()
+    cls_ids = boxes.cls.cpu().numpy().astype(int).tolist()
+
+    return [
+        {"class_id": c, "type": names[c], "confidence": cf, "bbox": bb}
+        for bb, cf, c in zip(xyxy, confs, cls_ids)
+    ]
+
+
+def count_defects(detections):
+    """{defect type: count}"""
+    return dict(Counter(d["type"] for d in detections))
+
+
+def to_boxes(detections):
+    """Integer-corner boxes used by the Backend API and Frontend renderer."""
+    boxes = []
+    for d in detections:
+        x1, y1, x2, y2 = map(int, d["bbox"])
+        boxes.append({
+            "x1": x1,
+            "y1": y1,
+            "x2": x2,
+            "y2": y2,
+            "confidence": d["confidence"],
+            "type": d["type"],
+        })
+    return boxes
+
+
+def render(img_bgr, detections, names):
+    """Draw detections the same way ultralytics' Results.plot() does."""
+    annotator = Annotator(img_bgr.copy(), example=names)
+    for d in detections:
+        label = f"{d['type']} {d['confidence']:.2f}"
+        annotator.box_label(d["bbox"], label, color=colors(d["class_id"], True))
+    return annotator.result()
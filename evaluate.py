@@ -0,0 +1,163 @@
+# evaluate.py
+# Repeatable, fast evaluation of a model candidate on the val split.
+#
+#   python evaluate.py --model best.pt --images dataset/images/val --json metrics.json
+#   python evaluate.py --model best_int8.onnx --images dataset/packed/val
+#
+# Inference is batched through the shared engine with decoding prefetched on
+# a thread pool; predictions are matched to labels with vectorized IoU at
+# IoU 0.50:0.95 and scored the COCO / ultralytics way (101-point AP, see
+# detection_metrics.py). One JSON holds mAP@50, mAP@50-95, per-class
+# precision / recall / AP and latency.
+import argparse
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import ExitStack
+
+import numpy as np
+
+from annotations import default_labels_dir, parse_yolo_boxes
+from detection_metrics import ap_per_class, match_predictions
+from engine import InferenceEngine, decode_image, read_image
+from predict import collect_sources, iter_batches, iter_decoded
+from shards import ShardReader, is_pack
+
+
+# ---------------- MAIN ----------------
+
+def collect_stats(engine, idents, load, label_text, args):
+    """Predict every image and match it to its labels; returns per-image stats and timings."""
+    stats = {"tp": [], "conf": [], "cls": [], "target": []}
+    batch_ms = []
+    t0 = time.perf_counter()
+    with ThreadPoolExecutor(args.workers) as pool:
+        decoded = iter_decoded(idents, pool, prefetch=2 * args.batch_size, load=load)
+        for batch in iter_batches(decoded, args.batch_size):
+            images = [img for _, img in batch]
+            tb = time.perf_counter()
+            predictions = engine.predict(images)
+            batch_ms.append(1000 * (time.perf_counter() - tb) / len(images))
+
+            for (ident, image), dets in zip(batch, predictions):
+                h, w = image.shape[:2]
+                gt_cls, gt_boxes = parse_yolo_boxes(label_text(ident) or "", w, h)
+                pred_boxes = np.array([d["bbox"] for d in dets], dtype=np.float64).reshape(-1, 4)
+                pred_cls = np.array([d["class_id"] for d in dets], dtype=np.int64)
+                stats["tp"].append(match_predictions(pred_boxes, pred_cls, gt_boxes, gt_cls))
+                stats["conf"].append(np.array([d["confidence"] for d in dets], dtype=np.float64))
+                stats["cls"].append(pred_cls)
+                stats["target"].append(gt_cls)
+    return stats, batch_ms, time.perf_counter() - t0
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Evaluate a PCB defect model on the val split")
+    parser.add_argument("--model", default="best.pt")
+    parser.add_argument("--images", default="dataset/images/val",
+                        help="image directory or pack directory (shards.py)")
+    parser.add_argument("--labels", default=None,
+                        help="YOLO label directory (default: images path with images -> labels)")
+    parser.add_argument("--batch-size", type=int, default=16)
+    parser.add_argument("--imgsz", type=int, default=640)
+    parser.add_argument("--conf", type=float, default=0.001, help="low, so the PR curve is complete")
+    parser.add_argument("--iou", type=float, default=0.7, help="NMS IoU")
+    parser.add_argument("--workers", type=int, default=min(8, os.cpu_count() or 1))
+    parser.add_argument("--json", default=None, help="write metrics here (e.g. metrics.json)")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+
+    with ExitStack() as stack:
+        if is_pack(args.images):
+            reader = stack.enter_context(ShardReader(args.images))
+            idents = reader.names()
+            load = lambda name: decode_image(reader.image_bytes(name))  # noqa: E731
+            label_text = reader.label_text
+        else:
+            labels_dir = args.labels or default_labels_dir(args.images)
+            idents = collect_sources(args.images)
+            load = read_image
+
+            def label_text(path):
+                label_path = os.path.join(labels_dir, os.path.splitext(os.path.basename(path))[0] + ".txt")
+                if not os.path.exists(label_path):
+                    return None
+                with open(label_path) as f:
+                    return f.read()
+
+        if not idents:
+            raise SystemExit(f"No images found in {args.images}")
+
+        engine = InferenceEngine(args.model, conf=args.conf, iou=args.iou,
+                                 imgsz=args.imgsz, batch_size=args.batch_size)
+        stats, batch_ms, elapsed = collect_stats(engine, idents, load, label_text, args)
+    names = engine.names
+    n_classes = len(names)
+    n_images = len(stats["target"])  # images that failed to decode were skipped
+    if n_images == 0:
+        raise SystemExit(f"None of the {len(idents)} images in {args.images} could be decoded")
+
+    tp = np.concatenate(stats["tp"])
+    target_cls = np.concatenate(stats["target"])
+    ap, p, r, n_gt, best_conf = ap_per_class(
+        tp, np.concatenate(stats["conf"]), np.concatenate(stats["cls"]), target_cls, n_classes)
+    present = n_gt > 0
+    unknown = [c for c in range(n_classes, len(n_gt)) if n_gt[c] > 0]
+    if unknown:
+        print(f"[WARN] Labels use class ids {unknown} that {args.model} does not have "
+              f"({n_classes} classes); they count as missed")
+
+    def mean(values):
+        return round(float(values[present].mean()), 4) if present.any() else 0.0
+
+    metrics = {
+        "model": args.model,
+        "images": n_images,
+        "instances": int(len(target_cls)),
+        "mAP50": mean(ap[:, 0]),
+        "mAP50-95": mean(ap.mean(1)),
+        "precision": mean(p),
+        "recall": mean(r),
+        "best_f1_conf": round(best_conf, 3),
+        "per_class": {
+            names.get(c, f"class_{c}"): {
+                "instances": int(n_gt[c]),
+                "precision": round(float(p[c]), 4),
+                "recall": round(float(r[c]), 4),
+                "ap50": round(float(ap[c, 0]), 4),
+                "ap50-95": round(float(ap[c].mean()), 4),
+            }
+            for c in range(len(n_gt)) if n_gt[c] > 0
+        },
+        "latency": {
+            "inference_ms_per_image_p50": round(float(np.percentile(batch_ms, 50)), 2),
+            "inference_ms_per_image_p95": round(float(np.percentile(batch_ms, 95)), 2),
+            "end_to_end_images_per_s": round(n_images / elapsed, 2),
+            "batch_size": args.batch_size,
+            "imgsz": args.imgsz,
+        },
+    }
+
+    print(f"{metrics['images']} images, {metrics['instances']} instances")
+    print(f"mAP@50 {metrics['mAP50']:.4f}  mAP@50-95 {metrics['mAP50-95']:.4f}  "
+          f"P {metrics['precision']:.4f}  R {metrics['recall']:.4f}")
+    print(f"{'class':<18}{'inst':>6}{'P':>8}{'R':>8}{'AP50':>8}{'AP50-95':>9}")
+    for name, c in metrics["per_class"].items():
+        print(f"{name:<18}{c['instances']:>6}{c['precision']:>8.3f}{c['recall']:>8.3f}"
+              f"{c['ap50']:>8.3f}{c['ap50-95']:>9.3f}")
+    lat = metrics["latency"]
+    print(f"inference {lat['inference_ms_per_image_p50']} ms/img (p50), "
+          f"end to end {lat['end_to_end_images_per_s']} images/s")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(metrics, f, indent=2)
+        print(f"Metrics saved in '{args.json}'")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,199 @@
+# export_to_yolo.py
+# Convert a single-file annotation export (CVAT for images XML or COCO JSON)
+# to YOLO label files, streaming, so a multi-hundred-MB export never has to
+# fit in memory.
+#
+#   python export_to_yolo.py annotations.xml --labels labels
+#   python export_to_yolo.py instances.json --labels labels   # needs `pip install ijson`
+#
+# Per-file Pascal-VOC annotations are still handled by xmltotext.py; both
+# share the box math and class map from annotations.py.
+import argparse
+import os
+import time
+import xml.etree.ElementTree as ET
+from collections import OrderedDict
+
+from annotations import build_class_map, load_class_map, save_class_map, yolo_lines
+
+LABELS_DIR = "labels"
+CLASSES_FILE = "classes.txt"
+
+
+# ---------------- CVAT XML ----------------
+
+def iter_cvat(path):
+    """
+    Yield (image name, width, height, [(class, xmin, ymin, xmax, ymax), ...])
+    for each <image> of a CVAT-for-images export, clearing parsed elements as
+    it goes so memory stays flat.
+    """
+    context = ET.iterparse(path, events=("start", "end"))
+    _, root = next(context)
+    for event, elem in context:
+        if event != "end" or elem.tag != "image":
+            continue
+        objects = [
+            (box.get("label"),
+             float(box.get("xtl")), float(box.get("ytl")),
+             float(box.get("xbr")), float(box.get("ybr")))
+            for box in elem.iterfind("box")
+        ]
+        yield (os.path.basename(elem.get("name")),
+               int(elem.get("width")), int(elem.get("height")), objects)
+        root.clear()  # drop this <image> (and anything before it)
+
+
+def scan_cvat_labels(path):
+    """Class names used by box elements (streaming pre-pass)."""
+    names = set()
+    context = ET.iterparse(path, events=("start", "end"))
+    _, root = next(context)
+    for event, elem in context:
+        if event != "end":
+            continue
+        if elem.tag == "box":
+            names.add(elem.get("label"))
+        elif elem.tag == "image":
+            root.clear()  # as in iter_cvat: cleared <image> elements would pile up in root
+    return names
+
+
+# ---------------- COCO JSON ----------------
+
+def _ijson():
+    try:
+        import ijson
+    except ImportError:
+        raise SystemExit("Streaming COCO JSON needs the ijson package: pip install ijson") from None
+    return ijson
+
+
+def coco_categories(path):
+    ijson = _ijson()
+    with open(path, "rb") as f:
+        return {c["id"]: c["name"] for c in ijson.items(f, "categories.item")}
+
+
+def coco_images(path):
+    """{image id: (file name, width, height)} - a few small values per image."""
+    ijson = _ijson()
+    with open(path, "rb") as f:
+        return {
+            im["id"]: (os.path.basename(im["file_name"]), int(im["width"]), int(im["height"]))
+            for im in ijson.items(f, "images.item")
+        }
+
+
+def iter_coco_annotations(path):
+    """Yield (image id, category id, [x, y, w, h]) one annotation at a time."""
+    ijson = _ijson()
+    with open(path, "rb") as f:
+        for ann in ijson.items(f, "annotations.item", use_float=True):
+            yield ann["image_id"], ann["category_id"], ann["bbox"]
+
+
+class LabelWriter:
+    """
+    Append label lines to many files with a bounded number of open handles.
+    The first write to a file in this run truncates it.
+    """
+
+    def __init__(self, labels_dir, max_open=64):
+        self.labels_dir = labels_dir
+        self.max_open = max_open
+        self.started = set()
+        self._nonempty = set()
+        self._handles = OrderedDict()
+
+    def write(self, image_name, lines):
+        handle = self._handles.pop(image_name, None)
+        if handle is None:
+            if len(self._handles) >= self.max_open:
+                self._handles.popitem(last=False)[1].close()
+            path = os.path.join(self.labels_dir, os.path.splitext(image_name)[0] + ".txt")
+            handle = open(path, "a" if image_name in self.started else "w")
+            self.started.add(image_name)
+        if lines:
+            if image_name in self._nonempty:
+                handle.write("\n")
+            handle.write("\n".join(lines))
+            self._nonempty.add(image_name)
+        self._handles[image_name] = handle
+
+    def close(self):
+        for handle in self._handles.values():
+            handle.close()
+        self._handles.clear()
+
+
+# ---------------- MAIN ----------------
+
+def main():
+    parser = argparse.ArgumentParser(description="Stream a CVAT XML / COCO JSON export to YOLO labels")
+    parser.add_argument("export", help="CVAT-for-images .xml or COCO .json file")
+    parser.add_argument("--format", choices=["cvat", "coco"], default=None,
+                        help="defaults to the file extension")
+    parser.add_argument("--labels", default=LABELS_DIR)
+    parser.add_argument("--classes", default=CLASSES_FILE,
+                        help="class map; built from the export (sorted) if the file is missing")
+    args = parser.parse_args()
+    fmt = args.format or ("coco" if args.export.lower().endswith(".json") else "cvat")
+
+    os.makedirs(args.labels, exist_ok=True)
+    t0 = time.perf_counter()
+    n_images = n_boxes = 0
+    unknown = set()
+
+    if fmt == "cvat":
+        if os.path.exists(args.classes):
+            class_map = load_class_map(args.classes)
+        else:
+            class_map = build_class_map(scan_cvat_labels(args.export))
+            save_class_map(class_map, args.classes)
+
+        for name, width, height, objects in iter_cvat(args.export):
+            lines, missing = yolo_lines(objects, width, height, class_map)
+            unknown |= missing
+            txt_path = os.path.join(args.labels, os.path.splitext(name)[0] + ".txt")
+            with open(txt_path, "w") as f:
+                f.write("\n".join(lines))
+            n_images += 1
+            n_boxes += len(lines)
+    else:
+        categories = coco_categories(args.export)
+        if os.path.exists(args.classes):
+            class_map = load_class_map(args.classes)
+        else:
+            class_map = build_class_map(categories.values())
+            save_class_map(class_map, args.classes)
+        images = coco_images(args.export)
+
+        writer = LabelWriter(args.labels)
+        try:
+            for image_id, cat_id, (x, y, w, h) in iter_coco_annotations(args.export):
+                name, width, height = images[image_id]
+                obj = (categories[cat_id], x, y, x + w, y + h)
+                lines, missing = yolo_lines([obj], width, height, class_map)
+                unknown |= missing
+                writer.write(name, lines)
+                n_boxes += len(lines)
+            # images without annotations still get an (empty) label file
+            for name, _, _ in images.values():
+                if name not in writer.started:
+                    writer.write(name, [])
+        finally:
+            writer.close()
+        n_images = len(images)
+
+    elapsed = time.perf_counter() - t0
+    if unknown:
+        print(f"[WARN] Skipped boxes with classes not in '{args.classes}': {sorted(unknown)}")
+    print("Conversion completed!")
+    print(f"{n_images} images, {n_boxes} boxes in {elapsed:.1f}s "
+          f"({n_images / max(elapsed, 1e-9):.1f} images/s)")
+    print(f"YOLO labels saved in '{args.labels}'")
+
+
+if __name__ == "__main__":
+    main()
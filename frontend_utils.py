@@ -0,0 +1,47 @@
+# frontend_utils.py
+# Helpers shared by the Streamlit frontends (app.py and Frontend/app.py).
+import io
+import math
+import uuid
+
+import streamlit as st
+from PIL import Image
+
+from artifact_store import ArtifactStore
+from search_index import SearchIndex  # noqa: F401  (re-exported for the frontends)
+
+THUMB_MAX_SIDE = 360   # px, longer side of grid previews
+THUMB_QUALITY = 80
+PAGE_SIZE = 12         # results per page in overview grids / summary tables
+
+
+def thumbnail_jpeg(image, max_side=THUMB_MAX_SIDE, quality=THUMB_QUALITY):
+    """Small JPEG preview (bytes) of a PIL image or of encoded image bytes."""
+    if isinstance(image, (bytes, bytearray, memoryview)):
+        image = Image.open(io.BytesIO(image))
+        image.draft("RGB", (max_side, max_side))  # JPEG: decode at reduced size
+    thumb = image.convert("RGB")  # always a copy, safe to shrink in place
+    thumb.thumbnail((max_side, max_side), Image.LANCZOS)
+    buffer = io.BytesIO()
+    thumb.save(buffer, format="JPEG", quality=quality, optimize=True)
+    return buffer.getvalue()
+
+
+def paginate(n_items, key, page_size=PAGE_SIZE):
+    """Page picker (only shown when needed); returns (start, stop) of the current page."""
+    n_pages = max(1, math.ceil(n_items / page_size))
+    if n_pages == 1:
+        return 0, n_items
+    if st.session_state.get(key, 1) > n_pages:  # fewer results than last run
+        st.session_state[key] = n_pages
+    page = st.number_input(f"Page (1–{n_pages})", min_value=1, max_value=n_pages, step=1, key=key)
+    start = (page - 1) * page_size
+    return start, min(start + page_size, n_items)
+
+
+def session_store():
+    """This browser session's ArtifactStore; session state keeps only its id."""
+    if "artifact_session" not in st.session_state:
+        st.session_state["artifact_session"] = uuid.uuid4().hex
+    return ArtifactStore.for_session(st.session_state["artifact_session"])
+
@@ -1,22 +1,16 @@
-from ultralytics import YOLO
-from PIL import Image
-import io
+from engine import get_engine
 
-# Load model ONCE
-model = YOLO("models/yolov8m.pt")
+# Load model ONCE (shared with every other adapter in the process)
+engine = get_engine("models/yolov8m.pt")
 
 def run_inference(image_bytes):
-    image = Image.open(io.BytesIO(image_bytes)).convert("RGB")
-    results = model(image)
+    pred = engine.predict_bytes(image_bytes)
 
-    detections = []
-
-    for r in results:
-        for box in r.boxes:
-            detections.append({
-                "class_id": int(box.cls[0]),
-                "confidence": float(box.conf[0]),
-                "bbox": box.xyxy[0].tolist()
-            })
-
-    return detections
+    return [
+        {
+            "class_id": d["class_id"],
+            "confidence": d["confidence"],
+            "bbox": d["bbox"]
+        }
+        for d in pred.detections
+    ]
@@ -0,0 +1,174 @@
+# label_stats.py
+# Box-size / aspect-ratio / density statistics over all YOLO labels, to help
+# pick imgsz, tile size and anchors.
+#
+#   python label_stats.py dataset/labels --imgsz 640 --json label_stats.json
+#
+# All label files are loaded once into a columnar NumPy table
+# (image, class, x, y, w, h) and cached next to them in .label_index.npz.
+# The cache is rebuilt when any label file is added, removed or modified.
+import argparse
+import json
+import os
+import time
+
+import numpy as np
+
+from annotations import load_class_map
+
+CACHE_NAME = ".label_index.npz"
+CACHE_VERSION = 1
+SCALE_BINS = [0, 8, 16, 32, 64, 96, 128, 256, 512, 1e9]   # px at imgsz
+ASPECT_BINS = [0, 0.25, 0.5, 0.8, 1.25, 2, 4, 1e9]        # w / h
+PERCENTILES = [5, 25, 50, 75, 95]
+
+
+def scan_label_files(labels_dir):
+    """Sorted [(relative path, size, mtime_ns)] of every .txt under labels_dir."""
+    found = []
+    stack = [labels_dir]
+    while stack:
+        with os.scandir(stack.pop()) as it:
+            for entry in it:
+                if entry.is_dir():
+                    stack.append(entry.path)
+                elif entry.name.endswith(".txt") and entry.name != "classes.txt":
+                    st = entry.stat()
+                    found.append((os.path.relpath(entry.path, labels_dir), st.st_size, st.st_mtime_ns))
+    return sorted(found)
+
+
+def parse_labels(labels_dir, files):
+    """Read label files into columns; one split() + reshape for all boxes."""
+    tokens, counts = [], np.zeros(len(files), dtype=np.int64)
+    for i, (rel, _, _) in enumerate(files):
+        with open(os.path.join(labels_dir, rel)) as f:
+            values = f.read().split()
+        if len(values) % 5:
+            raise ValueError(f"{rel}: expected 5 values per line")
+        counts[i] = len(values) // 5
+        tokens.append(" ".join(values))
+
+    table = np.array(" ".join(tokens).split(), dtype=np.float32).reshape(-1, 5)
+    return {
+        "image": np.repeat(np.arange(len(files), dtype=np.int32), counts),
+        "cls": table[:, 0].astype(np.int16),
+        "x": table[:, 1], "y": table[:, 2], "w": table[:, 3], "h": table[:, 4],
+    }
+
+
+def load_index(labels_dir, use_cache=True):
+    """Return (files, columns), from the on-disk cache when it is still current."""
+    files = scan_label_files(labels_dir)
+    cache_path = os.path.join(labels_dir, CACHE_NAME)
+    signature = json.dumps([CACHE_VERSION, files])
+
+    if use_cache and os.path.exists(cache_path):
+        with np.load(cache_path) as cached:
+            if str(cached["signature"]) == signature:
+                return files, {k: cached[k] for k in ("image", "cls", "x", "y", "w", "h")}
+
+    columns = parse_labels(labels_dir, files)
+    tmp = cache_path + ".tmp.npz"
+    np.savez(tmp, signature=np.array(signature), **columns)
+    os.replace(tmp, cache_path)
+    return files, columns
+
+
+def compute_stats(files, cols, class_names, imgsz):
+    """Per-class and per-image statistics, vectorized over the whole table."""
+    n_images = len(files)
+    n_classes = max(len(class_names), int(cols["cls"].max()) + 1 if len(cols["cls"]) else 0)
+    cls = cols["cls"].astype(np.int64)
+    w, h = cols["w"], cols["h"]
+
+    scale = np.sqrt(w * h) * imgsz            # box size in px at training resolution
+    aspect = w / np.maximum(h, 1e-9)
+    area = w * h                              # fraction of image area
+
+    counts = np.bincount(cls, minlength=n_classes)
+    scale_hist = np.histogram2d(cls, scale, bins=[np.arange(n_classes + 1), SCALE_BINS])[0]
+    aspect_hist = np.histogram2d(cls, aspect, bins=[np.arange(n_classes + 1), ASPECT_BINS])[0]
+
+    per_image = np.bincount(cols["image"], minlength=n_images)
+    per_image_cls = np.zeros((n_images, n_classes), dtype=np.int64)
+    np.add.at(per_image_cls, (cols["image"], cls), 1)
+
+    def pct(values):
+        if len(values) == 0:
+            return None
+        return dict(zip(map(str, PERCENTILES), np.percentile(values, PERCENTILES).round(4).tolist()))
+
+    classes = {}
+    for c in range(n_classes):
+        m = cls == c
+        classes[class_names[c] if c < len(class_names) else str(c)] = {
+            "boxes": int(counts[c]),
+            "images_with_class": int((per_image_cls[:, c] > 0).sum()),
+            "scale_px_percentiles": pct(scale[m]),
+            "aspect_percentiles": pct(aspect[m]),
+            "area_fraction_percentiles": pct(area[m]),
+            "scale_px_hist": scale_hist[c].astype(int).tolist(),
+            "aspect_hist": aspect_hist[c].astype(int).tolist(),
+        }
+
+    return {
+        "images": n_images,
+        "boxes": int(len(cls)),
+        "imgsz": imgsz,
+        "scale_bins_px": SCALE_BINS[:-1],
+        "aspect_bins": ASPECT_BINS[:-1],
+        "boxes_per_image": {
+            "mean": round(float(per_image.mean()), 3) if n_images else 0.0,
+            "max": int(per_image.max()) if n_images else 0,
+            "empty_images": int((per_image == 0).sum()),
+            "percentiles": pct(per_image),
+        },
+        "small_box_fraction": round(float((scale < 32).mean()), 4) if len(cls) else 0.0,
+        "classes": classes,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Dataset statistics from YOLO label files")
+    parser.add_argument("labels", nargs="?", default="dataset/labels")
+    parser.add_argument("--classes", default="classes.txt")
+    parser.add_argument("--imgsz", type=int, default=640,
+                        help="training size used to express box sizes in pixels")
+    parser.add_argument("--json", default=None, help="write the full statistics here")
+    parser.add_argument("--no-cache", action="store_true")
+    args = parser.parse_args()
+
+    class_names = []
+    if os.path.exists(args.classes):
+        class_map = load_class_map(args.classes)
+        class_names = sorted(class_map, key=class_map.get)
+
+    t0 = time.perf_counter()
+    files, cols = load_index(args.labels, use_cache=not args.no_cache)
+    t1 = time.perf_counter()
+    stats = compute_stats(files, cols, class_names, args.imgsz)
+    t2 = time.perf_counter()
+
+    print(f"{stats['images']} label files, {stats['boxes']} boxes "
+          f"(load {t1 - t0:.2f}s, stats {t2 - t1:.2f}s)")
+    print(f"boxes/image: mean {stats['boxes_per_image']['mean']}, "
+          f"max {stats['boxes_per_image']['max']}, "
+          f"empty {stats['boxes_per_image']['empty_images']}")
+    print(f"boxes under 32px at imgsz={args.imgsz}: {100 * stats['small_box_fraction']:.1f}%")
+    print(f"{'class':<18}{'boxes':>8}{'p5 px':>9}{'p50 px':>9}{'p95 px':>9}{'p50 w/h':>10}")
+    for name, c in stats["classes"].items():
+        s, a = c["scale_px_percentiles"], c["aspect_percentiles"]
+        if s is None:
+            print(f"{name:<18}{0:>8}")
+            continue
+        print(f"{name:<18}{c['boxes']:>8}{s['5']:>9.1f}{s['50']:>9.1f}{s['95']:>9.1f}{a['50']:>10.2f}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(stats, f, indent=2)
+        print(f"Statistics saved in '{args.json}'")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,13 +1,9 @@
-from PIL import Image
-import base64
-from io import BytesIO
 from fastapi import FastAPI, File, UploadFile
 from fastapi.middleware.cors import CORSMiddleware
-from ultralytics import YOLO
-from collections import Counter
-import shutil
 import os
 
+from engine import NearDuplicateIndex, get_engine, to_base64
+
 # ================== APP ==================
 app = FastAPI(title="PCB Defect Detection API")
 
@@ -21,7 +17,9 @@ app.add_middleware(
 )
 
 # ================== MODEL ==================
-model = YOLO("model/best.pt")
+# Re-shot boards within DEDUP_MAX_DISTANCE bits (of 64) of a board inspected in
+# the last DEDUP_TTL seconds reuse its result; DEDUP_CAPACITY=0 turns this off.
+engine = get_engine("model/best.pt", dedup=NearDuplicateIndex.from_env())
 
 # ================== DIRECTORIES ==================
 UPLOAD_DIR = "uploads"
@@ -32,37 +30,30 @@ os.makedirs(UPLOAD_DIR, exist_ok=True)
 def root():
     return {"status": "Backend running"}
 
+@app.get("/stats")
+def stats():
+    return engine.stats.snapshot()
+
 # ================== PREDICT API ==================
 @app.post("/predict")
 async def predict(file: UploadFile = File(...)):
 
     # Save uploaded image
+    contents = await file.read()
     file_path = os.path.join(UPLOAD_DIR, file.filename)
     with open(file_path, "wb") as buffer:
-        shutil.copyfileobj(file.file, buffer)
-
-    # Run YOLO
-    results = model(file_path)
-    r = results[0]
-
-    # Collect defects
-    defects = []
-    if r.boxes is not None:
-        for c in r.boxes.cls:
-            defects.append(model.names[int(c)])
-
-    defect_counts = Counter(defects)
+        buffer.write(contents)
 
-    # Create annotated image
-    annotated_img = r.plot()[:, :, ::-1]  # BGR → RGB
-    pil_img = Image.fromarray(annotated_img)
-    buf = BytesIO()
-    pil_img.save(buf, format="PNG")
-    img_base64 = base64.b64encode(buf.getvalue()).decode("utf-8")
+    # Run YOLO (or reuse a recent near-duplicate's result)
+    pred = engine.predict_bytes(contents, source=file.filename)
+    defect_counts = pred.counts()
 
     return {
         "status": "success",
-        "defects_detected": dict(defect_counts),
+        "defects_detected": defect_counts,
         "total_defects": sum(defect_counts.values()),
-        "annotated_image": img_base64
+        "boxes": pred.boxes(),
+        "detections": pred.detections,  # unrounded float bboxes, for CSV exports
+        "annotated_image": to_base64(pred.annotated_png()),
+        "provenance": pred.provenance,
     }
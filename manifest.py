@@ -0,0 +1,152 @@
+# manifest.py
+# Bookkeeping for resumable, sharded bulk jobs.
+#
+# Each worker appends to its own manifest-<name>.jsonl, so several processes
+# (or machines on a shared mount) never write the same file. An input counts
+# as done when its (relative path, size, mtime) appears in any manifest, which
+# means a changed file is picked up again on the next run. Inputs that could
+# not be read are recorded too (with no chunk), so they are not retried until
+# they change. The newest entry of a path wins: the record of an older version
+# in an earlier chunk is superseded (see CompletedManifest.current).
+#
+# ContentManifest does the same for incremental dataset conversion: it keeps
+# the per-item state of the last run so reruns only touch added, changed or
+# deleted items.
+import glob
+import json
+import os
+import time
+import zlib
+
+
+def file_signature(path):
+    st = os.stat(path)
+    return st.st_size, st.st_mtime_ns
+
+
+def parse_shard(spec):
+    """'i/N' -> (i, N) with 0 <= i < N."""
+    try:
+        index, count = (int(x) for x in spec.split("/"))
+    except ValueError:
+        raise ValueError(f"shard must look like i/N, got {spec!r}") from None
+    if not 0 <= index < count:
+        raise ValueError(f"shard index must be in [0, {count}), got {index}")
+    return index, count
+
+
+def in_shard(key, index, count):
+    """Stable assignment of a relative path to one of `count` shards."""
+    return zlib.crc32(key.encode("utf-8")) % count == index
+
+
+def atomic_write(path, write_fn, mode="w"):
+    """Write via a temp file + rename so readers never see a partial file."""
+    tmp = path + ".tmp"
+    with open(tmp, mode) as f:
+        write_fn(f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+class CompletedManifest:
+    """Append-only record of completed inputs and the output chunk holding them."""
+
+    def __init__(self, out_dir, name):
+        self.out_dir = out_dir
+        self.path = os.path.join(out_dir, f"manifest-{name}.jsonl")
+
+    @staticmethod
+    def _entries(out_dir, name="*"):
+        for path in sorted(glob.glob(os.path.join(out_dir, f"manifest-{name}.jsonl"))):
+            with open(path) as f:
+                for line in f:
+                    try:
+                        yield json.loads(line)
+                    except json.JSONDecodeError:
+                        continue  # torn last line from a crash
+
+    @staticmethod
+    def load_all(out_dir, name="*"):
+        """
+        {(key, size, mtime_ns): chunk} across every worker's manifest, or only
+        manifest-<name>.jsonl (jobs of another kind sharing out_dir); chunk is
+        None for inputs that failed.
+        """
+        return {(e["key"], e["size"], e["mtime_ns"]): e["chunk"]
+                for e in CompletedManifest._entries(out_dir, name)}
+
+    @staticmethod
+    def current(out_dir):
+        """
+        {key: chunk} from each key's newest entry. Output records of a key in
+        any other chunk are superseded; a chunk of None means its latest
+        version failed and none of its records are current.
+        """
+        latest = {}
+        for e in CompletedManifest._entries(out_dir):
+            stamp = e.get("time_ns", 0)
+            old = latest.get(e["key"])
+            if old is None or stamp >= old[0]:
+                latest[e["key"]] = (stamp, e["chunk"])
+        return {key: chunk for key, (_, chunk) in latest.items()}
+
+    def record(self, chunk, entries):
+        """
+        Mark (key, size, mtime_ns) entries as stored in `chunk` (None: the
+        input could not be processed); durable on return.
+        """
+        stamp = time.time_ns()
+        with open(self.path, "a+b") as f:
+            # a crash can leave a torn last line; start ours on a fresh one
+            if f.tell() > 0:
+                f.seek(-1, os.SEEK_END)
+                if f.read(1) != b"\n":
+                    f.write(b"\n")
+            for key, size, mtime_ns in entries:
+                line = json.dumps({"key": key, "size": size, "mtime_ns": mtime_ns,
+                                   "chunk": chunk, "time_ns": stamp})
+                f.write((line + "\n").encode("utf-8"))
+            f.flush()
+            os.fsync(f.fileno())
+
+
+class ContentManifest:
+    """
+    Per-item state of an incremental conversion, stored as one JSON file.
+
+    `entries` maps an item key to {"sig": [...], ...}; callers add whatever
+    else they need to undo the item later (output paths, split, ...).
+    `params` captures settings that invalidate every item when changed
+    (e.g. the class map); on a mismatch every entry is reported as changed
+    (or deleted) but its extra fields are kept.
+    """
+
+    def __init__(self, path, params=None):
+        self.path = path
+        self.params = params
+        self.entries = {}
+        if os.path.exists(path):
+            with open(path) as f:
+                data = json.load(f)
+            self.entries = data["entries"]
+            if data.get("params") != params:
+                for entry in self.entries.values():
+                    entry["sig"] = None
+
+    def diff(self, current):
+        """current {key: sig} -> (added, changed, deleted) key lists."""
+        added, changed = [], []
+        for key, sig in current.items():
+            old = self.entries.get(key)
+            if old is None:
+                added.append(key)
+            elif old["sig"] != list(sig):
+                changed.append(key)
+        deleted = [key for key in self.entries if key not in current]
+        return added, changed, deleted
+
+    def save(self):
+        data = {"params": self.params, "entries": self.entries}
+        atomic_write(self.path, lambda f: json.dump(data, f, separators=(",", ":")))
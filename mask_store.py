@@ -0,0 +1,101 @@
+# mask_store.py
+# Compact storage for SAM masks: one compressed .npz per image instead of one
+# full-resolution PNG per mask.
+#
+# Each mask is stored as a COCO-style uncompressed RLE (run lengths over the
+# column-major pixels, starting with a run of zeros). All masks of an image
+# share one counts array; `offsets` is the index into it:
+#
+#   counts   uint32  run lengths of every mask, back to back
+#   offsets  int64   mask i is counts[offsets[i]:offsets[i + 1]]
+#   areas    int64   foreground pixels per mask
+#   shape    int64   (height, width)
+#
+# MaskArchive reads an archive lazily and decodes one mask at a time.
+import os
+
+import numpy as np
+
+from manifest import atomic_write
+
+SUFFIX = ".masks.npz"
+
+
+def rle_encode(mask):
+    """Boolean (H, W) mask -> uint32 run lengths, column-major, zeros first."""
+    flat = np.asarray(mask, dtype=bool).ravel(order="F")
+    if flat.size == 0:
+        return np.zeros(0, dtype=np.uint32)
+    bounds = np.concatenate(([0], np.flatnonzero(flat[1:] != flat[:-1]) + 1, [flat.size]))
+    counts = np.diff(bounds)
+    if flat[0]:
+        counts = np.concatenate(([0], counts))
+    return counts.astype(np.uint32)
+
+
+def rle_decode(counts, shape):
+    """Inverse of rle_encode."""
+    values = np.zeros(len(counts), dtype=bool)
+    values[1::2] = True
+    return np.repeat(values, counts).reshape(shape, order="F")
+
+
+def rle_to_coco(counts, shape):
+    """{"size": [h, w], "counts": [...]} as used by COCO (uncompressed RLE)."""
+    return {"size": [int(shape[0]), int(shape[1])], "counts": counts.tolist()}
+
+
+def archive_path(output_dir, img_name, tag=None):
+    """<output_dir>/<stem>.masks.npz, or <stem>.<tag>.masks.npz to keep kinds of masks apart."""
+    stem = os.path.splitext(img_name)[0]
+    return os.path.join(output_dir, f"{stem}.{tag}{SUFFIX}" if tag else stem + SUFFIX)
+
+
+def encode_masks(masks, shape):
+    """The arrays of one image's archive (see the top of this file)."""
+    encoded = [rle_encode(m) for m in masks]
+    lengths = [len(c) for c in encoded]
+    return {
+        "counts": np.concatenate(encoded) if encoded else np.zeros(0, dtype=np.uint32),
+        "offsets": np.concatenate(([0], np.cumsum(lengths))).astype(np.int64),
+        "areas": np.array([int(c[1::2].sum()) for c in encoded], dtype=np.int64),
+        "shape": np.array(shape[:2], dtype=np.int64),
+    }
+
+
+def write_archive(arrays, path):
+    """Write encode_masks() output to `path` (atomically)."""
+    atomic_write(path, lambda f: np.savez_compressed(f, **arrays), mode="wb")
+
+
+def save_masks(masks, path, shape):
+    """Write all masks of one image to a single archive (atomically)."""
+    write_archive(encode_masks(masks, shape), path)
+
+
+class MaskArchive:
+    """Lazy reader for one image's archive; masks are decoded on access."""
+
+    def __init__(self, path):
+        with np.load(path) as z:
+            self.counts = z["counts"]
+            self.offsets = z["offsets"]
+            self.areas = z["areas"]
+            self.shape = tuple(int(v) for v in z["shape"])
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def rle(self, i):
+        return self.counts[self.offsets[i]:self.offsets[i + 1]]
+
+    def __getitem__(self, i):
+        if not 0 <= i < len(self):
+            raise IndexError(i)
+        return rle_decode(self.rle(i), self.shape)
+
+    def __iter__(self):
+        return (self[i] for i in range(len(self)))
+
+    def to_coco(self, i):
+        return rle_to_coco(self.rle(i), self.shape)
@@ -1,2 +0,0 @@
-#!/bin/bash
-uvicorn api:app --host 0.0.0.0 --port 10000
@@ -1,10 +1,342 @@
-from ultralytics import YOLO
-
-model = YOLO(r"C:\Users\asus\OneDrive\Desktop\yolo by ultralytics\runs\detect\train10\weights\best.pt")
-model.predict(
-    source=r"C:\Users\asus\OneDrive\Desktop\yolo by ultralytics\data\images\val",
-    save=True,
-    project="runs\detect",
-    name="val_predictions",
-    exist_ok=True
+# predict.py
+# High-throughput batch prediction over a directory or glob of PCB images.
+#
+#   python predict.py dataset/images/val --model best.pt --out runs/val_predictions
+#   python predict.py "archive/**/*.jpg" --format parquet --out runs/archive \
+#       --shard 0/4 --save-annotated runs/annotated
+#
+# Images are decoded on a thread pool ahead of the model, inference runs in
+# batches through the shared engine, and detections are written as JSONL (one
+# record per image) or Parquet (one row per detection). Annotated images are
+# optional and rendered/written on a separate pool, under the same relative
+# path as their input (the manifest key), so same-named files in different
+# subdirectories stay apart.
+#
+# Output goes to --out in chunks (part-<shard>-NNNNN.<fmt>), each written
+# atomically and then recorded in manifest-<shard>.jsonl keyed by relative
+# path, size and mtime. Re-running the same command resumes where it stopped;
+# --shard i/N lets N processes or machines split the inputs without talking
+# to each other. Records carry that relative path as "key"; a changed input
+# gets a new record in a later chunk, so read the output with
+# read_predictions(), which skips superseded records.
+#
+# SOURCE may also be a pack directory written by shards.py; images are then
+# decoded straight from the memory-mapped shards.
+import argparse
+import glob
+import json
+import os
+import re
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+import cv2
+
+from engine import InferenceEngine, decode_image, read_image, render
+from manifest import (
+    CompletedManifest, atomic_write, file_signature, in_shard, parse_shard,
 )
+from shards import INDEX_NAME, ShardReader, is_pack
+
+IMAGE_EXTS = (".jpg", ".jpeg", ".png", ".bmp", ".tif", ".tiff")
+
+
+def collect_sources(source):
+    """Directory (non-recursive) or glob pattern -> sorted list of image paths."""
+    if os.path.isdir(source):
+        paths = [e.path for e in os.scandir(source) if e.is_file()]
+    else:
+        paths = glob.glob(source, recursive=True)
+    return sorted(p for p in paths if p.lower().endswith(IMAGE_EXTS))
+
+
+def source_root(source):
+    """Directory that manifest keys are relative to (the glob's literal prefix)."""
+    if os.path.isdir(source):
+        return source
+    parts = []
+    for part in source.replace("\\", "/").split("/"):
+        if glob.has_magic(part):
+            break
+        parts.append(part)
+    return "/".join(parts) or "."
+
+
+@contextmanager
+def open_source(source):
+    """
+    Resolve SOURCE to (inputs, signature, load), valid inside the `with`:
+      inputs     [(ident, key)] - ident is a file path or a pack item name,
+                 key is the stable name used for sharding and the manifest
+      signature  (ident, key) -> (key, size, mtime_ns) manifest entry
+      load       ident -> BGR image
+    """
+    if is_pack(source):
+        with ShardReader(source) as reader:
+            stamp = os.stat(os.path.join(source, INDEX_NAME)).st_mtime_ns
+            sizes = {it["name"]: it["image"][1] for it in reader.items}
+            yield (
+                [(name, name) for name in reader.names()],
+                lambda ident, key: (key, sizes[ident], stamp),
+                lambda ident: decode_image(reader.image_bytes(ident)),
+            )
+        return
+
+    root = source_root(source)
+    inputs = [
+        (path, os.path.relpath(path, root).replace(os.sep, "/"))
+        for path in collect_sources(source)
+    ]
+    yield inputs, lambda ident, key: (key, *file_signature(ident)), read_image
+
+
+def iter_decoded(paths, pool, prefetch, load=read_image, failed=None):
+    """
+    Yield (path, image) in order while keeping `prefetch` decodes in flight.
+    Unreadable inputs are skipped with a warning and appended to `failed`.
+    """
+    pending = deque()
+    it = iter(paths)
+    for path in it:
+        pending.append((path, pool.submit(load, path)))
+        if len(pending) >= prefetch:
+            break
+
+    while pending:
+        path, fut = pending.popleft()
+        nxt = next(it, None)
+        if nxt is not None:
+            pending.append((nxt, pool.submit(load, nxt)))
+        try:
+            yield path, fut.result()
+        except (OSError, ValueError) as e:
+            print(f"[WARN] Skipping {path}: {e}")
+            if failed is not None:
+                failed.append(path)
+
+
+def iter_batches(decoded, batch_size):
+    batch = []
+    for item in decoded:
+        batch.append(item)
+        if len(batch) == batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def drain(jobs, limit):
+    """Wait on the oldest futures until at most `limit` remain (bounds memory)."""
+    while len(jobs) > limit:
+        jobs.popleft().result()
+
+
+def make_record(path, key, image, detections):
+    h, w = image.shape[:2]
+    return {"image": path, "key": key, "width": w, "height": h, "detections": detections}
+
+
+def records_to_rows(records):
+    """Flatten per-image records into one row per detection (for Parquet)."""
+    rows = []
+    for rec in records:
+        if not rec["detections"]:
+            rows.append({"image": rec["image"], "key": rec["key"],
+                         "width": rec["width"], "height": rec["height"],
+                         "class_id": None, "type": None, "confidence": None,
+                         "x1": None, "y1": None, "x2": None, "y2": None})
+        for d in rec["detections"]:
+            x1, y1, x2, y2 = d["bbox"]
+            rows.append({"image": rec["image"], "key": rec["key"],
+                         "width": rec["width"], "height": rec["height"],
+                         "class_id": d["class_id"], "type": d["type"],
+                         "confidence": d["confidence"],
+                         "x1": x1, "y1": y1, "x2": x2, "y2": y2})
+    return rows
+
+
+def write_records(records, out_path, fmt):
+    """Write one chunk atomically (temp file + rename)."""
+    if fmt == "jsonl":
+        atomic_write(out_path, lambda f: f.writelines(json.dumps(r) + "\n" for r in records))
+    else:
+        import pandas as pd  # parquet needs pyarrow (or fastparquet) installed
+        df = pd.DataFrame(records_to_rows(records))
+        atomic_write(out_path, lambda f: df.to_parquet(f, index=False), mode="wb")
+
+
+def read_predictions(out_dir):
+    """
+    Yield the current output of every input in `out_dir`: records from JSONL
+    chunks, detection rows from Parquet chunks. Records of an input that was
+    re-inferred later (it changed) or whose latest version failed are skipped.
+    """
+    current = CompletedManifest.current(out_dir)
+    for chunk in sorted({c for c in current.values() if c is not None}):
+        path = os.path.join(out_dir, chunk)
+        if chunk.endswith(".parquet"):
+            import pandas as pd
+            records = pd.read_parquet(path).to_dict("records")
+        else:
+            with open(path) as f:
+                records = [json.loads(line) for line in f]
+        for rec in records:
+            if current.get(rec["key"]) == chunk:
+                yield rec
+
+
+def prepare_out_dir(out_dir, worker, done_chunks):
+    """
+    Drop this worker's chunk files that no manifest entry points at (written
+    just before a crash) and return the next free chunk number.
+    """
+    pattern = re.compile(rf"part-{re.escape(worker)}-(\d+)\.\w+$")
+    next_seq = 0
+    for entry in os.scandir(out_dir):
+        m = pattern.match(entry.name)
+        if m is None:
+            if entry.name.startswith(f"part-{worker}-") and entry.name.endswith(".tmp"):
+                os.remove(entry.path)
+            continue
+        if entry.name not in done_chunks:
+            os.remove(entry.path)
+            continue
+        next_seq = max(next_seq, int(m.group(1)) + 1)
+    return next_seq
+
+
+def annotated_path(out_dir, key):
+    """The input's key (its path relative to the source root) mirrored under out_dir."""
+    return os.path.join(out_dir, *key.split("/"))
+
+
+def save_annotated(image, detections, names, key, out_dir):
+    out_path = annotated_path(out_dir, key)
+    os.makedirs(os.path.dirname(out_path), exist_ok=True)
+    cv2.imwrite(out_path, render(image, detections, names))
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Batch PCB defect prediction")
+    parser.add_argument("source", help="image directory, glob pattern (quote it) or pack directory")
+    parser.add_argument("--model", default="best.pt")
+    parser.add_argument("--out", default="predictions", help="output directory")
+    parser.add_argument("--format", choices=["jsonl", "parquet"], default="jsonl")
+    parser.add_argument("--chunk-size", type=int, default=1000,
+                        help="images per output chunk (unit of resume)")
+    parser.add_argument("--shard", default="0/1", help="process only shard i of N")
+    parser.add_argument("--batch-size", type=int, default=16)
+    parser.add_argument("--imgsz", type=int, default=640)
+    parser.add_argument("--conf", type=float, default=0.25)
+    parser.add_argument("--iou", type=float, default=0.7)
+    parser.add_argument("--workers", type=int, default=min(8, os.cpu_count() or 1),
+                        help="decode / render threads")
+    parser.add_argument("--save-annotated", metavar="DIR", default=None,
+                        help="also write annotated images to DIR")
+    args = parser.parse_args()
+    try:
+        args.shard = parse_shard(args.shard)
+    except ValueError as e:
+        parser.error(str(e))
+    return args
+
+
+def run(args, inputs, signature, load):
+    shard_index, shard_count = args.shard
+    worker = f"{shard_index}of{shard_count}"
+
+    todo = [(ident, key) for ident, key in inputs if in_shard(key, shard_index, shard_count)]
+
+    os.makedirs(args.out, exist_ok=True)
+    done = CompletedManifest.load_all(args.out)
+    manifest = CompletedManifest(args.out, worker)
+    seq = prepare_out_dir(args.out, worker, set(done.values()))
+
+    pending = []
+    for ident, key in todo:
+        sig = signature(ident, key)
+        if sig not in done:
+            pending.append((ident, sig))
+    print(f"Shard {shard_index}/{shard_count}: {len(todo)} inputs, "
+          f"{len(todo) - len(pending)} already done, {len(pending)} to process")
+    if not pending:
+        return
+
+    if args.save_annotated:
+        os.makedirs(args.save_annotated, exist_ok=True)
+    engine = InferenceEngine(args.model, conf=args.conf, iou=args.iou,
+                             imgsz=args.imgsz, batch_size=args.batch_size)
+
+    signatures = dict(pending)
+    chunk_records, chunk_sigs = [], []
+    failed = []
+    n_images = n_boxes = n_failed = 0
+
+    def record_failed():
+        # recorded without a chunk: not retried until the file changes
+        nonlocal n_failed
+        manifest.record(None, [signatures[path] for path in failed])
+        n_failed += len(failed)
+        failed.clear()
+
+    def flush():
+        nonlocal seq
+        chunk = f"part-{worker}-{seq:05d}.{args.format}"
+        write_records(chunk_records, os.path.join(args.out, chunk), args.format)
+        manifest.record(chunk, chunk_sigs)
+        chunk_records.clear()
+        chunk_sigs.clear()
+        seq += 1
+
+    render_jobs = deque()
+    t0 = time.perf_counter()
+    with ThreadPoolExecutor(args.workers) as decode_pool, \
+            ThreadPoolExecutor(args.workers) as render_pool:
+        decoded = iter_decoded(signatures, decode_pool, prefetch=2 * args.batch_size,
+                               load=load, failed=failed)
+        for batch in iter_batches(decoded, args.batch_size):
+            if failed:
+                record_failed()
+            batch_paths = [p for p, _ in batch]
+            images = [img for _, img in batch]
+            for path, image, dets in zip(batch_paths, images, engine.predict(images)):
+                chunk_records.append(make_record(path, signatures[path][0], image, dets))
+                chunk_sigs.append(signatures[path])
+                n_images += 1
+                n_boxes += len(dets)
+                if args.save_annotated:
+                    render_jobs.append(render_pool.submit(
+                        save_annotated, image, dets, engine.names, signatures[path][0],
+                        args.save_annotated))
+            drain(render_jobs, limit=4 * args.batch_size)
+            if len(chunk_records) >= args.chunk_size:
+                # annotated images of this chunk must be on disk before it is marked done
+                drain(render_jobs, limit=0)
+                flush()
+        drain(render_jobs, limit=0)
+        if chunk_records:
+            flush()
+        if failed:
+            record_failed()
+    elapsed = time.perf_counter() - t0
+
+    print(f"Processed {n_images} images ({n_boxes} detections) in {elapsed:.1f}s "
+          f"-> {n_images / elapsed:.2f} images/s")
+    if n_failed:
+        print(f"{n_failed} unreadable inputs recorded as failed (retried once they change)")
+    print(f"Detections written to '{args.out}'")
+    if args.save_annotated:
+        print(f"Annotated images saved in '{args.save_annotated}'")
+
+
+def main():
+    args = parse_args()
+    with open_source(args.source) as (inputs, signature, load):
+        run(args, inputs, signature, load)
+
+
+if __name__ == "__main__":
+    main()
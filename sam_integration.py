@@ -1,38 +1,399 @@
+# sam_integration.py
+# SAM masks for the PCB dataset.
+#
+#   python sam_integration.py --mode boxes --images dataset/images/val    # prompts from YOLO labels
+#   python sam_integration.py --mode boxes --model best.pt                # prompts from detections
+#   python sam_integration.py --mode auto                                 # every mask on the board
+#
+# Box mode computes the image embedding once per image (set_image) and then
+# runs only the light mask decoder on the defect boxes, so it costs a
+# fraction of SamAutomaticMaskGenerator and returns defect masks only.
+# Embeddings are kept in an on-disk cache (embedding_cache.py) shared by both
+# modes, so reruns with other prompts or generator settings skip the encoder
+# for images it has already seen, and masks are written as RLE in one archive
+# per image (mask_store.py).
+#
+# Decoding runs on a prefetch thread and mask writing on a thread pool, so
+# the model stage never waits on disk. Finished images are recorded in
+# <output>/manifest-sam-<mode>-<mask format>.jsonl; a rerun with the same mode
+# and format skips them (--overwrite redoes everything). Both modes can share
+# an output directory: auto mode writes <name>.masks.npz / <name>_mask_<i>.png,
+# box mode <name>.boxes.masks.npz / <name>_boxes_mask_<i>.png.
+# The run ends with the time per image spent in each stage (read, prompts,
+# embedding, mask decoding, RLE encoding, writing) and the bytes written.
+import argparse
 import os
+import queue
+import threading
+import time
+from collections import Counter, deque
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
 import cv2
-import torch
 import numpy as np
-from segment_anything import sam_model_registry, SamAutomaticMaskGenerator
+import torch
+from segment_anything import SamAutomaticMaskGenerator, SamPredictor, sam_model_registry
+
+from annotations import default_labels_dir, parse_yolo_boxes
+from embedding_cache import EmbeddingCache
+from manifest import CompletedManifest, file_signature
+from mask_store import archive_path, encode_masks, write_archive
+
+# ---------------- SETTINGS ----------------
+SAM_CHECKPOINT = "./checkpoints/sam_vit_b_01ec64.pth"  # path inside your project
+SAM_MODEL_TYPE = "vit_b"
+IMAGES_DIR = "./dataset/images"      # your YOLO images
+OUTPUT_DIR = "./dataset/sam_masks"   # masks will be saved here
+CACHE_DIR = "./dataset/.sam_embeddings"  # image embeddings reused across runs
+IMAGE_EXTS = (".jpg", ".png")
+
+
+def load_sam(checkpoint, model_type, device):
+    sam = sam_model_registry[model_type](checkpoint=checkpoint)
+    sam.to(device=device)
+    return sam
+
+
+def checkpoint_fingerprint(checkpoint, model_type):
+    """Identifies the encoder weights, so cached embeddings never cross checkpoints."""
+    size, mtime_ns = file_signature(checkpoint)
+    return f"{model_type}:{os.path.basename(checkpoint)}:{size}:{mtime_ns}"
+
+
+def list_images(images_dir):
+    return sorted(f for f in os.listdir(images_dir) if f.lower().endswith(IMAGE_EXTS))
+
+
+def label_boxes(img_name, labels_dir, width, height):
+    """Defect boxes (N, 4) xyxy in pixels from the image's YOLO label file."""
+    label_path = os.path.join(labels_dir, os.path.splitext(img_name)[0] + ".txt")
+    if not os.path.exists(label_path):
+        return np.zeros((0, 4))
+    with open(label_path) as f:
+        return parse_yolo_boxes(f.read(), width, height)[1]
+
+
+def detection_boxes(engine, image_bgr):
+    """Defect boxes (N, 4) xyxy in pixels from the YOLO model."""
+    detections = engine.predict([image_bgr])[0]
+    return np.array([d["bbox"] for d in detections], dtype=np.float64).reshape(-1, 4)
+
+
+class StageTimes:
+    """Seconds spent per pipeline stage, summed over all threads."""
+
+    def __init__(self):
+        self.seconds = Counter()
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def time(self, stage):
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            with self._lock:
+                self.seconds[stage] += time.perf_counter() - t0
+
+    def ms(self, stage, n):
+        return 1000 * self.seconds[stage] / max(n, 1)
+
+
+class CachedSamPredictor(SamPredictor):
+    """
+    SamPredictor whose set_image() skips the encoder when the embedding of the
+    current image (see use()) is cached. SamAutomaticMaskGenerator calls
+    set_image() itself, so giving it this predictor caches auto mode too;
+    other inputs (e.g. generator crop layers) are encoded as usual.
+    set_image() time is recorded as the "embedding" stage of `times`.
+    """
+
+    def __init__(self, sam, cache=None, times=None):
+        super().__init__(sam)
+        self.cache = cache
+        self.times = times if times is not None else StageTimes()
+        self.key = None
+        self.shape = None
+
+    def use(self, key, shape):
+        """Cache key and (h, w, c) shape of the whole image about to be processed."""
+        self.key, self.shape = key, tuple(shape)
+
+    def set_image(self, image, image_format="RGB"):
+        with self.times.time("embedding"):
+            self._set_image(image, image_format)
+
+    def _set_image(self, image, image_format):
+        if self.cache is None or self.key is None or image_format != "RGB" or image.shape != self.shape:
+            super().set_image(image, image_format)
+            return
+        cached = self.cache.get(self.key)
+        if cached is not None:
+            embedding, original_size, input_size = cached
+            self.reset_image()
+            self.features = torch.from_numpy(np.array(embedding)[None]).to(self.device)
+            self.original_size = original_size
+            self.input_size = input_size
+            self.is_image_set = True
+            return
+        super().set_image(image, image_format)
+        self.cache.put(self.key, self.features[0].cpu().numpy(), self.original_size, self.input_size)
+
+
+def box_masks(predictor, image_rgb, boxes):
+    """
+    One mask per box. The encoder runs once (set_image); all boxes go
+    through the mask decoder together. Boards without defects skip SAM.
+    """
+    if len(boxes) == 0:
+        return []
+    predictor.set_image(image_rgb)
+    boxes = torch.as_tensor(boxes, dtype=torch.float, device=predictor.device)
+    boxes = predictor.transform.apply_boxes_torch(boxes, image_rgb.shape[:2])
+    masks, _, _ = predictor.predict_torch(
+        point_coords=None, point_labels=None, boxes=boxes, multimask_output=False)
+    return list(masks[:, 0].cpu().numpy())
+
+
+def auto_masks(generator, image_rgb):
+    return [m["segmentation"] for m in generator.generate(image_rgb)]
+
+
+def output_tag(mode):
+    """Auto mode keeps the original file names; box masks get their own."""
+    return None if mode == "auto" else mode
+
+
+def output_name(img_name, mode, mask_format):
+    """The archive, or the PNG name pattern, holding an image's masks (recorded in the manifest)."""
+    if mask_format == "npz":
+        return os.path.basename(archive_path("", img_name, output_tag(mode)))
+    prefix = os.path.splitext(img_name)[0] + (f"_{mode}" if output_tag(mode) else "")
+    return f"{prefix}_mask_*.png"
+
+
+def save_mask_pngs(masks, output_dir, pattern):
+    """Legacy layout: one full-resolution PNG per mask."""
+    for i, mask in enumerate(masks):
+        mask_path = os.path.join(output_dir, pattern.replace("*", str(i)))
+        cv2.imwrite(mask_path, mask.astype(np.uint8) * 255)
+
+
+def output_complete(output_dir, name, mask_format):
+    """Archives are written atomically, so existing means complete."""
+    if mask_format == "npz":
+        return os.path.exists(os.path.join(output_dir, name))
+    return True  # PNGs: the manifest entry is written after the last mask
+
+
+def images_to_process(images_dir, output_dir, mode, mask_format, overwrite=False):
+    """
+    (all image names, [(name, size, mtime_ns)] still to do). Only this mode
+    and format's manifest counts, so other runs into the same output
+    directory never make images look done.
+    """
+    img_names = list_images(images_dir)
+    done = {} if overwrite else CompletedManifest.load_all(output_dir, f"sam-{mode}-{mask_format}")
+    todo = []
+    for img_name in img_names:
+        key = (img_name, *file_signature(os.path.join(images_dir, img_name)))
+        if key not in done:
+            todo.append(key)
+        elif done[key] is not None and not output_complete(output_dir, done[key], mask_format):
+            todo.append(key)  # recorded, but the archive was removed since
+    return img_names, todo
+
+
+def read_image(path):
+    """(file bytes, BGR image or None)."""
+    with open(path, "rb") as f:
+        data = f.read()
+    return data, cv2.imdecode(np.frombuffer(data, np.uint8), cv2.IMREAD_COLOR)
+
+
+def prefetch(items, load, depth):
+    """
+    Yield (item, load(item)) in order while a background thread loads up to
+    `depth` items ahead, so decoding overlaps the model stage. Items whose
+    load raises OSError are skipped; any other error is raised here.
+    """
+    q = queue.Queue(maxsize=depth)
+    stop = threading.Event()
+
+    def put(value):
+        while not stop.is_set():
+            try:
+                q.put(value, timeout=0.1)
+                return True
+            except queue.Full:
+                pass
+        return False  # consumer has gone away
+
+    def worker():
+        try:
+            for item in items:
+                try:
+                    value = (item, load(item))
+                except OSError as e:
+                    print(f"[WARN] Skipping {item[0]}: {e}")
+                    continue
+                if not put(value):
+                    return
+        except BaseException as e:  # handed to the consumer instead of killing the thread silently
+            put(e)
+            return
+        put(None)
+
+    thread = threading.Thread(target=worker, daemon=True)
+    thread.start()
+    try:
+        while (got := q.get()) is not None:
+            if isinstance(got, BaseException):
+                raise got
+            yield got
+    finally:
+        stop.set()
+
+
+def format_eta(seconds):
+    minutes, seconds = divmod(int(seconds), 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours:d}:{minutes:02d}:{seconds:02d}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate SAM masks for PCB images")
+    parser.add_argument("--mode", choices=["auto", "boxes"], default="auto",
+                        help="auto: SamAutomaticMaskGenerator on the whole image; "
+                             "boxes: one mask per defect box")
+    parser.add_argument("--images", default=IMAGES_DIR)
+    parser.add_argument("--output", default=OUTPUT_DIR)
+    parser.add_argument("--labels", default=None,
+                        help="YOLO label directory for box prompts "
+                             "(default: images path with images -> labels)")
+    parser.add_argument("--model", default=None,
+                        help="take box prompts from this YOLO model instead of label files")
+    parser.add_argument("--conf", type=float, default=0.25, help="detection confidence with --model")
+    parser.add_argument("--mask-format", choices=["npz", "png"], default="npz",
+                        help="npz: all masks of an image as RLE in one <name>.masks.npz "
+                             "(read with mask_store.MaskArchive); png: one file per mask")
+    parser.add_argument("--writers", type=int, default=4, help="mask writer threads")
+    parser.add_argument("--prefetch", type=int, default=4, help="images decoded ahead of the model")
+    parser.add_argument("--overwrite", action="store_true",
+                        help="reprocess images already recorded as done")
+    parser.add_argument("--checkpoint", default=SAM_CHECKPOINT)
+    parser.add_argument("--model-type", default=SAM_MODEL_TYPE)
+    parser.add_argument("--embedding-cache", default=CACHE_DIR,
+                        help="on-disk image embedding cache (shared by both modes)")
+    parser.add_argument("--embedding-cache-mb", type=int, default=2048,
+                        help="cache size cap (about 4 MB per image); 0 disables the cache")
+    args = parser.parse_args()
+
+    # Device setup
+    device = "cuda" if torch.cuda.is_available() else "cpu"
+    sam = load_sam(args.checkpoint, args.model_type, device)
+    os.makedirs(args.output, exist_ok=True)
+
+    cache = None
+    if args.embedding_cache_mb > 0:
+        cache = EmbeddingCache(args.embedding_cache,
+                               checkpoint_fingerprint(args.checkpoint, args.model_type),
+                               capacity_mb=args.embedding_cache_mb)
+    times = StageTimes()
+    predictor = CachedSamPredictor(sam, cache, times=times)
+    if args.mode == "auto":
+        generator = SamAutomaticMaskGenerator(sam)
+        generator.predictor = predictor
+    else:
+        labels_dir = args.labels or default_labels_dir(args.images)
+        engine = None
+        if args.model:
+            from engine import InferenceEngine  # only needed for detection prompts
+            engine = InferenceEngine(args.model, conf=args.conf)
+
+    # Resume: skip images already recorded as complete with this mode and format
+    img_names, todo = images_to_process(args.images, args.output, args.mode, args.mask_format,
+                                        args.overwrite)
+    manifest = CompletedManifest(args.output, f"sam-{args.mode}-{args.mask_format}")
+    print(f"{len(img_names)} images, {len(img_names) - len(todo)} already done, {len(todo)} to process")
+
+    sizes = []  # bytes written per image (list.append is thread-safe)
+
+    def write(masks, name, shape):
+        if args.mask_format == "npz":
+            path = os.path.join(args.output, name)
+            with times.time("encode"):
+                arrays = encode_masks(masks, shape)
+            with times.time("write"):
+                write_archive(arrays, path)
+            size = os.path.getsize(path)
+        else:
+            with times.time("write"):  # PNG encoding happens inside cv2.imwrite
+                save_mask_pngs(masks, args.output, name)
+            size = sum(os.path.getsize(os.path.join(args.output, name.replace("*", str(i))))
+                       for i in range(len(masks)))
+        sizes.append(size)
+
+    def finish(job):
+        key, name, fut = job
+        fut.result()
+        manifest.record(name, [key])  # only once the masks are on disk
 
-# Device setup
-device = "cuda" if torch.cuda.is_available() else "cpu"
+    t0 = time.perf_counter()
+    n_done = n_masks = 0
+    jobs = deque()
+    with ThreadPoolExecutor(args.writers) as writers:
+        def load(key):
+            with times.time("read"):
+                return read_image(os.path.join(args.images, key[0]))
 
-# Load SAM model
-sam_checkpoint = "./checkpoints/sam_vit_b_01ec64.pth"  # path inside your project
-sam = sam_model_registry["vit_b"](checkpoint=sam_checkpoint)
-sam.to(device=device)
+        for (img_name, size, mtime_ns), (data, image) in prefetch(todo, load, args.prefetch):
+            if image is None:
+                print(f"[WARN] Could not read {img_name}, skipping.")
+                manifest.record(None, [(img_name, size, mtime_ns)])  # not retried until it changes
+                continue
+            image_rgb = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
+            predictor.use(cache.key(data) if cache is not None else None, image_rgb.shape)
 
-# Initialize mask generator
-mask_generator = SamAutomaticMaskGenerator(sam)
+            if args.mode == "auto":
+                with times.time("sam"):
+                    masks = auto_masks(generator, image_rgb)
+            else:
+                h, w = image.shape[:2]
+                with times.time("prompts"):
+                    boxes = detection_boxes(engine, image) if engine else label_boxes(img_name, labels_dir, w, h)
+                with times.time("sam"):
+                    masks = box_masks(predictor, image_rgb, boxes)
 
-# Paths (use your YOLO dataset path)
-dataset_dir = "./dataset/images"      # your YOLO images
-output_dir = "./dataset/sam_masks"    # masks will be saved here
-os.makedirs(output_dir, exist_ok=True)
+            name = output_name(img_name, args.mode, args.mask_format)
+            jobs.append(((img_name, size, mtime_ns), name,
+                         writers.submit(write, masks, name, image.shape)))
+            while len(jobs) > 2 * args.writers:  # bounds masks held in memory
+                finish(jobs.popleft())
 
-# Process all images
-for img_name in os.listdir(dataset_dir):
-    if img_name.endswith((".jpg", ".png")):
-        img_path = os.path.join(dataset_dir, img_name)
-        image = cv2.imread(img_path)
-        image = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
+            n_done += 1
+            n_masks += len(masks)
+            elapsed = time.perf_counter() - t0
+            rate = n_done / elapsed
+            print(f"[SAM] {n_done}/{len(todo)} {img_name}: {len(masks)} masks | "
+                  f"{rate:.2f} images/s | ETA {format_eta((len(todo) - n_done) / rate)}")
+        while jobs:
+            finish(jobs.popleft())
 
-        # Generate SAM masks
-        masks = mask_generator.generate(image)
+    elapsed = time.perf_counter() - t0
+    print(f"{n_done} images, {n_masks} masks in {elapsed:.1f}s "
+          f"({elapsed / max(n_done, 1):.2f}s per image), {sum(sizes) / 1e6:.1f} MB of masks written")
+    # read / encode / write run on other threads, overlapping the model stages
+    ms = {stage: times.ms(stage, n_done) for stage in times.seconds}
+    ms["mask decoding"] = ms.pop("sam", 0.0) - ms.get("embedding", 0.0)  # "sam" includes set_image
+    stages = ["read", "prompts", "embedding", "mask decoding", "encode", "write"]
+    print("ms per image: " + ", ".join(f"{stage} {ms[stage]:.1f}" for stage in stages if stage in ms))
+    if cache is not None:
+        print(f"Embedding cache: {cache.hits} hits, {cache.misses} misses, "
+              f"{len(cache)} stored in '{args.embedding_cache}'")
+        cache.close()
 
-        # Save masks
-        for i, mask in enumerate(masks):
-            mask_path = os.path.join(output_dir, f"{os.path.splitext(img_name)[0]}_mask_{i}.png")
-            cv2.imwrite(mask_path, mask['segmentation'].astype(np.uint8) * 255)
 
-        print(f"[SAM] Processed {img_name}, {len(masks)} masks generated.")
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+# search_index.py
+# Result search for the Streamlit frontends (re-exported by frontend_utils).
+# Kept free of Streamlit so it can be imported and tested on its own.
+
+
+class SearchIndex:
+    """
+    Case-insensitive substring search over a few short strings per result
+    (file name, defect types), backed by an inverted n-gram index.
+
+    Grams point at distinct strings and strings at result indices, so a
+    defect type shared by thousands of boards is matched once. Every 1-, 2-
+    and 3-gram is indexed: queries of up to three characters are a single
+    lookup, longer ones intersect their trigrams and verify what is left.
+    """
+
+    def __init__(self):
+        self._postings = {}   # gram -> set of distinct strings
+        self._results = {}    # string -> set of result indices
+        self.size = 0
+
+    def __len__(self):
+        return self.size
+
+    def add(self, idx, texts):
+        """Index result `idx` under each of `texts`."""
+        self.size += 1
+        for text in {t.lower() for t in texts}:
+            results = self._results.get(text)
+            if results is None:
+                results = self._results[text] = set()
+                for n in (1, 2, 3):
+                    for i in range(len(text) - n + 1):
+                        self._postings.setdefault(text[i:i + n], set()).add(text)
+            results.add(idx)
+
+    def _strings(self, key):
+        if not key:
+            return self._results  # "" is a substring of everything
+        if len(key) <= 3:
+            return self._postings.get(key, ())
+        grams = sorted((key[i:i + 3] for i in range(len(key) - 2)),
+                       key=lambda g: len(self._postings.get(g, ())))
+        candidates = set(self._postings.get(grams[0], ()))
+        for gram in grams[1:]:
+            if not candidates:
+                break
+            candidates &= self._postings.get(gram, set())
+        return [t for t in candidates if key in t]
+
+    def search(self, keys):
+        """Sorted indices of results matching any of the keys."""
+        found = set()
+        for key in keys:
+            for text in self._strings(key.lower()):
+                found |= self._results[text]
+        return sorted(found)
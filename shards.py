@@ -0,0 +1,180 @@
+# shards.py
+# Pack many small image + label files into a few large shard files.
+#
+#   python shards.py pack --images dataset/images/val --labels dataset/labels/val \
+#       --out dataset/packed/val
+#
+# Layout of a pack directory:
+#   shard-00000.bin, shard-00001.bin, ...   raw bytes, back to back
+#   index.json                              {"items": [{"name", "shard",
+#                                             "image": [offset, length],
+#                                             "label": [offset, length] | null}]}
+#
+# index.json is written last (and removed first when re-packing), so a pack
+# directory without one is incomplete and never read.
+#
+# ShardReader memory-maps the shards and returns memoryview slices, so image
+# bytes go straight to cv2.imdecode without a copy or a per-file open().
+import argparse
+import glob
+import json
+import mmap
+import os
+import threading
+import time
+
+from manifest import atomic_write
+
+IMAGE_EXTS = (".jpg", ".jpeg", ".png", ".bmp", ".tif", ".tiff")
+INDEX_NAME = "index.json"
+
+
+def is_pack(path):
+    return os.path.isfile(os.path.join(path, INDEX_NAME))
+
+
+def pack(images_dir, labels_dir, out_dir, shard_bytes=1 << 30):
+    """Write images (and matching <name>.txt labels) into shard files + index."""
+    os.makedirs(out_dir, exist_ok=True)
+    # shards are rewritten in place: invalidate an existing pack before touching them
+    index_path = os.path.join(out_dir, INDEX_NAME)
+    if os.path.exists(index_path):
+        os.remove(index_path)
+    names = sorted(
+        e.name for e in os.scandir(images_dir)
+        if e.is_file() and e.name.lower().endswith(IMAGE_EXTS)
+    )
+
+    items = []
+    shard_id, shard, offset = -1, None, 0
+
+    def append(data):
+        nonlocal offset
+        start = offset
+        shard.write(data)
+        offset += len(data)
+        return [start, len(data)]
+
+    try:
+        for name in names:
+            with open(os.path.join(images_dir, name), "rb") as f:
+                image = f.read()
+            label = None
+            if labels_dir:
+                label_path = os.path.join(labels_dir, os.path.splitext(name)[0] + ".txt")
+                if os.path.exists(label_path):
+                    with open(label_path, "rb") as f:
+                        label = f.read()
+
+            size = len(image) + len(label or b"")
+            if shard is None or (offset > 0 and offset + size > shard_bytes):
+                if shard is not None:
+                    shard.close()
+                shard_id += 1
+                shard = open(os.path.join(out_dir, f"shard-{shard_id:05d}.bin"), "wb")
+                offset = 0
+
+            items.append({
+                "name": name,
+                "shard": shard_id,
+                "image": append(image),
+                "label": append(label) if label is not None else None,
+            })
+    finally:
+        if shard is not None:
+            shard.close()
+
+    # shards left over from a larger earlier pack
+    for path in glob.glob(os.path.join(out_dir, "shard-*.bin")):
+        if int(os.path.basename(path)[6:-4]) > shard_id:
+            os.remove(path)
+
+    # the index is written last, so a pack without one is incomplete
+    atomic_write(index_path, lambda f: json.dump({"items": items}, f))
+    return len(items), shard_id + 1
+
+
+class ShardReader:
+    """
+    Read-only, memory-mapped view over a pack directory.
+
+    image_bytes() returns a memoryview into the mapping; it stays valid until
+    close(), so decode it (or copy it) before closing the reader. Reads are
+    safe from several threads (predict.py decodes on a pool).
+    """
+
+    def __init__(self, pack_dir):
+        self.pack_dir = pack_dir
+        with open(os.path.join(pack_dir, INDEX_NAME)) as f:
+            self.items = json.load(f)["items"]
+        self._by_name = {it["name"]: it for it in self.items}
+        self._views = {}  # shard id -> (file, mmap, memoryview)
+        self._lock = threading.Lock()  # shards are mapped on first use
+
+    def __len__(self):
+        return len(self.items)
+
+    def __contains__(self, name):
+        return name in self._by_name
+
+    def names(self):
+        """Item names in shard order (sequential reads)."""
+        return [it["name"] for it in self.items]
+
+    def _view(self, shard_id, span):
+        entry = self._views.get(shard_id)
+        if entry is None:
+            with self._lock:
+                entry = self._views.get(shard_id)  # another thread may have mapped it meanwhile
+                if entry is None:
+                    path = os.path.join(self.pack_dir, f"shard-{shard_id:05d}.bin")
+                    f = open(path, "rb")
+                    mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+                    entry = self._views[shard_id] = (f, mm, memoryview(mm))
+        offset, length = span
+        return entry[2][offset:offset + length]
+
+    def image_bytes(self, name):
+        it = self._by_name[name]
+        return self._view(it["shard"], it["image"])
+
+    def label_text(self, name):
+        """YOLO label text, or None when the image had no label file."""
+        it = self._by_name[name]
+        if it["label"] is None:
+            return None
+        return bytes(self._view(it["shard"], it["label"])).decode("utf-8")
+
+    def close(self):
+        with self._lock:
+            for f, mm, view in self._views.values():
+                view.release()
+                mm.close()  # BufferError if a returned slice is still alive
+                f.close()
+            self._views.clear()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pack images + YOLO labels into shard files")
+    sub = parser.add_subparsers(dest="command", required=True)
+    p = sub.add_parser("pack")
+    p.add_argument("--images", required=True, help="e.g. dataset/images/val")
+    p.add_argument("--labels", default=None, help="e.g. dataset/labels/val")
+    p.add_argument("--out", required=True, help="pack directory to create")
+    p.add_argument("--shard-mb", type=int, default=1024)
+    args = parser.parse_args()
+
+    t0 = time.perf_counter()
+    n_items, n_shards = pack(args.images, args.labels, args.out, args.shard_mb << 20)
+    print(f"Packed {n_items} images into {n_shards} shard(s) in "
+          f"{time.perf_counter() - t0:.1f}s -> '{args.out}'")
+
+
+if __name__ == "__main__":
+    main()
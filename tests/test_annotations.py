@@ -0,0 +1,53 @@
+import numpy as np
+import pytest
+
+from annotations import (
+    build_class_map, default_labels_dir, load_class_map, parse_voc, parse_yolo_boxes,
+    save_class_map, scan_class_names, xyxy_to_yolo, yolo_lines,
+)
+from voc import write_item
+
+
+def test_xyxy_to_yolo():
+    assert xyxy_to_yolo(10, 20, 50, 60, 200, 100) == pytest.approx((0.15, 0.4, 0.2, 0.4))
+
+
+def test_class_map_is_sorted_and_round_trips(tmp_path):
+    class_map = build_class_map({"spur", "open", "short"})
+    assert class_map == {"open": 0, "short": 1, "spur": 2}
+    path = str(tmp_path / "classes.txt")
+    save_class_map(class_map, path)
+    assert load_class_map(path) == class_map
+
+
+def test_parse_voc_reads_size_from_image_when_missing(tmp_path):
+    objects = [("short", 10, 20, 50, 60), ("spur", 0, 0, 200, 100)]
+    write_item(tmp_path, "a", objects, with_size=False)
+    xml = str(tmp_path / "annotations" / "a.xml")
+    name, w, h, parsed = parse_voc(xml, str(tmp_path / "images"))
+    assert (name, w, h) == ("a.jpg", 200, 100)
+    assert parsed == [(n, float(x1), float(y1), float(x2), float(y2)) for n, x1, y1, x2, y2 in objects]
+    assert scan_class_names(xml) == {"short", "spur"}
+
+
+def test_yolo_lines_skip_unknown_classes():
+    lines, unknown = yolo_lines([("short", 10, 20, 50, 60), ("mystery", 0, 0, 1, 1)],
+                                200, 100, {"short": 3})
+    assert lines == ["3 0.150000 0.400000 0.200000 0.400000"]
+    assert unknown == {"mystery"}
+
+
+def test_parse_yolo_boxes_inverts_yolo_lines():
+    objects = [("a", 10, 20, 50, 60), ("b", 0.5, 1.5, 199, 99)]
+    lines, _ = yolo_lines(objects, 200, 100, {"a": 0, "b": 1})
+    cls, xyxy = parse_yolo_boxes("\n".join(lines), 200, 100)
+    assert cls.tolist() == [0, 1]
+    np.testing.assert_allclose(xyxy, [o[1:] for o in objects], atol=1e-3)
+    cls, xyxy = parse_yolo_boxes("", 200, 100)
+    assert cls.shape == (0,) and xyxy.shape == (0, 4)
+
+
+def test_default_labels_dir():
+    assert default_labels_dir("dataset/images/val") == "dataset/labels/val"
+    assert default_labels_dir("images/images/val") == "images/labels/val"
+    assert default_labels_dir("scans") == "scans"
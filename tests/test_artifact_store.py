@@ -0,0 +1,43 @@
+import os
+import time
+
+import pytest
+
+import artifact_store
+from artifact_store import ArtifactStore, _MemoryLRU
+
+
+@pytest.fixture(autouse=True)
+def sweep_now(monkeypatch):
+    monkeypatch.setattr(artifact_store, "_last_sweep", 0.0)
+
+
+def test_put_get_and_dedup(tmp_path):
+    store = ArtifactStore(str(tmp_path), "session")
+    ref = store.put(b"png bytes")
+    assert store.put(bytearray(b"png bytes")) == ref
+    assert ref in store and store.get(ref) == b"png bytes"
+    assert os.listdir(store.dir) == [ref]
+
+
+def test_expired_sessions_are_swept(tmp_path):
+    old = ArtifactStore(str(tmp_path), "old", ttl=60)
+    ref = old.put(b"stale")
+    past = time.time() - 3600
+    os.utime(old.dir, (past, past))
+    artifact_store._last_sweep = 0.0
+    ArtifactStore(str(tmp_path), "new", ttl=60)
+    assert not os.path.exists(old.dir)
+    with pytest.raises(FileNotFoundError):
+        old.get(ref)  # the memory copy is dropped with the directory
+
+
+def test_memory_lru_keeps_within_budget():
+    lru = _MemoryLRU(10)
+    lru.put("a", b"12345")
+    lru.put("b", b"12345")
+    lru.get("a")  # b is now the oldest
+    lru.put("c", b"12345")
+    assert lru.get("b") is None and lru.get("a") == b"12345"
+    lru.put("big", b"x" * 11)
+    assert lru.get("big") is None and lru.size == 10
@@ -0,0 +1,27 @@
+import numpy as np
+import pytest
+
+pytest.importorskip("cv2")
+
+from engine.codec import decode_image, encode_jpeg, encode_png, to_base64  # noqa: E402
+
+
+def test_png_round_trip_is_lossless():
+    img = np.random.default_rng(0).integers(0, 256, (24, 32, 3), dtype=np.uint8)
+    np.testing.assert_array_equal(decode_image(memoryview(encode_png(img))), img)
+
+
+def test_jpeg_decodes_to_bgr_of_the_same_size():
+    img = np.zeros((24, 32, 3), dtype=np.uint8)
+    img[..., 2] = 255  # red in BGR
+    out = decode_image(encode_jpeg(img, quality=95))
+    assert out.shape == img.shape and out[..., 2].mean() > 200 and out[..., 0].mean() < 50
+
+
+def test_undecodable_bytes_raise_value_error():
+    with pytest.raises(ValueError):
+        decode_image(b"not an image")
+
+
+def test_to_base64():
+    assert to_base64(b"\x89PNG") == "iVBORw=="
@@ -0,0 +1,61 @@
+import random
+
+from engine.dedup import DEFAULT_CAPACITY, HASH_BITS, NearDuplicateIndex, hamming
+
+
+def flip_bits(h, n, rng):
+    for bit in rng.sample(range(HASH_BITS), n):
+        h ^= 1 << bit
+    return h
+
+
+def test_lookup_matches_brute_force():
+    rng = random.Random(0)
+    index = NearDuplicateIndex(max_distance=4, capacity=10_000, ttl=1e9)
+    stored = [rng.getrandbits(HASH_BITS) for _ in range(500)]
+    for i, h in enumerate(stored):
+        index.add(h, i)
+
+    queries = [flip_bits(rng.choice(stored), rng.randint(0, 6), rng) for _ in range(300)]
+    queries += [rng.getrandbits(HASH_BITS) for _ in range(100)]
+    for q in queries:
+        best = min(hamming(q, h) for h in stored)
+        hit = index.lookup(q)
+        if best <= 4:
+            assert hit is not None and hit[1] == best
+        else:
+            assert hit is None
+
+
+def test_capacity_evicts_least_recently_used():
+    index = NearDuplicateIndex(max_distance=0, capacity=2, ttl=1e9)
+    index.add(1, "a")
+    index.add(2, "b")
+    index.lookup(1)
+    index.add(3, "c")
+    assert len(index) == 2
+    assert index.lookup(2) is None
+    assert index.lookup(1) == ("a", 0)
+
+
+def test_reuse_is_on_by_default_and_can_be_turned_off(monkeypatch):
+    monkeypatch.delenv("DEDUP_CAPACITY", raising=False)
+    assert NearDuplicateIndex.from_env().capacity == DEFAULT_CAPACITY > 0
+    monkeypatch.setenv("DEDUP_CAPACITY", "16")
+    assert NearDuplicateIndex.from_env().capacity == 16
+    monkeypatch.setenv("DEDUP_CAPACITY", "0")
+    assert NearDuplicateIndex.from_env() is None
+
+
+def test_dhash_survives_recompression():
+    import io
+
+    from PIL import Image
+
+    from engine.dedup import dhash
+
+    board = Image.linear_gradient("L").resize((320, 240)).convert("RGB")
+    buffer = io.BytesIO()
+    board.save(buffer, format="JPEG", quality=40)
+    recompressed = Image.open(io.BytesIO(buffer.getvalue()))
+    assert hamming(dhash(board), dhash(recompressed)) <= 4
@@ -0,0 +1,134 @@
+import numpy as np
+import pytest
+
+from detection_metrics import IOU_THRESHOLDS, ap_per_class, box_iou, compute_ap, match_predictions
+
+
+def random_boxes(rng, n, size=100):
+    xy = rng.uniform(0, size, (n, 2))
+    wh = rng.uniform(5, 30, (n, 2))
+    return np.concatenate([xy, xy + wh], axis=1)
+
+
+def ref_iou(a, b):
+    iw = max(0.0, min(a[2], b[2]) - max(a[0], b[0]))
+    ih = max(0.0, min(a[3], b[3]) - max(a[1], b[1]))
+    inter = iw * ih
+    union = (a[2] - a[0]) * (a[3] - a[1]) + (b[2] - b[0]) * (b[3] - b[1]) - inter
+    return inter / union
+
+
+def ref_match(pred_boxes, pred_cls, gt_boxes, gt_cls):
+    """Per threshold: each prediction takes its best label, then each label its best prediction."""
+    tp = np.zeros((len(pred_boxes), len(IOU_THRESHOLDS)), dtype=bool)
+    for j, t in enumerate(IOU_THRESHOLDS):
+        pairs = [(ref_iou(g, p), gi, pi)
+                 for gi, g in enumerate(gt_boxes) for pi, p in enumerate(pred_boxes)
+                 if gt_cls[gi] == pred_cls[pi] and ref_iou(g, p) >= t]
+        pairs.sort(key=lambda x: -x[0])
+        best_for_pred = {}
+        for iou, gi, pi in pairs:
+            best_for_pred.setdefault(pi, (iou, gi))
+        used_gt = set()
+        for pi, (iou, gi) in sorted(best_for_pred.items(), key=lambda kv: -kv[1][0]):
+            if gi not in used_gt:
+                used_gt.add(gi)
+                tp[pi, j] = True
+    return tp
+
+
+def ref_ap(recall, precision):
+    """101-point AP from the precision envelope, with plain loops."""
+    mrec = [0.0] + list(recall) + [1.0]
+    mpre = [1.0] + list(precision) + [0.0]
+    for i in range(len(mpre) - 2, -1, -1):
+        mpre[i] = max(mpre[i], mpre[i + 1])
+    xs = [i / 100 for i in range(101)]
+    ys = []
+    for x in xs:
+        k = max(i for i in range(len(mrec)) if mrec[i] <= x)
+        if k == len(mrec) - 1 or mrec[k + 1] == mrec[k]:
+            ys.append(mpre[k] if k == len(mrec) - 1 or x < mrec[k + 1] else mpre[k + 1])
+        else:
+            ys.append(mpre[k] + (mpre[k + 1] - mpre[k]) * (x - mrec[k]) / (mrec[k + 1] - mrec[k]))
+    return sum((xs[i + 1] - xs[i]) * (ys[i] + ys[i + 1]) / 2 for i in range(100))
+
+
+def test_box_iou_matches_reference():
+    rng = np.random.default_rng(0)
+    a, b = random_boxes(rng, 7), random_boxes(rng, 9)
+    expected = [[ref_iou(x, y) for y in b] for x in a]
+    np.testing.assert_allclose(box_iou(a, b), expected, atol=1e-9)
+
+
+def test_match_predictions_matches_reference():
+    rng = np.random.default_rng(1)
+    for _ in range(200):
+        gt = random_boxes(rng, rng.integers(0, 6))
+        # predictions near the labels plus some noise boxes
+        near = gt[rng.integers(0, len(gt), rng.integers(0, 8))] + rng.normal(0, 3, (1, 4)) if len(gt) else gt
+        pred = np.concatenate([near.reshape(-1, 4), random_boxes(rng, rng.integers(0, 3))])
+        gt_cls = rng.integers(0, 2, len(gt))
+        pred_cls = rng.integers(0, 2, len(pred))
+        np.testing.assert_array_equal(match_predictions(pred, pred_cls, gt, gt_cls),
+                                      ref_match(pred, pred_cls, gt, gt_cls))
+
+
+def test_match_one_prediction_per_label():
+    gt = np.array([[0, 0, 10, 10]], dtype=float)
+    pred = np.array([[0, 0, 10, 10], [0, 0, 10, 9.5]], dtype=float)
+    tp = match_predictions(pred, np.array([0, 0]), gt, np.array([0]))
+    assert tp[0].all() and not tp[1].any()
+    # class must agree
+    assert not match_predictions(pred[:1], np.array([1]), gt, np.array([0])).any()
+
+
+def test_compute_ap_matches_reference():
+    rng = np.random.default_rng(2)
+    for _ in range(50):
+        hits = rng.random(rng.integers(1, 30)) < 0.6
+        n_gt = hits.sum() + rng.integers(0, 5)
+        tpc = np.cumsum(hits)
+        recall = tpc / max(n_gt, 1)
+        precision = tpc / np.arange(1, len(hits) + 1)
+        assert compute_ap(recall, precision) == pytest.approx(ref_ap(recall, precision), abs=1e-9)
+
+
+def test_ap_per_class_simple_cases():
+    # class 0: 2 labels, both found with the highest scores -> AP 1
+    # class 1: 2 labels, one found after a false positive -> AP well below 1
+    tp = np.array([[1], [1], [0], [1]], dtype=bool).repeat(10, axis=1)
+    conf = np.array([0.9, 0.8, 0.7, 0.6])
+    pred_cls = np.array([0, 0, 1, 1])
+    target_cls = np.array([0, 0, 1, 1])
+    ap, p, r, n_gt, _ = ap_per_class(tp, conf, pred_cls, target_cls, n_classes=3)
+    assert n_gt.tolist() == [2, 2, 0]
+    assert ap[0] == pytest.approx(np.full(10, 0.995))  # the 101-point ceiling, as in ultralytics
+    assert ap[1, 0] == pytest.approx(ref_ap([0, 0.5], [0, 0.5]))
+    assert ap[2].sum() == 0  # no labels: no AP
+    assert r[0] == pytest.approx(1.0) and p[0] == pytest.approx(1.0)
+
+
+def test_ap_per_class_matches_per_class_reference():
+    rng = np.random.default_rng(3)
+    n_pred, n_classes = 300, 4
+    tp = rng.random((n_pred, 10)) < np.linspace(0.8, 0.2, 10)
+    conf = rng.random(n_pred)
+    pred_cls = rng.integers(0, n_classes, n_pred)
+    target_cls = rng.integers(0, n_classes, 600)  # more labels than true positives: recall <= 1
+    ap, *_ = ap_per_class(tp, conf, pred_cls, target_cls, n_classes)
+    for c in range(n_classes):
+        order = np.argsort(-conf[pred_cls == c], kind="stable")
+        tpc = tp[pred_cls == c][order]
+        n_gt = (target_cls == c).sum()
+        for j in range(10):
+            hits = np.cumsum(tpc[:, j])
+            expected = ref_ap(hits / n_gt, hits / np.arange(1, len(hits) + 1))
+            assert ap[c, j] == pytest.approx(expected, abs=1e-9)
+
+
+def test_ap_per_class_grows_for_label_classes_the_model_lacks():
+    tp = np.ones((1, 10), dtype=bool)
+    ap, p, r, n_gt, _ = ap_per_class(tp, np.array([0.9]), np.array([0]), np.array([0, 5]), n_classes=2)
+    assert ap.shape == (6, 10) and n_gt.tolist() == [1, 0, 0, 0, 0, 1]
+    assert ap[5].sum() == 0 and r[5] == 0
@@ -0,0 +1,52 @@
+import numpy as np
+
+from embedding_cache import EmbeddingCache
+
+SHAPE = (4, 8, 8)
+SLOT_MB = np.prod(SHAPE) * 4 / (1 << 20)
+
+
+def embedding(value):
+    return np.full(SHAPE, value, dtype=np.float32)
+
+
+def test_round_trip_and_persistence(tmp_path):
+    with EmbeddingCache(str(tmp_path), "fp", capacity_mb=1, shape=SHAPE) as cache:
+        key = cache.key(b"image bytes")
+        assert cache.get(key) is None
+        cache.put(key, embedding(1.5), (480, 640), (768, 1024))
+    with EmbeddingCache(str(tmp_path), "fp", capacity_mb=1, shape=SHAPE) as cache:
+        emb, original, input_size = cache.get(key)
+        np.testing.assert_array_equal(emb, embedding(1.5))
+        assert original == (480, 640) and input_size == (768, 1024)
+        assert all(type(v) is int for v in original + input_size)
+        assert (cache.hits, cache.misses) == (1, 0)
+
+
+def test_keys_depend_on_the_checkpoint(tmp_path):
+    a = EmbeddingCache(str(tmp_path / "a"), "vit_b:one", capacity_mb=1, shape=SHAPE)
+    b = EmbeddingCache(str(tmp_path / "b"), "vit_b:two", capacity_mb=1, shape=SHAPE)
+    assert a.key(b"same image") != b.key(b"same image")
+    assert a.key(b"same image") == a.key(bytearray(b"same image"))
+
+
+def test_least_recently_used_slot_is_reused(tmp_path):
+    n_slots = int(1 / SLOT_MB)
+    with EmbeddingCache(str(tmp_path), "fp", capacity_mb=1, shape=SHAPE) as cache:
+        keys = [cache.key(str(i).encode()) for i in range(n_slots + 1)]
+        for i, key in enumerate(keys[:n_slots]):
+            cache.put(key, embedding(i), (1, 1), (1, 1))
+        cache.get(keys[0])  # keys[1] is now the oldest
+        cache.put(keys[-1], embedding(-1), (1, 1), (1, 1))
+        assert len(cache) == n_slots
+        assert cache.get(keys[1]) is None
+        np.testing.assert_array_equal(cache.get(keys[0])[0], embedding(0))
+        np.testing.assert_array_equal(cache.get(keys[-1])[0], embedding(-1))
+
+
+def test_capacity_change_starts_over(tmp_path):
+    with EmbeddingCache(str(tmp_path), "fp", capacity_mb=1, shape=SHAPE) as cache:
+        key = cache.key(b"x")
+        cache.put(key, embedding(1), (1, 1), (1, 1))
+    with EmbeddingCache(str(tmp_path), "fp", capacity_mb=2, shape=SHAPE) as cache:
+        assert len(cache) == 0 and cache.get(key) is None
@@ -0,0 +1,48 @@
+import sys
+
+import pytest
+
+pytest.importorskip("cv2")
+pytest.importorskip("ultralytics")
+
+import evaluate  # noqa: E402
+
+
+class FakeEngine:
+    names = {0: "short"}
+
+    def __init__(self, *args, **kwargs):
+        pass
+
+    def predict(self, images):
+        return [[] for _ in images]
+
+
+def test_no_decodable_image_exits_with_a_message(tmp_path, monkeypatch):
+    images = tmp_path / "images" / "val"
+    images.mkdir(parents=True)
+    (images / "broken.jpg").write_bytes(b"not an image")
+    monkeypatch.setattr(evaluate, "InferenceEngine", FakeEngine)
+    monkeypatch.setattr(sys, "argv", ["evaluate.py", "--images", str(images)])
+    with pytest.raises(SystemExit, match="could be decoded"):
+        evaluate.main()
+
+
+def test_label_classes_unknown_to_the_model_are_reported(tmp_path, monkeypatch, capsys):
+    import json
+
+    from PIL import Image
+
+    images = tmp_path / "images" / "val"
+    labels = tmp_path / "labels" / "val"
+    images.mkdir(parents=True)
+    labels.mkdir(parents=True)
+    Image.new("RGB", (32, 32)).save(images / "board.png")
+    (labels / "board.txt").write_text("0 0.5 0.5 0.2 0.2\n7 0.3 0.3 0.1 0.1\n")
+    out = tmp_path / "metrics.json"
+    monkeypatch.setattr(evaluate, "InferenceEngine", FakeEngine)
+    monkeypatch.setattr(sys, "argv", ["evaluate.py", "--images", str(images), "--json", str(out)])
+    evaluate.main()
+    assert "class ids [7]" in capsys.readouterr().out
+    per_class = json.loads(out.read_text())["per_class"]
+    assert set(per_class) == {"short", "class_7"} and per_class["class_7"]["instances"] == 1
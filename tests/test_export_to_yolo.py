@@ -0,0 +1,78 @@
+import json
+import sys
+import tracemalloc
+
+import pytest
+
+import export_to_yolo
+from export_to_yolo import LabelWriter, iter_cvat, scan_cvat_labels
+
+
+def write_cvat(path, n_images, boxes_per_image=2):
+    with open(path, "w") as f:
+        f.write('<?xml version="1.0"?>\n<annotations><version>1.1</version>\n')
+        for i in range(n_images):
+            f.write(f'<image id="{i}" name="sub/img{i}.jpg" width="200" height="100">')
+            for j in range(boxes_per_image):
+                label = ("short", "open", "spur")[(i + j) % 3]
+                f.write(f'<box label="{label}" xtl="10" ytl="20" xbr="50" ybr="60" occluded="0"/>')
+            f.write("</image>\n")
+        f.write("</annotations>\n")
+
+
+def test_iter_cvat(tmp_path):
+    path = str(tmp_path / "export.xml")
+    write_cvat(path, 3)
+    items = list(iter_cvat(path))
+    assert [(n, w, h) for n, w, h, _ in items] == [("img0.jpg", 200, 100), ("img1.jpg", 200, 100),
+                                                   ("img2.jpg", 200, 100)]
+    assert items[1][3] == [("open", 10.0, 20.0, 50.0, 60.0), ("spur", 10.0, 20.0, 50.0, 60.0)]
+    assert scan_cvat_labels(path) == {"short", "open", "spur"}
+
+
+@pytest.mark.parametrize("scan", [scan_cvat_labels, lambda p: sum(1 for _ in iter_cvat(p))])
+def test_cvat_passes_stream(tmp_path, scan):
+    small, large = str(tmp_path / "small.xml"), str(tmp_path / "large.xml")
+    write_cvat(small, 250)
+    write_cvat(large, 10_000)
+
+    def peak(path):
+        tracemalloc.start()
+        scan(path)
+        result = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        return result
+    # 40x the images must not mean more memory (unbounded growth is ~100 bytes/image)
+    assert peak(large) < 2 * peak(small)
+
+
+def test_label_writer_reopens_evicted_files(tmp_path):
+    writer = LabelWriter(str(tmp_path), max_open=2)
+    writer.write("a.jpg", ["0 0.5 0.5 0.1 0.1"])
+    writer.write("b.jpg", ["1 0.5 0.5 0.1 0.1"])
+    writer.write("c.jpg", [])
+    writer.write("a.jpg", ["2 0.5 0.5 0.1 0.1"])  # evicted, reopened for append
+    writer.close()
+    assert (tmp_path / "a.txt").read_text() == "0 0.5 0.5 0.1 0.1\n2 0.5 0.5 0.1 0.1"
+    assert (tmp_path / "c.txt").read_text() == ""
+
+
+def test_coco_export(tmp_path, monkeypatch):
+    pytest.importorskip("ijson")
+    export = {
+        "images": [{"id": 1, "file_name": "x/a.jpg", "width": 200, "height": 100},
+                   {"id": 2, "file_name": "b.png", "width": 100, "height": 100}],
+        "categories": [{"id": 7, "name": "spur"}, {"id": 3, "name": "open"}],
+        "annotations": [{"id": 1, "image_id": 1, "category_id": 7, "bbox": [10, 20, 40, 40]},
+                        {"id": 2, "image_id": 1, "category_id": 3, "bbox": [0, 0, 200, 100]}],
+    }
+    path = tmp_path / "instances.json"
+    path.write_text(json.dumps(export))
+    labels = tmp_path / "labels"
+    monkeypatch.setattr(sys, "argv", ["export_to_yolo.py", str(path), "--labels", str(labels),
+                                      "--classes", str(tmp_path / "classes.txt")])
+    export_to_yolo.main()
+    assert (tmp_path / "classes.txt").read_text() == "open\nspur\n"
+    assert (labels / "a.txt").read_text() == ("1 0.150000 0.400000 0.200000 0.400000\n"
+                                              "0 0.500000 0.500000 1.000000 1.000000")
+    assert (labels / "b.txt").read_text() == ""
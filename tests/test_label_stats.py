@@ -0,0 +1,52 @@
+import os
+
+import numpy as np
+import pytest
+
+from label_stats import CACHE_NAME, compute_stats, load_index
+
+
+def write_labels(root, rows_per_file):
+    for name, rows in rows_per_file.items():
+        path = root / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text("\n".join(" ".join(map(str, r)) for r in rows))
+
+
+def test_index_matches_files_and_cache_tracks_changes(tmp_path):
+    write_labels(tmp_path, {
+        "a.txt": [(0, 0.5, 0.5, 0.1, 0.2), (1, 0.2, 0.3, 0.05, 0.05)],
+        "sub/b.txt": [(1, 0.5, 0.5, 0.5, 0.25)],
+        "c.txt": [],
+    })
+    files, cols = load_index(str(tmp_path))
+    assert [f[0] for f in files] == ["a.txt", "c.txt", os.path.join("sub", "b.txt")]
+    assert cols["image"].tolist() == [0, 0, 2]
+    assert cols["cls"].tolist() == [0, 1, 1]
+    assert os.path.exists(tmp_path / CACHE_NAME)
+
+    write_labels(tmp_path, {"c.txt": [(2, 0.5, 0.5, 1.0, 1.0)]})
+    os.utime(tmp_path / "c.txt", ns=(1, 1))
+    _, cols = load_index(str(tmp_path))
+    assert cols["cls"].tolist() == [0, 1, 2, 1]
+
+
+def test_stats_match_per_box_computation(tmp_path):
+    rng = np.random.default_rng(0)
+    rows = {f"{i}.txt": [(int(rng.integers(3)), 0.5, 0.5, *rng.uniform(0.01, 0.5, 2).round(4))
+                         for _ in range(rng.integers(0, 6))] for i in range(40)}
+    write_labels(tmp_path, rows)
+    files, cols = load_index(str(tmp_path))
+    stats = compute_stats(files, cols, ["open", "short", "spur"], imgsz=640)
+
+    boxes = [r for rs in rows.values() for r in rs]
+    assert stats["images"] == 40 and stats["boxes"] == len(boxes)
+    assert stats["boxes_per_image"]["empty_images"] == sum(not rs for rs in rows.values())
+    for c, name in enumerate(["open", "short", "spur"]):
+        mine = [b for b in boxes if b[0] == c]
+        assert stats["classes"][name]["boxes"] == len(mine)
+        assert stats["classes"][name]["images_with_class"] == sum(
+            any(b[0] == c for b in rs) for rs in rows.values())
+        scales = [np.sqrt(w * h) * 640 for _, _, _, w, h in mine]
+        median = stats["classes"][name]["scale_px_percentiles"]["50"]
+        assert median == pytest.approx(np.percentile(scales, 50), abs=1e-2)
@@ -0,0 +1,66 @@
+import pytest
+
+from manifest import CompletedManifest, ContentManifest, in_shard, parse_shard
+
+
+def test_parse_shard():
+    assert parse_shard("2/4") == (2, 4)
+    for bad in ("4/4", "-1/2", "1", "a/b"):
+        with pytest.raises(ValueError):
+            parse_shard(bad)
+
+
+def test_shards_partition_keys():
+    keys = [f"dir{i % 7}/img_{i:05d}.jpg" for i in range(2000)]
+    for count in (1, 3, 8):
+        owners = [[i for i in range(count) if in_shard(k, i, count)] for k in keys]
+        assert all(len(o) == 1 for o in owners)
+        # every shard gets a reasonable share
+        sizes = [sum(o == [i] for o in owners) for i in range(count)]
+        assert min(sizes) > len(keys) / count / 2
+
+
+def test_record_and_resume(tmp_path):
+    out = str(tmp_path)
+    CompletedManifest(out, "0of2").record("part-0of2-00000.jsonl", [("a.jpg", 10, 1), ("b.jpg", 20, 2)])
+    CompletedManifest(out, "1of2").record("part-1of2-00000.jsonl", [("c.jpg", 30, 3)])
+    assert CompletedManifest.load_all(out) == {
+        ("a.jpg", 10, 1): "part-0of2-00000.jsonl",
+        ("b.jpg", 20, 2): "part-0of2-00000.jsonl",
+        ("c.jpg", 30, 3): "part-1of2-00000.jsonl",
+    }
+
+
+def test_torn_last_line_is_ignored_and_not_extended(tmp_path):
+    out = str(tmp_path)
+    manifest = CompletedManifest(out, "w")
+    manifest.record("part-w-00000.jsonl", [("a.jpg", 1, 1)])
+    with open(manifest.path, "a") as f:
+        f.write('{"key": "b.jpg", "si')  # crash mid-write
+    manifest.record("part-w-00001.jsonl", [("c.jpg", 3, 3)])
+    assert set(CompletedManifest.load_all(out)) == {("a.jpg", 1, 1), ("c.jpg", 3, 3)}
+
+
+def test_changed_input_supersedes_older_record(tmp_path):
+    out = str(tmp_path)
+    manifest = CompletedManifest(out, "w")
+    manifest.record("part-w-00000.jsonl", [("a.jpg", 1, 1), ("b.jpg", 2, 2)])
+    manifest.record("part-w-00001.jsonl", [("a.jpg", 5, 9)])   # a.jpg changed
+    manifest.record(None, [("b.jpg", 7, 9)])                   # b.jpg now unreadable
+    assert CompletedManifest.current(out) == {"a.jpg": "part-w-00001.jsonl", "b.jpg": None}
+    done = CompletedManifest.load_all(out)
+    assert done[("b.jpg", 7, 9)] is None  # failure is recorded, so not retried
+
+
+def test_content_manifest_diff_and_params(tmp_path):
+    path = str(tmp_path / "manifest.json")
+    m = ContentManifest(path, params={"classes": ["a"]})
+    m.entries = {"x": {"sig": [1, 1]}, "y": {"sig": [2, 2]}}
+    m.save()
+
+    m = ContentManifest(path, params={"classes": ["a"]})
+    assert m.diff({"x": (1, 1), "y": (2, 3), "z": (0, 0)}) == (["z"], ["y"], [])
+    assert m.diff({"x": (1, 1)}) == ([], [], ["y"])
+
+    m = ContentManifest(path, params={"classes": ["a", "b"]})
+    assert m.diff({"x": (1, 1), "y": (2, 2)}) == ([], ["x", "y"], [])
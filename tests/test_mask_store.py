@@ -0,0 +1,61 @@
+import numpy as np
+import pytest
+
+from mask_store import MaskArchive, archive_path, rle_decode, rle_encode, rle_to_coco, save_masks
+
+
+def reference_rle(mask):
+    """Column-major run lengths starting with zeros, one pixel at a time."""
+    counts, current, run = [], False, 0
+    for value in np.asarray(mask, dtype=bool).ravel(order="F"):
+        if value != current:
+            counts.append(run)
+            current, run = value, 0
+        run += 1
+    counts.append(run)
+    return counts
+
+
+@pytest.mark.parametrize("shape", [(1, 1), (3, 5), (17, 9), (64, 48)])
+def test_rle_round_trip_matches_reference(shape):
+    rng = np.random.default_rng(shape[0] * 100 + shape[1])
+    masks = [np.zeros(shape, bool), np.ones(shape, bool), rng.random(shape) < 0.5]
+    blob = np.zeros(shape, bool)
+    blob[shape[0] // 4:shape[0] // 2 + 1, shape[1] // 3:] = True
+    masks.append(blob)
+    for mask in masks:
+        counts = rle_encode(mask)
+        assert counts.dtype == np.uint32
+        assert counts.tolist() == reference_rle(mask)
+        np.testing.assert_array_equal(rle_decode(counts, shape), mask)
+
+
+def test_coco_rle_format():
+    mask = np.array([[0, 1], [1, 1]], dtype=bool)
+    # column-major: 0, 1, 1, 1 -> one zero, three ones
+    assert rle_to_coco(rle_encode(mask), mask.shape) == {"size": [2, 2], "counts": [1, 3]}
+
+
+def test_archive_round_trip(tmp_path):
+    rng = np.random.default_rng(0)
+    shape = (40, 30, 3)
+    masks = [rng.random(shape[:2]) < p for p in (0.0, 0.1, 0.5, 1.0)]
+    path = archive_path(str(tmp_path), "board_01.jpg")
+    assert path.endswith("board_01.masks.npz")
+    save_masks(masks, path, shape)
+
+    archive = MaskArchive(path)
+    assert len(archive) == 4 and archive.shape == shape[:2]
+    assert archive.areas.tolist() == [int(m.sum()) for m in masks]
+    for expected, got in zip(masks, archive):
+        np.testing.assert_array_equal(got, expected)
+    assert archive.to_coco(2)["counts"] == reference_rle(masks[2])
+    with pytest.raises(IndexError):
+        archive[4]
+
+
+def test_empty_archive(tmp_path):
+    path = archive_path(str(tmp_path), "clean.png")
+    save_masks([], path, (10, 10, 3))
+    archive = MaskArchive(path)
+    assert len(archive) == 0 and list(archive) == []
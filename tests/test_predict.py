@@ -0,0 +1,79 @@
+import json
+
+import pytest
+
+pytest.importorskip("cv2")
+pytest.importorskip("ultralytics")
+
+from manifest import CompletedManifest  # noqa: E402
+from predict import read_predictions, records_to_rows  # noqa: E402
+
+
+def write_chunk(out, name, records):
+    with open(out / name, "w") as f:
+        f.writelines(json.dumps(r) + "\n" for r in records)
+
+
+def test_read_predictions_skips_superseded_and_failed(tmp_path):
+    manifest = CompletedManifest(str(tmp_path), "0of1")
+    write_chunk(tmp_path, "part-0of1-00000.jsonl", [
+        {"image": "d/a.jpg", "key": "a.jpg", "width": 4, "height": 4, "detections": []},
+        {"image": "d/b.jpg", "key": "b.jpg", "width": 4, "height": 4, "detections": []},
+        {"image": "d/c.jpg", "key": "c.jpg", "width": 4, "height": 4, "detections": []},
+    ])
+    manifest.record("part-0of1-00000.jsonl", [("a.jpg", 1, 1), ("b.jpg", 1, 1), ("c.jpg", 1, 1)])
+    write_chunk(tmp_path, "part-0of1-00001.jsonl", [
+        {"image": "d/a.jpg", "key": "a.jpg", "width": 8, "height": 8, "detections": []},
+    ])
+    manifest.record("part-0of1-00001.jsonl", [("a.jpg", 2, 2)])
+    manifest.record(None, [("c.jpg", 3, 3)])
+
+    records = sorted(read_predictions(str(tmp_path)), key=lambda r: r["key"])
+    assert [(r["key"], r["width"]) for r in records] == [("a.jpg", 8), ("b.jpg", 4)]
+
+
+def test_records_to_rows_keeps_images_without_detections():
+    rows = records_to_rows([
+        {"image": "a.jpg", "key": "a.jpg", "width": 4, "height": 4, "detections": []},
+        {"image": "b.jpg", "key": "b.jpg", "width": 4, "height": 4, "detections": [
+            {"class_id": 1, "type": "short", "confidence": 0.5, "bbox": [0, 0, 1, 1]},
+            {"class_id": 2, "type": "spur", "confidence": 0.7, "bbox": [1, 1, 2, 2]},
+        ]},
+    ])
+    assert [(r["key"], r["type"]) for r in rows] == [("a.jpg", None), ("b.jpg", "short"), ("b.jpg", "spur")]
+
+
+def test_annotated_images_mirror_the_input_layout(tmp_path, monkeypatch):
+    import argparse
+
+    from PIL import Image
+
+    import predict
+
+    class FakeEngine:
+        names = {0: "short"}
+
+        def __init__(self, *args, **kwargs):
+            pass
+
+        def predict(self, images):
+            return [[] for _ in images]
+
+    for sub in ("a", "b"):
+        (tmp_path / "in" / sub).mkdir(parents=True)
+        Image.new("RGB", (8, 8)).save(tmp_path / "in" / sub / "img1.png")
+    written = []
+    monkeypatch.setattr(predict, "InferenceEngine", FakeEngine)
+    monkeypatch.setattr(predict, "save_annotated",
+                        lambda image, dets, names, key, out_dir: written.append(
+                            predict.annotated_path(out_dir, key)))
+    args = argparse.Namespace(shard=(0, 1), out=str(tmp_path / "out"), format="jsonl",
+                              chunk_size=10, batch_size=2, imgsz=64, conf=0.25, iou=0.7,
+                              model="best.pt", workers=2, save_annotated=str(tmp_path / "ann"))
+    with predict.open_source(str(tmp_path / "in" / "**" / "*.png")) as (inputs, signature, load):
+        predict.run(args, inputs, signature, load)
+
+    keys = sorted(r["key"] for r in read_predictions(args.out))
+    assert keys == ["a/img1.png", "b/img1.png"]
+    assert sorted(written) == [predict.annotated_path(args.save_annotated, k) for k in keys]
+    assert len(set(written)) == 2
@@ -0,0 +1,119 @@
+import sys
+import threading
+
+import numpy as np
+import pytest
+from PIL import Image
+
+pytest.importorskip("cv2")
+pytest.importorskip("torch")
+pytest.importorskip("segment_anything")
+
+import sam_integration  # noqa: E402
+from manifest import CompletedManifest  # noqa: E402
+from mask_store import MaskArchive  # noqa: E402
+
+
+class FakePredictor:
+    def __init__(self, sam, cache=None, times=None):
+        pass
+
+    def use(self, key, shape):
+        pass
+
+
+class FakeGenerator:
+    def __init__(self, sam):
+        pass
+
+    def generate(self, image):
+        return [{"segmentation": np.ones(image.shape[:2], dtype=bool)}] * 2
+
+
+def fake_box_masks(predictor, image_rgb, boxes):
+    return [np.zeros(image_rgb.shape[:2], dtype=bool)]
+
+
+@pytest.fixture
+def dataset(tmp_path, monkeypatch):
+    images = tmp_path / "images"
+    images.mkdir()
+    for name in ("a.png", "b.png"):
+        Image.new("RGB", (16, 12)).save(images / name)
+    monkeypatch.setattr(sam_integration, "load_sam", lambda *args: object())
+    monkeypatch.setattr(sam_integration, "CachedSamPredictor", FakePredictor)
+    monkeypatch.setattr(sam_integration, "SamAutomaticMaskGenerator", FakeGenerator)
+    monkeypatch.setattr(sam_integration, "box_masks", fake_box_masks)
+    return images, tmp_path / "masks"
+
+
+def run(monkeypatch, images, output, *args):
+    monkeypatch.setattr(sys, "argv", ["sam_integration.py", "--images", str(images),
+                                      "--output", str(output), "--embedding-cache-mb", "0", *args])
+    sam_integration.main()
+
+
+def test_both_modes_share_an_output_directory(dataset, monkeypatch):
+    images, output = dataset
+    run(monkeypatch, images, output, "--mode", "auto")
+    assert sam_integration.images_to_process(str(images), str(output), "auto", "npz")[1] == []
+    # a finished auto run must not make box mode (or another format) look done
+    assert len(sam_integration.images_to_process(str(images), str(output), "boxes", "npz")[1]) == 2
+    assert len(sam_integration.images_to_process(str(images), str(output), "auto", "png")[1]) == 2
+
+    run(monkeypatch, images, output, "--mode", "boxes")
+    assert sam_integration.images_to_process(str(images), str(output), "boxes", "npz")[1] == []
+    assert len(MaskArchive(str(output / "a.masks.npz"))) == 2
+    assert len(MaskArchive(str(output / "a.boxes.masks.npz"))) == 1
+    chunks = {key: chunk for (key, *_), chunk in
+              CompletedManifest.load_all(str(output), "sam-boxes-npz").items()}
+    assert chunks == {"a.png": "a.boxes.masks.npz", "b.png": "b.boxes.masks.npz"}
+
+
+def test_stage_timings_are_reported(dataset, monkeypatch, capsys):
+    images, output = dataset
+    run(monkeypatch, images, output, "--mode", "boxes")
+    report = [line for line in capsys.readouterr().out.splitlines() if line.startswith("ms per image:")]
+    assert len(report) == 1
+    for stage in ("read", "prompts", "mask decoding", "encode", "write"):
+        assert f"{stage} " in report[0]
+
+
+def test_removed_archive_is_redone(dataset, monkeypatch):
+    images, output = dataset
+    run(monkeypatch, images, output, "--mode", "auto")
+    (output / "b.masks.npz").unlink()
+    todo = sam_integration.images_to_process(str(images), str(output), "auto", "npz")[1]
+    assert [key for key, *_ in todo] == ["b.png"]
+
+
+def test_output_names():
+    assert sam_integration.output_name("x.jpg", "auto", "npz") == "x.masks.npz"
+    assert sam_integration.output_name("x.jpg", "boxes", "npz") == "x.boxes.masks.npz"
+    assert sam_integration.output_name("x.jpg", "auto", "png") == "x_mask_*.png"
+    assert sam_integration.output_name("x.jpg", "boxes", "png") == "x_boxes_mask_*.png"
+
+
+def test_prefetch_skips_unreadable_items_and_raises_other_errors():
+    def load(item):
+        if item == ("missing",):
+            raise FileNotFoundError(item[0])
+        if item == ("bad",):
+            raise ValueError("decoder crashed")
+        return item[0].upper()
+
+    items = [("a",), ("missing",), ("b",), ("bad",), ("c",)]
+    got = []
+
+    def consume():
+        try:
+            for item, value in sam_integration.prefetch(items, load, depth=2):
+                got.append(value)
+        except ValueError as e:
+            got.append(e)
+
+    thread = threading.Thread(target=consume, daemon=True)
+    thread.start()
+    thread.join(10)
+    assert not thread.is_alive(), "consumer hung waiting for a dead prefetch worker"
+    assert got[:2] == ["A", "B"] and isinstance(got[2], ValueError)
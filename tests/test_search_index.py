@@ -0,0 +1,42 @@
+import random
+
+from search_index import SearchIndex
+
+DEFECTS = ["missing_hole", "mouse_bite", "open_circuit", "short", "spur", "spurious_copper"]
+
+
+def brute_force(results, keys):
+    return [i for i, texts in enumerate(results)
+            if any(key.lower() in text.lower() for key in keys for text in texts)]
+
+
+def test_matches_brute_force_substring_search():
+    rng = random.Random(0)
+    results = []
+    for i in range(300):
+        name = "".join(rng.choice("abcXYZ_01") for _ in range(rng.randint(1, 12))) + ".JPG"
+        results.append([name, *rng.sample(DEFECTS, rng.randint(0, 3))])
+    index = SearchIndex()
+    for i, texts in enumerate(results):
+        index.add(i, texts)
+    assert len(index) == len(results)
+
+    queries = [[""], ["Short"], ["spur"], ["hole", "bite"], ["jpg"], ["_circ"], ["nothing"]]
+    for _ in range(300):
+        text = rng.choice(rng.choice(results))
+        start = rng.randint(0, len(text) - 1)
+        key = text[start:start + rng.randint(1, 7)]
+        queries.append([key.upper() if rng.random() < 0.3 else key])
+        queries.append(["".join(rng.choice("abcXYZ_01.") for _ in range(rng.randint(1, 5)))])
+    for keys in queries:
+        assert index.search(keys) == brute_force(results, keys), keys
+
+
+def test_shared_strings_map_to_every_result():
+    index = SearchIndex()
+    index.add(0, ["a.jpg", "short"])
+    index.add(1, ["b.jpg", "Short"])
+    index.add(2, ["c.jpg"])
+    assert index.search(["SHORT"]) == [0, 1]
+    assert index.search(["short", "c.j"]) == [0, 1, 2]
+    assert index.search([]) == []
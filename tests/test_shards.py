@@ -0,0 +1,85 @@
+import os
+
+import pytest
+
+import shards
+from shards import ShardReader, is_pack, pack
+
+
+def make_dataset(root, n, size=3000):
+    images, labels = root / "images", root / "labels"
+    images.mkdir(parents=True)
+    labels.mkdir(parents=True)
+    for i in range(n):
+        (images / f"img{i:03d}.jpg").write_bytes(bytes([i % 256]) * (size + i))
+        if i % 3:
+            (labels / f"img{i:03d}.txt").write_text(f"{i % 5} 0.5 0.5 0.1 0.1\n")
+    return str(images), str(labels)
+
+
+def test_pack_round_trip(tmp_path):
+    images, labels = make_dataset(tmp_path, 20)
+    out = str(tmp_path / "packed")
+    n_items, n_shards = pack(images, labels, out, shard_bytes=10_000)
+    assert n_items == 20 and n_shards > 1
+    assert is_pack(out)
+
+    with ShardReader(out) as reader:
+        assert len(reader) == 20 and "img005.jpg" in reader
+        for i, name in enumerate(reader.names()):
+            assert bytes(reader.image_bytes(name)) == bytes([i % 256]) * (3000 + i)
+            assert reader.label_text(name) == (f"{i % 5} 0.5 0.5 0.1 0.1\n" if i % 3 else None)
+    assert not reader._views  # mappings released on exit
+
+
+def test_repack_removes_stale_shards(tmp_path):
+    images, labels = make_dataset(tmp_path, 20)
+    out = str(tmp_path / "packed")
+    _, n_before = pack(images, labels, out, shard_bytes=10_000)
+    _, n_after = pack(images, labels, out, shard_bytes=1 << 20)
+    assert n_after == 1 < n_before
+    assert sorted(f for f in os.listdir(out) if f.endswith(".bin")) == ["shard-00000.bin"]
+    with ShardReader(out) as reader:
+        assert bytes(reader.image_bytes("img019.jpg")) == bytes([19]) * 3019
+
+
+def test_interrupted_repack_leaves_no_index(tmp_path, monkeypatch):
+    images, labels = make_dataset(tmp_path, 5)
+    out = str(tmp_path / "packed")
+    pack(images, labels, out)
+
+    def crash(*args, **kwargs):
+        raise KeyboardInterrupt
+    monkeypatch.setattr(shards, "atomic_write", crash)
+    with pytest.raises(KeyboardInterrupt):
+        pack(images, labels, out)
+    assert not is_pack(out)  # old index would describe rewritten shards
+
+
+def test_concurrent_reads_map_each_shard_once(tmp_path, monkeypatch):
+    import threading
+    import time
+    from concurrent.futures import ThreadPoolExecutor
+
+    images, labels = make_dataset(tmp_path, 20)
+    out = str(tmp_path / "packed")
+    _, n_shards = pack(images, labels, out, shard_bytes=10_000)
+
+    real_mmap, calls = shards.mmap.mmap, []
+
+    def slow_mmap(*args, **kwargs):
+        calls.append(args[0])
+        time.sleep(0.01)  # widen the window between lookup and insert
+        return real_mmap(*args, **kwargs)
+
+    monkeypatch.setattr(shards.mmap, "mmap", slow_mmap)
+    barrier = threading.Barrier(8)
+    with ShardReader(out) as reader:
+        def read_all(_):
+            barrier.wait()
+            return [bytes(reader.image_bytes(name))[:1] for name in reader.names()]
+
+        with ThreadPoolExecutor(8) as pool:
+            results = list(pool.map(read_all, range(8)))
+        assert len(calls) == n_shards == len(reader._views)
+    assert all(r == results[0] for r in results)
@@ -0,0 +1,49 @@
+import os
+
+import pytest
+from PIL import Image
+
+from voc import run_xmltosplit, split_of, write_item
+from xmltosplit import EXIF_ORIENTATION, resize_image
+
+
+@pytest.mark.parametrize("fmt", ["JPEG", "PNG"])
+def test_resize_keeps_exif_orientation(tmp_path, fmt):
+    src, dst = str(tmp_path / f"src.{fmt.lower()}"), str(tmp_path / f"dst.{fmt.lower()}")
+    exif = Image.Exif()
+    exif[EXIF_ORIENTATION] = 6  # rotate 90 degrees on display
+    Image.new("RGB", (400, 200), (200, 10, 10)).save(src, format=fmt, exif=exif)
+
+    assert resize_image(src, dst, max_side=100)
+    with Image.open(dst) as out:
+        assert out.size == (100, 50)  # stored pixels are not rotated...
+        assert out.getexif().get(EXIF_ORIENTATION) == 6  # ...and displayed like the source
+
+
+def test_resize_rotated_bmp_is_refused(tmp_path, monkeypatch):
+    src = str(tmp_path / "src.bmp")
+    Image.new("RGB", (400, 200)).save(src)
+    assert resize_image(src, str(tmp_path / "dst.bmp"), max_side=100)  # no EXIF: fine
+
+    monkeypatch.setattr(Image.Image, "getexif", lambda self: {EXIF_ORIENTATION: 8})
+    assert not resize_image(src, str(tmp_path / "dst2.bmp"), max_side=100)
+
+
+def test_small_images_are_not_resized(tmp_path):
+    src = str(tmp_path / "src.jpg")
+    Image.new("RGB", (80, 60)).save(src)
+    assert not resize_image(src, str(tmp_path / "dst.jpg"), max_side=100)
+    assert not os.path.exists(tmp_path / "dst.jpg")
+
+
+def test_max_side_resizes_split_images(tmp_path, monkeypatch):
+    write_item(tmp_path, "big", [("spur", 10, 20, 50, 60)], size=(400, 200))
+    write_item(tmp_path, "small", [("spur", 10, 20, 50, 60)], size=(80, 40))
+    run_xmltosplit(monkeypatch, tmp_path, "--max-side", "100")
+    for name, size in (("big", (100, 50)), ("small", (80, 40))):
+        path = tmp_path / "dataset" / "images" / split_of(tmp_path, name) / f"{name}.jpg"
+        with Image.open(path) as im:
+            assert im.size == size
+    # the source itself is never written through a hardlink
+    with Image.open(tmp_path / "images" / "big.jpg") as im:
+        assert im.size == (400, 200)
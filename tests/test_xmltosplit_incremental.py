@@ -0,0 +1,25 @@
+import os
+
+from voc import run_xmltosplit, split_of, write_item
+from xmltosplit import assign_split
+
+
+def test_split_is_stable_and_incremental(tmp_path, monkeypatch, capsys):
+    (tmp_path / "classes.txt").write_text("open\nspur\n")  # a class map change would redo everything
+    for i in range(12):
+        write_item(tmp_path, f"b{i:02d}", [("spur", 10, 20, 50, 60)])
+    run_xmltosplit(monkeypatch, tmp_path, "--val-split", "0.5")
+    splits = {f"b{i:02d}": split_of(tmp_path, f"b{i:02d}") for i in range(12)}
+    assert splits == {k: assign_split(k, 0.5) for k in splits}
+
+    # a new item and a changed one; the changed one keeps its split even with another val fraction
+    write_item(tmp_path, "new", [("open", 0, 0, 20, 10)])
+    write_item(tmp_path, "b00", [("open", 0, 0, 20, 10)])
+    os.utime(tmp_path / "annotations" / "b00.xml", ns=(1, 1))
+    capsys.readouterr()
+    run_xmltosplit(monkeypatch, tmp_path, "--val-split", "0.0")
+    assert "1 added, 1 changed, 0 deleted, 11 unchanged" in capsys.readouterr().out
+    assert split_of(tmp_path, "b00") == splits["b00"]
+    assert split_of(tmp_path, "new") == "train"
+    label = tmp_path / "dataset" / "labels" / splits["b00"] / "b00.txt"
+    assert label.read_text() == "0 0.050000 0.050000 0.100000 0.100000"
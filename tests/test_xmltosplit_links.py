@@ -0,0 +1,19 @@
+import pytest
+
+from xmltosplit import index_images, materialize
+
+
+def test_index_images_prefers_extension_order(tmp_path):
+    for name in ("a.png", "a.jpg", "b.JPEG", "c.txt"):
+        (tmp_path / name).write_bytes(b"x")
+    assert index_images(str(tmp_path)) == {"a": str(tmp_path / "a.jpg"), "b": str(tmp_path / "b.JPEG")}
+
+
+@pytest.mark.parametrize("mode", ["hardlink", "symlink", "reflink", "copy"])
+def test_materialize_falls_back_to_copy(tmp_path, mode):
+    src, dst = tmp_path / "src.jpg", tmp_path / "dst.jpg"
+    src.write_bytes(b"image")
+    dst.write_bytes(b"stale")
+    used = materialize(str(src), str(dst), mode)
+    assert used in (mode, "copy")
+    assert dst.read_bytes() == b"image"
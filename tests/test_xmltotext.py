@@ -0,0 +1,70 @@
+import os
+import sys
+
+import pytest
+
+import xmltotext
+from voc import write_item
+
+
+def run(monkeypatch, root, *extra):
+    monkeypatch.setattr(sys, "argv", [
+        "xmltotext.py", "--annotations", str(root / "annotations"), "--images", str(root / "images"),
+        "--labels", str(root / "labels"), "--classes", str(root / "classes.txt"), "--workers", "2", *extra,
+    ])
+    xmltotext.main()
+
+
+def labels(root):
+    out = {}
+    for name in sorted(os.listdir(root / "labels")):
+        if name.endswith(".txt"):
+            out[name] = (root / "labels" / name).read_text()
+    return out
+
+
+def test_converts_and_updates_incrementally(tmp_path, monkeypatch, capsys):
+    write_item(tmp_path, "a", [("spur", 10, 20, 50, 60)])
+    write_item(tmp_path, "b", [("open", 0, 0, 100, 50), ("spur", 100, 50, 200, 100)])
+    run(monkeypatch, tmp_path)
+
+    # class ids come from the sorted names, not from file order
+    assert (tmp_path / "classes.txt").read_text() == "open\nspur\n"
+    assert labels(tmp_path) == {
+        "a.txt": "1 0.150000 0.400000 0.200000 0.400000",
+        "b.txt": "0 0.250000 0.250000 0.500000 0.500000\n1 0.750000 0.750000 0.500000 0.500000",
+    }
+
+    # rerun with one changed, one deleted and one added XML
+    write_item(tmp_path, "a", [("open", 0, 0, 20, 10)])
+    os.utime(tmp_path / "annotations" / "a.xml", ns=(1, 1))  # mtime differs even on coarse clocks
+    os.remove(tmp_path / "annotations" / "b.xml")
+    write_item(tmp_path, "c", [("spur", 0, 0, 200, 100)])
+    capsys.readouterr()
+    run(monkeypatch, tmp_path)
+    assert "1 added, 1 changed, 1 deleted, 0 unchanged" in capsys.readouterr().out
+    assert labels(tmp_path) == {
+        "a.txt": "0 0.050000 0.050000 0.100000 0.100000",
+        "c.txt": "1 0.500000 0.500000 1.000000 1.000000",
+    }
+
+    run(monkeypatch, tmp_path)
+    assert "0 added, 0 changed, 0 deleted, 2 unchanged" in capsys.readouterr().out
+
+
+def test_unknown_classes_are_skipped_with_a_warning(tmp_path, monkeypatch, capsys):
+    (tmp_path / "classes.txt").write_text("open\n")
+    write_item(tmp_path, "a", [("open", 0, 0, 20, 10), ("mystery", 0, 0, 1, 1)])
+    run(monkeypatch, tmp_path)
+    assert labels(tmp_path) == {"a.txt": "0 0.050000 0.050000 0.100000 0.100000"}
+    assert "mystery" in capsys.readouterr().out
+
+
+@pytest.mark.parametrize("n_items", [0, 1])
+def test_empty_or_tiny_inputs(tmp_path, monkeypatch, n_items):
+    os.makedirs(tmp_path / "annotations")
+    os.makedirs(tmp_path / "images")
+    for i in range(n_items):
+        write_item(tmp_path, f"x{i}", [("open", 0, 0, 20, 10)])
+    run(monkeypatch, tmp_path)
+    assert len(labels(tmp_path)) == n_items
@@ -0,0 +1,47 @@
+# Helpers for writing small Pascal-VOC datasets in tests.
+import os
+
+from PIL import Image
+
+
+def voc_xml(filename, width, height, objects, with_size=True):
+    size = (f"<size><width>{width}</width><height>{height}</height><depth>3</depth></size>"
+            if with_size else "")
+    objs = "".join(
+        f"<object><name>{name}</name><bndbox><xmin>{x1}</xmin><ymin>{y1}</ymin>"
+        f"<xmax>{x2}</xmax><ymax>{y2}</ymax></bndbox></object>"
+        for name, x1, y1, x2, y2 in objects
+    )
+    return f"<annotation><filename>{filename}</filename>{size}{objs}</annotation>"
+
+
+def write_item(root, base_name, objects, size=(200, 100), ext=".jpg", with_size=True):
+    """Write annotations/<base>.xml and images/<base><ext> under `root`."""
+    ann_dir, img_dir = os.path.join(root, "annotations"), os.path.join(root, "images")
+    os.makedirs(ann_dir, exist_ok=True)
+    os.makedirs(img_dir, exist_ok=True)
+    Image.new("RGB", size, (30, 120, 60)).save(os.path.join(img_dir, base_name + ext))
+    with open(os.path.join(ann_dir, base_name + ".xml"), "w") as f:
+        f.write(voc_xml(base_name + ext, *size, objects, with_size=with_size))
+
+
+def run_xmltosplit(monkeypatch, root, *extra):
+    """Run xmltosplit.main() on the dataset written under `root`, into root/dataset."""
+    import sys
+
+    import xmltosplit
+
+    monkeypatch.setattr(sys, "argv", [
+        "xmltosplit.py", "--annotations", os.path.join(root, "annotations"),
+        "--images", os.path.join(root, "images"), "--output", os.path.join(root, "dataset"),
+        "--classes", os.path.join(root, "classes.txt"), *extra,
+    ])
+    xmltosplit.main()
+
+
+def split_of(root, base_name):
+    """The split xmltosplit put an item in (exactly one)."""
+    found = [s for s in ("train", "val")
+             if os.path.exists(os.path.join(root, "dataset", "labels", s, f"{base_name}.txt"))]
+    assert len(found) == 1
+    return found[0]
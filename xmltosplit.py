@@ -1,115 +1,303 @@
+import argparse
 import os
-import xml.etree.ElementTree as ET
-from PIL import Image
-import shutil
 import random
+import shutil
+import sys
+import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+
+from PIL import Image
+
+from annotations import (
+    build_class_map, load_class_map, parse_voc, save_class_map,
+    scan_class_names, yolo_lines,
+)
+from manifest import ContentManifest, file_signature
 
 # ---------------- SETTINGS ----------------
 ANNOTATIONS_DIR = "annotations"   # Folder with XML files
 IMAGES_DIR = "images"            # Folder with image files
 OUTPUT_DIR = "dataset"           # Root folder for YOLO training
 VAL_SPLIT = 0.2                  # 20% of data for validation
+CLASSES_FILE = "classes.txt"     # Fixed class map (built from the XMLs if missing)
+MANIFEST_NAME = ".manifest.json" # Per-item state of the last run, kept in OUTPUT_DIR
 
-os.makedirs(OUTPUT_DIR, exist_ok=True)
+IMAGE_EXTS = ['.jpg', '.jpeg', '.png', '.bmp', '.tif', '.tiff']
+SPLITS = ("train", "val")
+LINK_MODES = ("hardlink", "symlink", "reflink", "copy")
+FICLONE = 0x40049409  # Linux ioctl: share extents between two files (btrfs, xfs, ...)
+EXIF_ORIENTATION = 0x0112
+EXIF_FORMATS = ("JPEG", "PNG", "TIFF", "WEBP")  # can carry the source's EXIF through a resize
 
-# YOLO expects this structure
-IMAGE_TRAIN_DIR = os.path.join(OUTPUT_DIR, "images", "train")
-IMAGE_VAL_DIR   = os.path.join(OUTPUT_DIR, "images", "val")
-LABEL_TRAIN_DIR = os.path.join(OUTPUT_DIR, "labels", "train")
-LABEL_VAL_DIR   = os.path.join(OUTPUT_DIR, "labels", "val")
+# ------------------------------------------
 
-for d in [IMAGE_TRAIN_DIR, IMAGE_VAL_DIR, LABEL_TRAIN_DIR, LABEL_VAL_DIR]:
-    os.makedirs(d, exist_ok=True)
 
-# ------------------------------------------
+def split_dirs(output_dir, split):
+    """YOLO expects dataset/images/<split> and dataset/labels/<split>."""
+    return (os.path.join(output_dir, "images", split),
+            os.path.join(output_dir, "labels", split))
 
-classes = []
 
-def xyxy_to_yolo(xmin, ymin, xmax, ymax, img_w, img_h):
-    x_center = (xmin + xmax) / 2.0
-    y_center = (ymin + ymax) / 2.0
-    w = xmax - xmin
-    h = ymax - ymin
-    return x_center / img_w, y_center / img_h, w / img_w, h / img_h
+def index_images(images_dir):
+    """
+    One directory scan -> {base name: image path}. When a name exists with
+    several extensions the earliest in IMAGE_EXTS wins.
+    """
+    rank = {ext: i for i, ext in enumerate(IMAGE_EXTS)}
+    best = {}
+    with os.scandir(images_dir) as it:
+        for entry in it:
+            base_name, ext = os.path.splitext(entry.name)
+            r = rank.get(ext.lower())
+            if r is None or not entry.is_file():
+                continue
+            if base_name not in best or r < best[base_name][0]:
+                best[base_name] = (r, entry.path)
+    return {base_name: path for base_name, (_, path) in best.items()}
 
-def parse_xml(xml_file):
-    tree = ET.parse(xml_file)
-    root = tree.getroot()
 
-    # Get image size
-    size = root.find('size')
-    if size is not None:
-        width = int(size.findtext('width'))
-        height = int(size.findtext('height'))
-    else:
-        img_name = root.findtext('filename')
-        img_path = os.path.join(IMAGES_DIR, img_name)
-        with Image.open(img_path) as im:
-            width, height = im.size
-
-    objects = []
-    for obj in root.findall('object'):
-        cls = obj.findtext('name')
-        if cls not in classes:
-            classes.append(cls)
-        cls_id = classes.index(cls)
-        bndbox = obj.find('bndbox')
-        xmin = float(bndbox.findtext('xmin'))
-        ymin = float(bndbox.findtext('ymin'))
-        xmax = float(bndbox.findtext('xmax'))
-        ymax = float(bndbox.findtext('ymax'))
-        x, y, w, h = xyxy_to_yolo(xmin, ymin, xmax, ymax, width, height)
-        objects.append(f"{cls_id} {x:.6f} {y:.6f} {w:.6f} {h:.6f}")
-    return objects
-
-# ----------------- MAIN -------------------
-xml_files = [f for f in os.listdir(ANNOTATIONS_DIR) if f.endswith(".xml")]
-random.shuffle(xml_files)
-
-val_count = int(len(xml_files) * VAL_SPLIT)
-
-for i, xml_file in enumerate(xml_files):
-    label_lines = parse_xml(os.path.join(ANNOTATIONS_DIR, xml_file))
-    base_name = os.path.splitext(xml_file)[0]
-
-    # Determine split
-    if i < val_count:
-        img_dest = IMAGE_VAL_DIR
-        label_dest = LABEL_VAL_DIR
+def _reflink(src, dst):
+    import fcntl  # POSIX only; callers fall back to a copy elsewhere
+    with open(src, "rb") as s, open(dst, "wb") as d:
+        fcntl.ioctl(d.fileno(), FICLONE, s.fileno())
+
+
+def materialize(src, dst, mode):
+    """
+    Place `src` at `dst` without duplicating data when possible. Falls back
+    to a copy when the link type is unsupported (other device, FS, OS).
+    Returns the mode actually used.
+    """
+    if os.path.lexists(dst):
+        os.remove(dst)
+    try:
+        if mode == "hardlink":
+            os.link(src, dst)
+            return mode
+        if mode == "symlink":
+            os.symlink(os.path.abspath(src), dst)
+            return mode
+        if mode == "reflink" and sys.platform.startswith("linux"):
+            _reflink(src, dst)
+            return mode
+    except OSError:
+        if os.path.lexists(dst):
+            os.remove(dst)
+    shutil.copyfile(src, dst)
+    return "copy"
+
+
+def resize_image(src, dst, max_side):
+    """
+    Write `src` scaled so its longer side is at most `max_side`, keeping the
+    aspect ratio (YOLO letterboxes later, so normalized labels stay valid).
+    The pixels are not rotated and the EXIF (orientation included) is copied,
+    so a resized image is oriented exactly like a linked one.
+    Returns False, writing nothing, when the image is already small enough or
+    is rotated by EXIF in a format that cannot carry it.
+    """
+    with Image.open(src) as im:
+        w, h = im.size
+        scale = max_side / max(w, h)
+        if scale >= 1:
+            return False
+        fmt = im.format
+        exif = im.getexif()
+        if fmt not in EXIF_FORMATS:
+            if exif.get(EXIF_ORIENTATION, 1) != 1:
+                return False
+            exif = None
+        size = (max(1, round(w * scale)), max(1, round(h * scale)))
+        im.draft(im.mode, size)  # JPEG: let the decoder downscale by 1/2..1/8 first
+        out = im.resize(size, Image.LANCZOS)
+
+    if os.path.lexists(dst):
+        os.remove(dst)
+    options = {"exif": exif} if exif else {}
+    if fmt == "JPEG":
+        options["quality"] = 95
+    out.save(dst, format=fmt, **options)
+    return True
+
+
+def measure_decode(paths, sample=200):
+    """Average seconds to fully decode one image, over a random sample."""
+    paths = random.Random(0).sample(paths, min(sample, len(paths)))
+    if not paths:
+        return 0.0
+    t0 = time.perf_counter()
+    for p in paths:
+        with Image.open(p) as im:
+            im.load()
+    return (time.perf_counter() - t0) / len(paths)
+
+
+def assign_split(base_name, val_split):
+    """Split for a new item: a hash of its name, so it never depends on file order."""
+    return "val" if zlib.crc32(base_name.encode("utf-8")) / 2**32 < val_split else "train"
+
+
+def existing_splits(output_dir):
+    """{base name: split} for labels already on disk (datasets built before the manifest)."""
+    found = {}
+    for split in SPLITS:
+        with os.scandir(split_dirs(output_dir, split)[1]) as it:
+            for entry in it:
+                base_name, ext = os.path.splitext(entry.name)
+                if ext == ".txt":
+                    found.setdefault(base_name, split)
+    return found
+
+
+def remove_outputs(entry):
+    for path in (entry["image"], entry["label"]):
+        if os.path.lexists(path):
+            os.remove(path)
+
+
+def convert_item(xml_path, img_path, img_dest, label_dest, class_map, images_dir,
+                 link_mode, max_side=None):
+    """Place one image + label into its split; returns (image, label, unknown, mode used)."""
+    _, width, height, objects = parse_voc(xml_path, images_dir)
+    label_lines, unknown = yolo_lines(objects, width, height, class_map)
+    base_name = os.path.splitext(os.path.basename(xml_path))[0]
+
+    # Resize, or link (or copy) the image as is
+    out_img = os.path.join(img_dest, os.path.basename(img_path))
+    if max_side and resize_image(img_path, out_img, max_side):
+        used = "resized"
     else:
-        img_dest = IMAGE_TRAIN_DIR
-        label_dest = LABEL_TRAIN_DIR
-
-    # Copy image
-    # Try common extensions if not specified
-    img_name = base_name
-    img_path = None
-    for ext in ['.jpg', '.jpeg', '.png', '.bmp', '.tif', '.tiff']:
-        temp_path = os.path.join(IMAGES_DIR, base_name + ext)
-        if os.path.exists(temp_path):
-            img_path = temp_path
-            img_name = base_name + ext
-            break
-    if img_path is None:
-        print(f"[WARN] Image for {base_name} not found, skipping.")
-        continue
-    shutil.copy(img_path, os.path.join(img_dest, img_name))
+        used = materialize(img_path, out_img, link_mode)
 
     # Write label file
     txt_path = os.path.join(label_dest, base_name + ".txt")
     with open(txt_path, 'w') as f:
         f.write("\n".join(label_lines))
+    return out_img, txt_path, unknown, used
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Convert VOC XML to a YOLO train/val dataset")
+    parser.add_argument("--annotations", default=ANNOTATIONS_DIR)
+    parser.add_argument("--images", default=IMAGES_DIR)
+    parser.add_argument("--output", default=OUTPUT_DIR)
+    parser.add_argument("--val-split", type=float, default=VAL_SPLIT,
+                        help="validation fraction for new items; existing items keep their split")
+    parser.add_argument("--classes", default=CLASSES_FILE)
+    parser.add_argument("--full", action="store_true",
+                        help="ignore the manifest and rebuild every item")
+    parser.add_argument("--link-mode", choices=LINK_MODES, default="hardlink",
+                        help="how images are placed in the split (copy doubles disk usage)")
+    parser.add_argument("--workers", type=int, default=8, help="parallel I/O threads")
+    parser.add_argument("--max-side", type=int, default=None,
+                        help="write images resized so the longer side is at most this "
+                             "(e.g. 1024 when training at 640-1024); labels are unchanged")
+    parser.add_argument("--measure-decode", action="store_true",
+                        help="report estimated decode time per epoch, source vs split images")
+    args = parser.parse_args()
+
+    for split in SPLITS:
+        for d in split_dirs(args.output, split):
+            os.makedirs(d, exist_ok=True)
+
+    xml_files = sorted(f for f in os.listdir(args.annotations) if f.endswith(".xml"))
+
+    # Fixed class map so IDs match xmltotext.py and never depend on file order
+    if os.path.exists(args.classes):
+        class_map = load_class_map(args.classes)
+    else:
+        names = set()
+        for xml_file in xml_files:
+            names |= scan_class_names(os.path.join(args.annotations, xml_file))
+        class_map = build_class_map(names)
+
+    # Item key is the XML basename; its signature covers the XML and the image
+    t0 = time.perf_counter()
+    images = index_images(args.images)
+    sources, current = {}, {}
+    for xml_file in xml_files:
+        base_name = os.path.splitext(xml_file)[0]
+        xml_path = os.path.join(args.annotations, xml_file)
+        img_path = images.get(base_name)
+        if img_path is None:
+            print(f"[WARN] Image for {base_name} not found, skipping.")
+            continue
+        sources[base_name] = (xml_path, img_path)
+        current[base_name] = (*file_signature(xml_path), *file_signature(img_path))
+
+    params = {"classes": sorted(class_map, key=class_map.get)}
+    if args.max_side:
+        params["max_side"] = args.max_side  # changing it rewrites every image
+    manifest = ContentManifest(os.path.join(args.output, MANIFEST_NAME), params=params)
+    if args.full:
+        for entry in manifest.entries.values():
+            entry["sig"] = None
+    added, changed, deleted = manifest.diff(current)
+
+    for base_name in deleted:
+        remove_outputs(manifest.entries.pop(base_name))
+
+    unknown = set()
+    modes_used = {}
+    todo = sorted(added + changed)
+    on_disk = existing_splits(args.output) if added else {}
+    try:
+        with ThreadPoolExecutor(args.workers) as pool:
+            jobs = []
+            for base_name in todo:
+                entry = manifest.entries.get(base_name)
+                if entry is not None:
+                    split = entry["split"]
+                    remove_outputs(entry)  # the image extension may have changed
+                else:
+                    split = (on_disk.get(base_name)
+                             or assign_split(base_name, args.val_split))
+
+                img_dest, label_dest = split_dirs(args.output, split)
+                xml_path, img_path = sources[base_name]
+                jobs.append((base_name, split, pool.submit(
+                    convert_item, xml_path, img_path, img_dest, label_dest,
+                    class_map, args.images, args.link_mode, args.max_side)))
+
+            for base_name, split, job in jobs:
+                out_img, txt_path, missing, used = job.result()
+                unknown |= missing
+                modes_used[used] = modes_used.get(used, 0) + 1
+                manifest.entries[base_name] = {
+                    "sig": list(current[base_name]), "split": split,
+                    "image": out_img, "label": txt_path,
+                }
+    finally:
+        manifest.save()
+    elapsed = time.perf_counter() - t0
+
+    # Save classes.txt
+    save_class_map(class_map, os.path.join(args.output, "classes.txt"))
+
+    if unknown:
+        print(f"[WARN] Skipped boxes with classes not in the class map: {sorted(unknown)}")
+    n_val = sum(1 for e in manifest.entries.values() if e["split"] == "val")
+    print("Done!")
+    print(f"{len(added)} added, {len(changed)} changed, {len(deleted)} deleted, "
+          f"{len(current) - len(added) - len(changed)} unchanged")
+    print(f"{len(manifest.entries) - n_val} train / {n_val} val items")
+    print(f"{len(todo)} items materialized in {elapsed:.1f}s "
+          f"({', '.join(f'{n} {m}' for m, n in sorted(modes_used.items())) or 'nothing to do'})")
+    if args.measure_decode:
+        src = [sources[k][1] for k in manifest.entries if k in sources]
+        out = [e["image"] for e in manifest.entries.values()]
+        before, after = measure_decode(src), measure_decode(out)
+        print(f"Decode time per epoch ({len(out)} images, sampled): "
+              f"source {before * len(src):.1f}s -> split {after * len(out):.1f}s")
+    print(f"YOLO dataset ready in '{args.output}'")
+    print("Folder structure:")
+    print("dataset/images/train")
+    print("dataset/images/val")
+    print("dataset/labels/train")
+    print("dataset/labels/val")
+    print("classes.txt contains class names.")
+
 
-# Save classes.txt
-with open(os.path.join(OUTPUT_DIR, "classes.txt"), "w") as f:
-    for cls in classes:
-        f.write(cls + "\n")
-
-print("Done!")
-print(f"YOLO dataset ready in '{OUTPUT_DIR}'")
-print("Folder structure:")
-print("dataset/images/train")
-print("dataset/images/val")
-print("dataset/labels/train")
-print("dataset/labels/val")
-print("classes.txt contains class names.")
+if __name__ == "__main__":
+    main()
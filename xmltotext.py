@@ -1,71 +1,118 @@
+import argparse
 import os
-import xml.etree.ElementTree as ET
-from PIL import Image
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from annotations import (
+    build_class_map, load_class_map, parse_voc, save_class_map,
+    scan_class_names, yolo_lines,
+)
+from manifest import ContentManifest, file_signature
 
 # --- Folders ---
 ANNOTATIONS_DIR = "annotations"  # XML files
 IMAGES_DIR = "images"            # Image files
 LABELS_DIR = "labels"            # Output YOLO txt files
+CLASSES_FILE = "classes.txt"     # Fixed class map (built by a pre-pass if missing)
+MANIFEST_NAME = ".manifest.json"  # Per-XML state of the last run, kept in LABELS_DIR
+
+# Per-worker settings, set once by the pool initializer instead of per task
+_worker = {}
+
+
+def _init_worker(class_map, images_dir, labels_dir):
+    _worker.update(class_map=class_map, images_dir=images_dir, labels_dir=labels_dir)
+
+
+def convert_one(xml_path):
+    """Convert one VOC file; returns (label path, n_boxes, unknown class names)."""
+    _, width, height, objects = parse_voc(xml_path, _worker["images_dir"])
+    label_lines, unknown = yolo_lines(objects, width, height, _worker["class_map"])
 
-os.makedirs(LABELS_DIR, exist_ok=True)
+    # Save to labels folder with same basename
+    base_name = os.path.splitext(os.path.basename(xml_path))[0]
+    txt_path = os.path.join(_worker["labels_dir"], base_name + ".txt")
+    with open(txt_path, 'w') as f:
+        f.write("\n".join(label_lines))
+    return txt_path, len(label_lines), unknown
 
-# Collect all classes dynamically
-classes = []
 
-def xyxy_to_yolo(xmin, ymin, xmax, ymax, img_w, img_h):
-    x_center = (xmin + xmax) / 2.0
-    y_center = (ymin + ymax) / 2.0
-    w = xmax - xmin
-    h = ymax - ymin
-    return x_center / img_w, y_center / img_h, w / img_w, h / img_h
+def main():
+    parser = argparse.ArgumentParser(description="Convert Pascal-VOC XML to YOLO labels")
+    parser.add_argument("--annotations", default=ANNOTATIONS_DIR)
+    parser.add_argument("--images", default=IMAGES_DIR)
+    parser.add_argument("--labels", default=LABELS_DIR)
+    parser.add_argument("--classes", default=CLASSES_FILE,
+                        help="class map; built from the XMLs (sorted) if the file is missing")
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--full", action="store_true",
+                        help="ignore the manifest and reconvert everything")
+    args = parser.parse_args()
 
-def parse_xml(xml_file):
-    tree = ET.parse(xml_file)
-    root = tree.getroot()
+    os.makedirs(args.labels, exist_ok=True)
+    xml_files = sorted(
+        os.path.join(args.annotations, f)
+        for f in os.listdir(args.annotations) if f.endswith(".xml")
+    )
+    chunksize = max(1, len(xml_files) // (4 * (args.workers or 1)))
 
-    # Get image size
-    size = root.find('size')
-    if size is not None:
-        width = int(size.findtext('width'))
-        height = int(size.findtext('height'))
+    t0 = time.perf_counter()
+    if os.path.exists(args.classes):
+        class_map = load_class_map(args.classes)
+        print(f"Using class map from '{args.classes}'")
     else:
-        # Try reading from image
-        img_name = root.findtext('filename')
-        img_path = os.path.join(IMAGES_DIR, img_name)
-        with Image.open(img_path) as im:
-            width, height = im.size
-
-    objects = []
-    for obj in root.findall('object'):
-        cls = obj.findtext('name')
-        if cls not in classes:
-            classes.append(cls)
-        cls_id = classes.index(cls)
-        bndbox = obj.find('bndbox')
-        xmin = float(bndbox.findtext('xmin'))
-        ymin = float(bndbox.findtext('ymin'))
-        xmax = float(bndbox.findtext('xmax'))
-        ymax = float(bndbox.findtext('ymax'))
-        x, y, w, h = xyxy_to_yolo(xmin, ymin, xmax, ymax, width, height)
-        objects.append(f"{cls_id} {x:.6f} {y:.6f} {w:.6f} {h:.6f}")
-    return objects
-
-# Process all XML files
-for xml_file in os.listdir(ANNOTATIONS_DIR):
-    if xml_file.endswith(".xml"):
-        xml_path = os.path.join(ANNOTATIONS_DIR, xml_file)
-        label_lines = parse_xml(xml_path)
-        # Save to labels folder with same basename
-        base_name = os.path.splitext(xml_file)[0]
-        txt_path = os.path.join(LABELS_DIR, base_name + ".txt")
-        with open(txt_path, 'w') as f:
-            f.write("\n".join(label_lines))
-
-# Save classes.txt
-with open("classes.txt", "w") as f:
-    for cls in classes:
-        f.write(cls + "\n")
-
-print("Conversion completed!")
-print(f"YOLO labels saved in '{LABELS_DIR}'")
-print("Classes saved in 'classes.txt'")
+        names = set()
+        with ProcessPoolExecutor(args.workers) as pool:
+            for found in pool.map(scan_class_names, xml_files, chunksize=chunksize):
+                names |= found
+        class_map = build_class_map(names)
+        save_class_map(class_map, args.classes)
+        print(f"Built class map from annotations, saved in '{args.classes}'")
+
+    # Only added / changed XMLs are converted; a class map change redoes all
+    manifest = ContentManifest(
+        os.path.join(args.labels, MANIFEST_NAME),
+        params={"classes": sorted(class_map, key=class_map.get)},
+    )
+    if args.full:
+        for entry in manifest.entries.values():
+            entry["sig"] = None
+    current = {os.path.basename(p): file_signature(p) for p in xml_files}
+    added, changed, deleted = manifest.diff(current)
+
+    for key in deleted:
+        label = manifest.entries.pop(key)["label"]
+        if os.path.exists(label):
+            os.remove(label)
+
+    todo = sorted(added + changed)
+    todo_paths = [os.path.join(args.annotations, k) for k in todo]
+    chunksize = max(1, len(todo) // (4 * (args.workers or 1)))
+    n_boxes, unknown = 0, set()
+    try:
+        if todo:
+            # Workers receive the class map once, through the initializer
+            with ProcessPoolExecutor(args.workers, initializer=_init_worker,
+                                     initargs=(class_map, args.images, args.labels)) as pool:
+                results = pool.map(convert_one, todo_paths, chunksize=chunksize)
+                for key, (txt_path, boxes, missing) in zip(todo, results):
+                    manifest.entries[key] = {"sig": list(current[key]), "label": txt_path}
+                    n_boxes += boxes
+                    unknown |= missing
+    finally:
+        # keep progress even if one XML is malformed
+        manifest.save()
+    elapsed = time.perf_counter() - t0
+
+    if unknown:
+        print(f"[WARN] Skipped boxes with classes not in '{args.classes}': {sorted(unknown)}")
+    print("Conversion completed!")
+    print(f"{len(added)} added, {len(changed)} changed, {len(deleted)} deleted, "
+          f"{len(current) - len(todo)} unchanged")
+    print(f"{len(todo)} files, {n_boxes} boxes in {elapsed:.1f}s "
+          f"({len(todo) / max(elapsed, 1e-9):.1f} files/s)")
+    print(f"YOLO labels saved in '{args.labels}'")
+
+
+if __name__ == "__main__":
+    main()